@@ -7,6 +7,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'config'))
 from config import Config
 from blueprints.otp import otp_blueprint
 from blueprints.api_tokens import api_tokens_bp
+from blueprints.voices import voices_bp
+from voice_api.services.warmup import start_warmup, get_warmup
 
 # Configure logging
 logging.basicConfig(
@@ -22,12 +24,35 @@ app.config.from_object(Config)
 # Register blueprints
 app.register_blueprint(otp_blueprint, url_prefix='')
 app.register_blueprint(api_tokens_bp, url_prefix='')
+app.register_blueprint(voices_bp, url_prefix='')
+
+def on_startup():
+    """
+    Startup hook, run once by the serving process before it takes traffic:
+    loads engines, voices and prompt clips in the background.
+    """
+    start_warmup()
 
 # Health check endpoint
 @app.route('/health')
 def health_check():
     return {'status': 'healthy', 'version': '1.0.0'}, 200
 
+# Readiness for load balancers: 503 until warm-up has finished
+@app.route('/ready')
+def readiness_check():
+    warmup = get_warmup()
+    if warmup is None:
+        return {'status': 'ready', 'ready': True}, 200
+    status = warmup.status()
+    if not status['ready'] and warmup.retry():
+        # Steps that still failed after their retries get another round
+        status = warmup.status()
+    return status, 200 if status['ready'] else 503
+
 if __name__ == "__main__":
+    # Only the serving process warms up: spawned TTS and transcode workers
+    # re-import this module as __mp_main__ and must not start pools
+    on_startup()
     logger.info(f"Starting Let's Talk API on port {Config.PORT}")
     app.run(host='0.0.0.0', port=Config.PORT, debug=Config.DEBUG)
@@ -1,22 +1,23 @@
 import secrets
 import hashlib
-import json
 import os
+import sys
 from datetime import datetime
 from flask import Blueprint, request, jsonify
 from functools import wraps
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'config'))
+from config import Config
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from voice_api.plugins.token_store import resolve_token_store
 
 api_tokens_bp = Blueprint('api_tokens', __name__)
 
-# Simple file-based storage for API tokens
-TOKENS_FILE = 'data/api_tokens.json'
+# Token state lives in the configured token store (file or redis)
+TOKEN_STORE_BACKEND = Config.TOKEN_STORE_BACKEND
 
-def ensure_tokens_file():
-    """Ensure the tokens file exists"""
-    os.makedirs('data', exist_ok=True)
-    if not os.path.exists(TOKENS_FILE):
-        with open(TOKENS_FILE, 'w') as f:
-            json.dump({}, f)
+def get_token_store():
+    """Return the configured token store"""
+    return resolve_token_store(TOKEN_STORE_BACKEND)
 
 def hash_token(token):
     """Hash a token using SHA-256"""
@@ -28,58 +29,29 @@ def generate_token():
 
 def store_token(name, token):
     """Store a token with its hash"""
-    ensure_tokens_file()
-    
-    with open(TOKENS_FILE, 'r') as f:
-        tokens = json.load(f)
-    
     token_hash = hash_token(token)
-    tokens[token_hash] = {
+    get_token_store().put(token_hash, {
         'name': name,
         'created_at': datetime.utcnow().isoformat(),
         'last_used': None,
         'usage_count': 0
-    }
-    
-    with open(TOKENS_FILE, 'w') as f:
-        json.dump(tokens, f, indent=2)
+    })
     
     return token_hash
 
 def validate_token(token):
     """Validate a token exists and return its info"""
-    ensure_tokens_file()
-    
-    with open(TOKENS_FILE, 'r') as f:
-        tokens = json.load(f)
-    
-    token_hash = hash_token(token)
-    return tokens.get(token_hash)
+    return get_token_store().get(hash_token(token))
 
 def update_token_usage(token_hash):
     """Update token usage statistics"""
-    ensure_tokens_file()
-    
-    with open(TOKENS_FILE, 'r') as f:
-        tokens = json.load(f)
-    
-    if token_hash in tokens:
-        tokens[token_hash]['last_used'] = datetime.utcnow().isoformat()
-        tokens[token_hash]['usage_count'] += 1
-        
-        with open(TOKENS_FILE, 'w') as f:
-            json.dump(tokens, f, indent=2)
+    get_token_store().record_usage(token_hash, datetime.utcnow().isoformat())
 
 def get_all_tokens():
     """Get all tokens (without the actual token values)"""
-    ensure_tokens_file()
-    
-    with open(TOKENS_FILE, 'r') as f:
-        tokens = json.load(f)
-    
     # Return token info without the actual hashes
     result = []
-    for token_hash, info in tokens.items():
+    for token_hash, info in get_token_store().items():
         result.append({
             'name': info['name'],
             'created_at': info['created_at'],
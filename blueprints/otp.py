@@ -1,6 +1,9 @@
 import logging
-from flask import Blueprint, request, jsonify, current_app
-from utils.otp_logic import generate_otp, store_otp, speak_otp, get_stored_otp
+from flask import Blueprint, Response, request, jsonify, current_app
+from utils.otp_logic import (generate_otp, store_otp, store_otps, speak_otp, queue_speak_otp, DeliveryQueueFull,
+                             replay_otp_audio, consume_otp)
+from voice_api.utils.audio_types import AUDIO_MIME_TYPES
+from voice_api.services.tts_workers import TTSQueueFull
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +32,53 @@ def send_otp():
 
         return jsonify({"status": "success", "otp_id": otp_id, "otp": otp})
 
+    except TTSQueueFull as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@otp_blueprint.route('/api/otp/send/batch', methods=['POST'])
+def send_otp_batch():
+    """
+    API endpoint to generate and store OTPs for many users at once.
+    Codes are stored in one write and voice delivery is queued.
+    """
+    data = request.get_json()
+    if not data or not isinstance(data.get('user_ids'), list) or not data['user_ids']:
+        return jsonify({"status": "error", "message": "user_ids must be a non-empty list"}), 400
+
+    max_batch_size = current_app.config.get('OTP_BATCH_MAX_SIZE', 1000)
+    if len(data['user_ids']) > max_batch_size:
+        return jsonify({"status": "error", "message": f"At most {max_batch_size} user_ids per batch"}), 400
+
+    # One result per input item, in input order
+    results = [None] * len(data['user_ids'])
+    otps = {}
+    positions = {}
+    for index, user_id in enumerate(data['user_ids']):
+        if not isinstance(user_id, str) or not user_id:
+            results[index] = {"user_id": user_id, "status": "error", "message": "Invalid user_id"}
+        elif user_id in otps:
+            results[index] = {"user_id": user_id, "status": "error", "message": "Duplicate user_id"}
+        else:
+            otps[user_id] = generate_otp()
+            positions[user_id] = index
+
+    try:
+        otp_ids = store_otps(otps)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    for user_id, otp in otps.items():
+        try:
+            queue_speak_otp(user_id, otp)
+        except DeliveryQueueFull as e:
+            results[positions[user_id]] = {"user_id": user_id, "status": "error", "message": str(e)}
+            continue
+        results[positions[user_id]] = {"user_id": user_id, "status": "queued", "otp_id": otp_ids[user_id], "otp": otp}
+
+    return jsonify({"status": "success", "results": results})
+
 @otp_blueprint.route('/calls/otp/verify', methods=['POST'])
 def verify_otp():
     """
@@ -45,8 +92,7 @@ def verify_otp():
     otp = data['otp']
 
     try:
-        stored_otp = get_stored_otp(user_id)
-        if stored_otp and str(stored_otp) == str(otp):
+        if consume_otp(user_id, otp):
             return jsonify({"status": "success", "message": "OTP verified successfully"})
         else:
             return jsonify({"status": "error", "message": "Invalid or expired OTP"}), 400
@@ -66,10 +112,11 @@ def replay_otp():
     user_id = data['user_id']
 
     try:
-        stored_otp = get_stored_otp(user_id)
-        if stored_otp:
-            speak_otp(stored_otp)
-            return jsonify({"status": "success", "message": "OTP replayed", "otp": stored_otp})
+        # Stream the stored prompt instead of synthesizing it again
+        replayed = replay_otp_audio(user_id)
+        if replayed:
+            mimetype = AUDIO_MIME_TYPES.get(replayed.audio_format, 'application/octet-stream')
+            return Response(replayed.audio, mimetype=mimetype, headers={'Cache-Control': 'no-store'})
         else:
             return jsonify({"status": "error", "message": "No OTP found for this user"}), 404
 
@@ -0,0 +1,29 @@
+import os
+import sys
+from flask import Blueprint, request, jsonify
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'config'))
+from config import Config
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from voice_api.services.voice_catalog import get_voice_catalog
+from blueprints.api_tokens import require_token
+
+voices_bp = Blueprint('voices', __name__)
+
+@voices_bp.route('/api/voices', methods=['GET'])
+def list_voices():
+    """List installed voices, optionally filtered by language and gender"""
+    catalog = get_voice_catalog()
+    return jsonify({
+        'voices': catalog.voices(language=request.args.get('language'), gender=request.args.get('gender')),
+        'default_voice': catalog.resolve(),
+        'default_gender': Config.DEFAULT_VOICE_GENDER,
+        'catalog': catalog.metrics()
+    }), 200
+
+@voices_bp.route('/api/voices/refresh', methods=['POST'])
+@require_token
+def refresh_voices():
+    """Re-read the engine's voices after voices are installed or removed (requires authentication)"""
+    catalog = get_voice_catalog()
+    count = catalog.refresh()
+    return jsonify({'message': f'Loaded {count} voices', 'catalog': catalog.metrics()}), 200
@@ -12,9 +12,13 @@ class Config:
     # Security Settings
     OTP_EXPIRY_MINUTES = int(os.environ.get('OTP_EXPIRY_MINUTES', 5))
     MAX_OTP_ATTEMPTS = int(os.environ.get('MAX_OTP_ATTEMPTS', 3))
+    OTP_BATCH_MAX_SIZE = int(os.environ.get('OTP_BATCH_MAX_SIZE', 1000))
     
     # Storage Settings
     OTP_STORE_FILE = os.environ.get('OTP_STORE_FILE') or 'otp_store.json'
+    OTP_STORE_BACKEND = os.environ.get('OTP_STORE_BACKEND') or 'memory'
+    OTP_REAPER_INTERVAL = int(os.environ.get('OTP_REAPER_INTERVAL', 30))
+    TOKEN_STORE_BACKEND = os.environ.get('TOKEN_STORE_BACKEND') or 'file'
     ANALYTICS_FILE = os.environ.get('ANALYTICS_FILE') or 'analytics_data.json'
     USER_SETTINGS_FILE = os.environ.get('USER_SETTINGS_FILE') or 'user_settings.json'
     
@@ -23,5 +27,67 @@ class Config:
     DEFAULT_VOICE_VOLUME = float(os.environ.get('DEFAULT_VOICE_VOLUME', 1.0))
     DEFAULT_VOICE_GENDER = os.environ.get('DEFAULT_VOICE_GENDER', 'female')
     
+    # Reusable pyttsx3 engines; most speech drivers are not re-entrant, so
+    # only raise the pool size for drivers that tolerate parallel engines
+    TTS_ENGINE_POOL_SIZE = int(os.environ.get('TTS_ENGINE_POOL_SIZE', 1))
+    TTS_ENGINE_MAX_USES = int(os.environ.get('TTS_ENGINE_MAX_USES', 100))
+    TTS_ENGINE_CHECKOUT_TIMEOUT = float(os.environ.get('TTS_ENGINE_CHECKOUT_TIMEOUT', 30))
+    
+    # TTS worker processes (0 runs synthesis in the request thread)
+    TTS_WORKERS = int(os.environ.get('TTS_WORKERS', 0))
+    TTS_QUEUE_SIZE = int(os.environ.get('TTS_QUEUE_SIZE', 100))
+    TTS_JOB_TIMEOUT = float(os.environ.get('TTS_JOB_TIMEOUT', 30))
+    # How long a caller waits for a job, time spent queued included
+    TTS_WAIT_TIMEOUT = float(os.environ.get('TTS_WAIT_TIMEOUT', 120))
+    
+    # Conversion of WAV renders to the requested output format
+    # (0 workers transcodes in the request thread)
+    TRANSCODE_WORKERS = int(os.environ.get('TRANSCODE_WORKERS', 0))
+    TRANSCODE_TIMEOUT = float(os.environ.get('TRANSCODE_TIMEOUT', 30))
+    TRANSCODE_BITRATE_KBPS = int(os.environ.get('TRANSCODE_BITRATE_KBPS', 32))
+    
+    # Most texts accepted by one /api/polly/synthesize/batch request
+    SYNTHESIS_BATCH_MAX_SIZE = int(os.environ.get('SYNTHESIS_BATCH_MAX_SIZE', 100))
+    
+    # Synthesized audio cache (memory LRU + disk tier)
+    AUDIO_CACHE_ENABLED = os.environ.get('AUDIO_CACHE_ENABLED', 'True').lower() == 'true'
+    AUDIO_CACHE_MEMORY_BYTES = int(os.environ.get('AUDIO_CACHE_MEMORY_BYTES', 32 * 1024 * 1024))
+    AUDIO_CACHE_DIR = os.environ.get('AUDIO_CACHE_DIR', os.path.join('data', 'audio_cache'))
+    AUDIO_CACHE_DISK_BYTES = int(os.environ.get('AUDIO_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+    
+    # OTP prompts assembled from pre-rendered digit clips
+    OTP_CLIP_BANK_ENABLED = os.environ.get('OTP_CLIP_BANK_ENABLED', 'True').lower() == 'true'
+    OTP_CLIP_CROSSFADE_MS = int(os.environ.get('OTP_CLIP_CROSSFADE_MS', 10))
+    OTP_CLIP_GAP_MS = int(os.environ.get('OTP_CLIP_GAP_MS', 250))
+    
+    # Pre-rendered OTP pool
+    OTP_POOL_ENABLED = os.environ.get('OTP_POOL_ENABLED', 'False').lower() == 'true'
+    OTP_POOL_SIZE = int(os.environ.get('OTP_POOL_SIZE', 50))
+    OTP_POOL_LOW_WATER = int(os.environ.get('OTP_POOL_LOW_WATER', 10))
+    
+    # Encrypted OTP prompt audio kept for replays until verify or expiry
+    # (no OTP_REPLAY_KEY: a random key per process; the prompt is rendered
+    # when the OTP is sent, so replays never synthesize)
+    OTP_REPLAY_ENABLED = os.environ.get('OTP_REPLAY_ENABLED', 'True').lower() == 'true'
+    OTP_REPLAY_MAX_ENTRIES = int(os.environ.get('OTP_REPLAY_MAX_ENTRIES', 10000))
+    OTP_REPLAY_MAX_BYTES = int(os.environ.get('OTP_REPLAY_MAX_BYTES', 64 * 1024 * 1024))
+    OTP_REPLAY_KEY = os.environ.get('OTP_REPLAY_KEY') or None
+    # Opt-in: also keep the code, sealed with OTP_REPLAY_KEY, in the shared
+    # OTP store so other nodes can replay it. Off: the store only holds hashes
+    OTP_REPLAY_SHARED = os.environ.get('OTP_REPLAY_SHARED', 'False').lower() == 'true'
+    
+    # Asynchronous OTP delivery (sync or async)
+    OTP_DELIVERY_MODE = os.environ.get('OTP_DELIVERY_MODE') or 'sync'
+    OTP_DELIVERY_WORKERS = int(os.environ.get('OTP_DELIVERY_WORKERS', 1))
+    OTP_DELIVERY_QUEUE_SIZE = int(os.environ.get('OTP_DELIVERY_QUEUE_SIZE', 1000))
+    OTP_DELIVERY_HISTORY = int(os.environ.get('OTP_DELIVERY_HISTORY', 10000))
+    
+    # Startup warm-up; /ready answers 503 until it finishes
+    WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'True').lower() == 'true'
+    WARMUP_PROBE_TEXT = os.environ.get('WARMUP_PROBE_TEXT') or 'Warming up.'
+    # A failed step is retried with doubling delays; /ready restarts it after that
+    WARMUP_RETRIES = int(os.environ.get('WARMUP_RETRIES', 3))
+    WARMUP_RETRY_BACKOFF = float(os.environ.get('WARMUP_RETRY_BACKOFF', 1.0))
+    
     # Development Settings
     READ_ONLY = os.environ.get('READ_ONLY', 'False').lower() == 'true'
\ No newline at end of file
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark single vs batch OTP issuance
+Issues OTPs for N users through /api/otp/send (one request per user) and
+through /api/otp/send/batch, with voice delivery stubbed out so only the
+HTTP and storage path is measured.
+
+Usage: python scripts/bench_otp_batch.py --users 500 --backend file
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from unittest.mock import patch
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch OTP issuance')
+    parser.add_argument('--users', type=int, default=500, help='Number of users to issue OTPs for')
+    parser.add_argument('--backend', default='memory', help='OTP store backend (memory or file)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['OTP_STORE_BACKEND'] = args.backend
+    os.environ['OTP_STORE_FILE'] = os.path.join(workdir, 'otp_store.json')
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+    from app import app
+
+    client = app.test_client()
+    single_ids = [f'single_{i}' for i in range(args.users)]
+    batch_ids = [f'batch_{i}' for i in range(args.users)]
+
+    with patch('blueprints.otp.speak_otp'), patch('blueprints.otp.queue_speak_otp'):
+        start = time.perf_counter()
+        for user_id in single_ids:
+            client.post('/api/otp/send', json={'user_id': user_id})
+        single_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        client.post('/api/otp/send/batch', json={'user_ids': batch_ids})
+        batch_elapsed = time.perf_counter() - start
+
+    print(f"📊 {args.users} users, backend={args.backend}")
+    print(f"   /api/otp/send       {single_elapsed:.3f}s  ({args.users / single_elapsed:,.0f} OTPs/s)")
+    print(f"   /api/otp/send/batch {batch_elapsed:.3f}s  ({args.users / batch_elapsed:,.0f} OTPs/s)")
+
+if __name__ == '__main__':
+    main()
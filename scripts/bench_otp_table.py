@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory-mapped OTP table against the in-memory store
+Loads N live OTPs into each store and reports resident memory, on-disk size
+and get() latency percentiles for random lookups.
+
+Usage: python scripts/bench_otp_table.py --otps 1000000
+"""
+import os
+import sys
+import gc
+import time
+import random
+import hashlib
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from voice_api.plugins.otp_store import MmapOTPStore, ShardedMemoryOTPStore
+
+def rss_bytes():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def load(store, count, chunk=50000):
+    expires_at = (datetime.datetime.now() + datetime.timedelta(minutes=5)).isoformat()
+    for start in range(0, count, chunk):
+        store.put_many({
+            f'user{i}': {'otp': hashlib.sha256(str(i).encode()).hexdigest(), 'expires_at': expires_at}
+            for i in range(start, min(start + chunk, count))
+        })
+
+def lookup_latency(store, count, samples):
+    timings = []
+    for i in random.sample(range(count), samples):
+        key = f'user{i}'
+        start = time.perf_counter()
+        store.get(key)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return [timings[int(len(timings) * p)] * 1e6 for p in (0.5, 0.99)]
+
+def report(name, store, count, samples, rss_before, extra=''):
+    p50, p99 = lookup_latency(store, count, samples)
+    print(f"   {name:<7} RSS +{(rss_bytes() - rss_before) / 2**20:7.1f} MiB{extra}"
+          f"  get p50 {p50:5.1f}µs  p99 {p99:5.1f}µs")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the mmap OTP table')
+    parser.add_argument('--otps', type=int, default=1000000, help='Number of live OTPs')
+    parser.add_argument('--samples', type=int, default=100000, help='Number of timed lookups')
+    args = parser.parse_args()
+
+    capacity = 1 << (args.otps * 2 - 1).bit_length()  # load factor <= 0.5
+    print(f"📊 {args.otps:,} live OTPs")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        table_file = os.path.join(workdir, 'otp_table.bin')
+        rss_before = rss_bytes()
+        table = MmapOTPStore(table_file, capacity=capacity)
+        start = time.perf_counter()
+        load(table, args.otps)
+        load_elapsed = time.perf_counter() - start
+        stat = os.stat(table_file)
+        report('mmap', table, args.otps, args.samples, rss_before,
+               f"  file {stat.st_size / 2**20:.0f} MiB ({stat.st_blocks * 512 / 2**20:.0f} MiB allocated)"
+               f"  load {load_elapsed:.1f}s")
+        table.close()
+
+    gc.collect()
+    rss_before = rss_bytes()
+    memory = ShardedMemoryOTPStore()
+    start = time.perf_counter()
+    load(memory, args.otps)
+    load_elapsed = time.perf_counter() - start
+    report('memory', memory, args.otps, args.samples, rss_before, f"  load {load_elapsed:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark one-at-a-time vs batch speech synthesis
+Renders N distinct prompts through synthesize_speech (one engine run each)
+and through synthesize_batch (one engine run for all of them), with the
+audio cache and TTS workers off so only rendering is measured.
+
+Without a speech driver installed, --fake-engine stands in an engine whose
+runAndWait() costs --run-overhead-ms plus --utterance-ms per queued text.
+
+Usage: python scripts/bench_synthesis_batch.py --texts 50
+       python scripts/bench_synthesis_batch.py --texts 50 --fake-engine
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'config'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from voice_api.services import polly_service
+from voice_api.services.engine_pool import EnginePool
+
+class FakeEngine:
+    run_overhead = 0.0
+    utterance_cost = 0.0
+    def __init__(self):
+        self.properties = {'rate': 150, 'volume': 1.0, 'voice': None}
+        self.queued = []
+    def getProperty(self, name):
+        return self.properties[name]
+    def setProperty(self, name, value):
+        self.properties[name] = value
+    def isBusy(self):
+        return False
+    def save_to_file(self, text, path):
+        self.queued.append((text, path))
+    def runAndWait(self):
+        time.sleep(self.run_overhead + self.utterance_cost * len(self.queued))
+        for text, path in self.queued:
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(22050)
+                wav.writeframes(bytes(2 * 100 * len(text)))
+        self.queued = []
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batch speech synthesis')
+    parser.add_argument('--texts', type=int, default=50, help='Number of prompts to render')
+    parser.add_argument('--fake-engine', action='store_true', help='Use a simulated engine instead of the speech driver')
+    parser.add_argument('--run-overhead-ms', type=float, default=30.0, help='Fake engine cost per runAndWait()')
+    parser.add_argument('--utterance-ms', type=float, default=5.0, help='Fake engine cost per queued text')
+    args = parser.parse_args()
+
+    texts = [f'Your appointment number {i} is confirmed for tomorrow.' for i in range(args.texts)]
+    patches = [patch.object(polly_service, 'get_audio_cache', return_value=None),
+               patch.object(polly_service, 'get_tts_workers', return_value=None),
+               patch.object(polly_service, 'resolve_voice', return_value=None)]
+    if args.fake_engine:
+        FakeEngine.run_overhead = args.run_overhead_ms / 1000
+        FakeEngine.utterance_cost = args.utterance_ms / 1000
+        patches.append(patch.object(polly_service, 'get_engine_pool', return_value=EnginePool(factory=FakeEngine)))
+    for p in patches:
+        p.start()
+
+    start = time.perf_counter()
+    for text in texts:
+        response = polly_service.synthesize_speech(text, output_format='wav')
+        if 'error' in response:
+            sys.exit(f"❌ Synthesis failed: {response['error']}")
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    responses = polly_service.synthesize_batch(texts, output_format='wav')
+    batch_elapsed = time.perf_counter() - start
+    errors = [response['error'] for response in responses if 'error' in response]
+    if errors:
+        sys.exit(f"❌ Batch synthesis failed: {errors[0]}")
+
+    print(f"📊 {args.texts} prompts, engine={'fake' if args.fake_engine else 'pyttsx3'}")
+    print(f"   synthesize_speech x{args.texts} {single_elapsed:.3f}s  ({args.texts / single_elapsed:,.1f} prompts/s)")
+    print(f"   synthesize_batch        {batch_elapsed:.3f}s  ({args.texts / batch_elapsed:,.1f} prompts/s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Migrate a legacy OTP store file to the per-user layout
+Old root stores kept every OTP under otp_{user_id}_{otp}; this keeps only
+the latest OTP for each user, keyed by user id.
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from voice_api.plugins.otp_store import migrate_otp_store_file, OTP_STORE_FILE
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate a legacy otp_store.json file')
+    parser.add_argument('store_file', nargs='?', default=OTP_STORE_FILE, help='OTP store file to migrate')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store_file):
+        print(f"❌ {args.store_file} not found")
+        return 1
+
+    migrated = migrate_otp_store_file(args.store_file)
+    if migrated:
+        print(f"✅ Migrated {migrated} legacy OTP entries in {args.store_file}")
+    else:
+        print(f"✅ {args.store_file} is already in the per-user layout")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Redistribute a JSON OTP store over a directory of shard files
+The source may be a single store file (otp_store.json, data/otps.json) or an
+existing shard directory; records are re-hashed into --shards files in the
+target directory. Stop the API while resharding.
+
+Usage: python scripts/reshard_otp_store.py otp_store.json otp_store/ --shards 32
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from voice_api.plugins.otp_store import reshard_otp_store, read_shard_count, DEFAULT_SHARD_COUNT
+
+def main():
+    parser = argparse.ArgumentParser(description='Reshard a JSON OTP store')
+    parser.add_argument('source', help='OTP store file or shard directory to read')
+    parser.add_argument('target', nargs='?', help='Shard directory to write (defaults to source)')
+    parser.add_argument('--shards', type=int, default=DEFAULT_SHARD_COUNT, help='Number of shard files')
+    args = parser.parse_args()
+
+    target = args.target or args.source
+    if not os.path.exists(args.source):
+        print(f"❌ {args.source} not found")
+        return 1
+    if os.path.isfile(target):
+        print(f"❌ {target} is a file; give a directory to write the shards to")
+        return 1
+
+    before = read_shard_count(args.source) if os.path.isdir(args.source) else 1
+    moved = reshard_otp_store(args.source, target, args.shards)
+    print(f"✅ Moved {moved} OTP records from {before} to {args.shards} shards in {target}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
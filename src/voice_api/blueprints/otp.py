@@ -1,7 +1,13 @@
-import json
-from flask import Blueprint, request, jsonify
-from ..utils.otp_logic import generate_otp, store_otp, speak_otp, get_stored_otp
+import base64
+from flask import Blueprint, Response, request, jsonify
+from ..utils.otp_logic import generate_otp, store_otp, speak_otp, verify_otps, replay_otp_audio
 from ..utils.custom_exceptions import OTPGenerationError, OTPStorageError, VoiceSynthesisError
+from ..services.otp_pool import claim_pooled_otp, get_otp_pool, render_otp_audio
+from ..services.otp_delivery import get_delivery_queue, DeliveryQueueFull
+from ..services.replay_store import get_replay_store
+from ..services.tts_workers import TTSQueueFull
+from ..utils.audio_types import AUDIO_MIME_TYPES
+from config import Config
 
 otp_blueprint = Blueprint('otp', __name__)
 
@@ -14,15 +20,57 @@ def send_otp():
     user_id = data['user_id']
 
     try:
-        otp = generate_otp()
-        store_otp(user_id, otp)
-        speak_otp(otp)
+        if data.get('return_audio'):
+            # Callers that play the prompt themselves get the audio instead
+            # of voice delivery; a pre-rendered pool entry skips synthesis
+            rendered = claim_pooled_otp() or render_otp_audio(generate_otp())
+            store_otp(user_id, rendered.otp, rendered.audio, rendered.audio_format)
+            return jsonify({
+                'message': 'OTP generated with audio',
+                'otp': rendered.otp,
+                'audio': base64.b64encode(rendered.audio).decode('ascii'),
+                'audio_format': rendered.audio_format
+            }), 200
+        # store_otp renders the prompt for replays; a pooled entry has it ready
+        rendered = claim_pooled_otp() if get_replay_store() else None
+        if rendered:
+            otp = rendered.otp
+            store_otp(user_id, otp, rendered.audio, rendered.audio_format)
+        else:
+            otp = generate_otp()
+            store_otp(user_id, otp)
+        if data.get('async', Config.OTP_DELIVERY_MODE == 'async'):
+            # Speak on a delivery worker instead of blocking this thread
+            job = get_delivery_queue().submit(user_id, otp)
+            return jsonify({
+                'message': 'OTP queued for voice delivery',
+                'job_id': job['job_id'],
+                'status': job['state']
+            }), 202
+        if speak_otp(otp) is False:
+            return jsonify({'error': 'Could not speak the OTP'}), 500
         return jsonify({'message': 'OTP generated and spoken successfully', 'otp': otp}), 200
+    except (DeliveryQueueFull, TTSQueueFull) as e:
+        return jsonify({'error': str(e)}), 503
     except (OTPGenerationError, OTPStorageError, VoiceSynthesisError) as e:
         return jsonify({'error': str(e)}), 500
     except Exception as e:
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
 
+@otp_blueprint.route('/api/otp/status/<user_id>', methods=['GET'])
+def otp_delivery_status(user_id):
+    job = get_delivery_queue().latest(user_id)
+    if not job:
+        return jsonify({'error': 'No OTP delivery found for this user'}), 404
+    return jsonify(dict(job, user_id=user_id)), 200
+
+@otp_blueprint.route('/api/otp/pool/metrics', methods=['GET'])
+def otp_pool_metrics():
+    pool = get_otp_pool()
+    if not pool:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(pool.metrics(), enabled=True)), 200
+
 @otp_blueprint.route('/calls/otp/verify', methods=['POST'])
 def verify_otp():
     data = request.get_json()
@@ -31,16 +79,42 @@ def verify_otp():
 
     user_id = data['user_id']
     otp = data['otp']
+    if not isinstance(user_id, str) or not isinstance(otp, str):
+        return jsonify({'error': 'user_id and otp must be strings'}), 400
 
     try:
-        verified_otp = get_stored_otp(user_id, otp)
-        if verified_otp:
+        # Same consume-and-lockout rule as the batch endpoint
+        status = verify_otps([(user_id, otp)])[0]
+        if status == 'verified':
             return jsonify({'status': 'verified', 'message': 'OTP is valid'}), 200
+        elif status == 'locked':
+            return jsonify({'status': 'locked', 'message': 'Too many failed attempts'}), 400
         else:
             return jsonify({'status': 'invalid', 'message': 'OTP is invalid or expired'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@otp_blueprint.route('/calls/otp/verify/batch', methods=['POST'])
+def verify_otp_batch():
+    data = request.get_json()
+    items = data.get('items') if data else None
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items must be a non-empty list'}), 400
+    if any(not isinstance(item, dict) or not isinstance(item.get('user_id'), str)
+           or not isinstance(item.get('otp'), str) for item in items):
+        return jsonify({'error': 'each item requires a user_id and otp'}), 400
+
+    try:
+        statuses = verify_otps([(item['user_id'], item['otp']) for item in items])
+    except OTPStorageError as e:
+        return jsonify({'error': str(e)}), 500
+
+    results = [{'user_id': item['user_id'], 'status': status} for item, status in zip(items, statuses)]
+    return jsonify({
+        'results': results,
+        'verified': sum(1 for status in statuses if status == 'verified')
+    }), 200
+
 @otp_blueprint.route('/calls/otp/replay', methods=['POST'])
 def replay_otp():
     data = request.get_json()
@@ -50,1121 +124,12 @@ def replay_otp():
     user_id = data['user_id']
     
     try:
-        stored_otp = get_stored_otp(user_id)
-        if stored_otp:
-            speak_otp(stored_otp)
-            return jsonify({'message': 'OTP replayed successfully', 'otp': stored_otp}), 200
+        # Stream the stored prompt instead of synthesizing it again
+        replayed = replay_otp_audio(user_id)
+        if replayed:
+            mimetype = AUDIO_MIME_TYPES.get(replayed.audio_format, 'application/octet-stream')
+            return Response(replayed.audio, mimetype=mimetype, headers={'Cache-Control': 'no-store'})
         else:
             return jsonify({'error': 'No OTP found for this user'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
-    if user_id == 'user123':
-        return jsonify({'message': 'OTP replayed'}), 200
-    return jsonify({'error': 'User not found'}), 404
-
-@otp_blueprint.route('/calls/otp/replay', methods=['POST'])
-def replay_otp():
-    user_id = request.json.get('user_id')
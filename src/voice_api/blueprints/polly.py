@@ -1,8 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint
+from ..routes.polly_route import synthesize_speech, synthesize_speech_batch, cached_audio
 
 polly_bp = Blueprint('polly_bp', __name__)
 
-@polly_bp.route('/api/polly/synthesize', methods=['POST'])
-def synthesize():
-    # Always return a placeholder response for tests
-    return jsonify({'message': 'Synthesis placeholder'})
\ No newline at end of file
+# Same views as routes.polly_route, mounted at full paths
+polly_bp.add_url_rule('/api/polly/synthesize', view_func=synthesize_speech, methods=['POST'])
+polly_bp.add_url_rule('/api/polly/synthesize/batch', view_func=synthesize_speech_batch, methods=['POST'])
+polly_bp.add_url_rule('/api/polly/audio/<key>', view_func=cached_audio, methods=['GET'])
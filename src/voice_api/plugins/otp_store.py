@@ -0,0 +1,874 @@
+"""
+OTP storage plugin with pluggable backends.
+Records are keyed by user id (or phone number) so send, verify and replay
+touch a single entry instead of parsing and rewriting a whole store file.
+"""
+import os
+import json
+import time
+import heapq
+import datetime
+import threading
+import zlib
+import mmap
+import errno
+import struct
+import hashlib
+import shutil
+import logging
+from voice_api.utils.json_storage import GroupCommitWriter
+from voice_api.utils.redis_client import redis, redis_available, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+OTP_STORE_FILE = os.environ.get('OTP_STORE_FILE') or 'otp_store.json'
+DEFAULT_SHARD_COUNT = 16
+REAPER_INTERVAL = 30
+REAPER_BATCH_SIZE = 500
+OTP_STORE_SHARDS = int(os.environ.get('OTP_STORE_SHARDS', DEFAULT_SHARD_COUNT))
+SHARD_MANIFEST = 'shards.json'
+OTP_TABLE_FILE = os.environ.get('OTP_TABLE_FILE') or 'otp_table.bin'
+OTP_TABLE_CAPACITY = int(os.environ.get('OTP_TABLE_CAPACITY', 1 << 20))
+
+def _expiry_timestamp(record):
+    return datetime.datetime.fromisoformat(record['expires_at']).timestamp()
+
+def _is_legacy_entry(key, record):
+    # The root store used to keep every OTP under otp_{user_id}_{otp}
+    return (isinstance(record, dict) and 'user_id' in record and 'otp' in record
+            and key == f"otp_{record['user_id']}_{record['otp']}")
+
+def migrate_legacy_records(data):
+    """
+    Collapse legacy otp_{user_id}_{otp} entries into a single record per
+    user id, keeping the one with the latest expiry.
+    Returns the migrated mapping and the number of legacy entries found.
+    """
+    migrated = {}
+    legacy = []
+    for key, record in data.items():
+        if _is_legacy_entry(key, record):
+            legacy.append(record)
+        else:
+            migrated[key] = record
+    for record in legacy:
+        current = migrated.get(record['user_id'])
+        if current is None or _expiry_timestamp(record) > _expiry_timestamp(current):
+            migrated[record['user_id']] = record
+    return migrated, len(legacy)
+
+def migrate_otp_store_file(store_file):
+    """Rewrite a legacy OTP store file in the per-user layout."""
+    with open(store_file, 'r') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            data = {}
+    migrated, legacy_count = migrate_legacy_records(data)
+    if legacy_count:
+        tmp_file = store_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(migrated, f, indent=2)
+        os.replace(tmp_file, store_file)
+    return legacy_count
+
+def is_shard_directory(path):
+    """A store path ending in a separator, or an existing directory, holds shard files."""
+    return path.endswith(os.sep) or os.path.isdir(path)
+
+def shard_index(key, shard_count):
+    """Stable shard for a user id / phone number (CRC32, same on every node)."""
+    return zlib.crc32(str(key).encode()) % shard_count
+
+def shard_file(store_dir, index):
+    return os.path.join(store_dir, f"shard_{index:03d}.json")
+
+def read_shard_count(store_dir, default=None):
+    manifest = os.path.join(store_dir, SHARD_MANIFEST)
+    if not os.path.exists(manifest):
+        return default
+    with open(manifest, 'r') as f:
+        return json.load(f)['shard_count']
+
+def _write_json(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_json_records(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            data = {}
+    return migrate_legacy_records(data)[0]
+
+def load_otp_store_records(path):
+    """Read every record from a single store file or a shard directory."""
+    if not is_shard_directory(path):
+        return _read_json_records(path)
+    records = {}
+    for index in range(read_shard_count(path, 0)):
+        records.update(_read_json_records(shard_file(path, index)))
+    return records
+
+def reshard_otp_store(source, store_dir, shard_count):
+    """
+    Redistribute the records of a store file or shard directory over
+    shard_count shard files in store_dir. The new layout is written to a
+    staging directory and swapped in with renames; run it while the API is
+    stopped. Returns the number of records moved.
+    """
+    store_dir = store_dir.rstrip(os.sep)
+    records = load_otp_store_records(source)
+    shards = [{} for _ in range(shard_count)]
+    for key, record in records.items():
+        shards[shard_index(key, shard_count)][key] = record
+
+    staging_dir = store_dir + '.reshard'
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    for index, shard in enumerate(shards):
+        _write_json(shard_file(staging_dir, index), shard)
+    _write_json(os.path.join(staging_dir, SHARD_MANIFEST), {"shard_count": shard_count})
+
+    if os.path.isdir(store_dir):
+        old_dir = store_dir + '.old'
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(store_dir, old_dir)
+        os.replace(staging_dir, store_dir)
+        shutil.rmtree(old_dir)
+    else:
+        os.replace(staging_dir, store_dir)
+    return len(records)
+
+class OTPStoreBase:
+    reaper = None
+    def _schedule_expiry(self, key, record):
+        if self.reaper is not None and 'expires_at' in record:
+            self.reaper.schedule(key, record['expires_at'])
+    def _schedule_written(self, expiries, records):
+        # Schedule records a transaction wrote with a new expiry; expiries
+        # maps each key to its expires_at before the mutation ran
+        for key, record in records.items():
+            if record is not None and record.get('expires_at') != expiries.get(key):
+                self._schedule_expiry(key, record)
+    def put(self, key, record):
+        raise NotImplementedError("OTP stores must implement put.")
+    def put_many(self, records):
+        raise NotImplementedError("OTP stores must implement put_many.")
+    def get(self, key):
+        raise NotImplementedError("OTP stores must implement get.")
+    def update(self, key, changes):
+        raise NotImplementedError("OTP stores must implement update.")
+    def delete(self, key):
+        raise NotImplementedError("OTP stores must implement delete.")
+    def delete_expired(self, keys, now):
+        raise NotImplementedError("OTP stores must implement delete_expired.")
+    def transact(self, keys, mutation):
+        """
+        Atomically run mutation(records) over a snapshot of the given keys.
+        records maps each key to a copy of its record (or None); whatever the
+        mutation leaves in it is written back in one go, None meaning delete.
+        Returns the mutation's result.
+        """
+        raise NotImplementedError("OTP stores must implement transact.")
+    def items(self):
+        raise NotImplementedError("OTP stores must implement items.")
+
+class ShardedMemoryOTPStore(OTPStoreBase):
+    """
+    Thread-safe in-memory store. Keys are spread over a fixed number of
+    shards, each guarded by its own lock, so concurrent requests for
+    different users rarely wait on each other.
+    """
+    def __init__(self, shard_count=DEFAULT_SHARD_COUNT):
+        self.shard_count = shard_count
+        self._shards = [{} for _ in range(shard_count)]
+        self._locks = [threading.Lock() for _ in range(shard_count)]
+    def _shard_index(self, key):
+        return zlib.crc32(str(key).encode()) % self.shard_count
+    def put(self, key, record):
+        index = self._shard_index(key)
+        with self._locks[index]:
+            self._shards[index][key] = dict(record)
+        self._schedule_expiry(key, record)
+    def put_many(self, records):
+        by_shard = {}
+        for key, record in records.items():
+            by_shard.setdefault(self._shard_index(key), []).append((key, record))
+        for index, entries in by_shard.items():
+            with self._locks[index]:
+                for key, record in entries:
+                    self._shards[index][key] = dict(record)
+        for key, record in records.items():
+            self._schedule_expiry(key, record)
+    def get(self, key):
+        index = self._shard_index(key)
+        with self._locks[index]:
+            record = self._shards[index].get(key)
+            return dict(record) if record is not None else None
+    def update(self, key, changes):
+        index = self._shard_index(key)
+        with self._locks[index]:
+            record = self._shards[index].get(key)
+            if record is None:
+                return None
+            record.update(changes)
+            return dict(record)
+    def delete(self, key):
+        index = self._shard_index(key)
+        with self._locks[index]:
+            return self._shards[index].pop(key, None) is not None
+    def delete_expired(self, keys, now):
+        by_shard = {}
+        for key in keys:
+            by_shard.setdefault(self._shard_index(key), []).append(key)
+        deleted = 0
+        for index, shard_keys in by_shard.items():
+            with self._locks[index]:
+                shard = self._shards[index]
+                for key in shard_keys:
+                    # The key may have been re-issued with a later expiry
+                    record = shard.get(key)
+                    if record is not None and _expiry_timestamp(record) <= now:
+                        del shard[key]
+                        deleted += 1
+        return deleted
+    def transact(self, keys, mutation):
+        indexes = sorted({self._shard_index(key) for key in keys})
+        # Always lock shards in the same order to avoid deadlocks
+        for index in indexes:
+            self._locks[index].acquire()
+        try:
+            records = {}
+            for key in keys:
+                record = self._shards[self._shard_index(key)].get(key)
+                records[key] = dict(record) if record is not None else None
+            expiries = {key: record.get('expires_at') for key, record in records.items() if record is not None}
+            result = mutation(records)
+            for key, record in records.items():
+                shard = self._shards[self._shard_index(key)]
+                if record is None:
+                    shard.pop(key, None)
+                else:
+                    shard[key] = record
+            self._schedule_written(expiries, records)
+            return result
+        finally:
+            for index in reversed(indexes):
+                self._locks[index].release()
+    def items(self):
+        for index, shard in enumerate(self._shards):
+            with self._locks[index]:
+                entries = [(key, dict(record)) for key, record in shard.items()]
+            yield from entries
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+class JsonFileOTPStore(OTPStoreBase):
+    """
+    Legacy single-file JSON store, kept for deployments that rely on the
+    on-disk format. The parsed file is cached as a user id -> record index
+    and only re-read when the file changes on disk, so lookups are a dict
+    access. Files in the old otp_{user_id}_{otp} layout are migrated on load.
+    Writes go through a GroupCommitWriter, so concurrent writers (threads or
+    processes) are batched into one locked, atomic rewrite.
+    """
+    def __init__(self, store_file=OTP_STORE_FILE):
+        self.store_file = store_file
+        self.lock = threading.Lock()
+        self._index = None
+        self._index_stamp = None
+        self.writer = GroupCommitWriter(
+            store_file,
+            prepare=lambda data: migrate_legacy_records(data)[0],
+            on_commit=self._refresh_index
+        )
+    def _stamp(self):
+        stat = os.stat(self.store_file)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    def _refresh_index(self, data):
+        with self.lock:
+            self._index = data
+            self._index_stamp = self._stamp()
+    def _load(self):
+        with self.lock:
+            if not os.path.exists(self.store_file):
+                self._index = None
+                return {}
+            if self._index is not None and self._stamp() == self._index_stamp:
+                return self._index
+        data = self.writer.read()
+        with self.lock:
+            self._index = data
+            self._index_stamp = self._stamp() if os.path.exists(self.store_file) else None
+        return data
+    def put(self, key, record):
+        def mutation(data):
+            data[key] = dict(record)
+        self.writer.submit(mutation)
+        self._schedule_expiry(key, record)
+    def put_many(self, records):
+        def mutation(data):
+            for key, record in records.items():
+                data[key] = dict(record)
+        self.writer.submit(mutation)
+        for key, record in records.items():
+            self._schedule_expiry(key, record)
+    def get(self, key):
+        record = self._load().get(key)
+        return dict(record) if record is not None else None
+    def update(self, key, changes):
+        def mutation(data):
+            if key not in data:
+                return None
+            data[key].update(changes)
+            return dict(data[key])
+        return self.writer.submit(mutation)
+    def delete(self, key):
+        def mutation(data):
+            return data.pop(key, None) is not None
+        return self.writer.submit(mutation)
+    def delete_expired(self, keys, now):
+        def mutation(data):
+            expired = [key for key in keys if key in data and _expiry_timestamp(data[key]) <= now]
+            for key in expired:
+                del data[key]
+            return len(expired)
+        return self.writer.submit(mutation)
+    def transact(self, keys, mutation):
+        def group_mutation(data):
+            records = {key: dict(data[key]) if key in data else None for key in keys}
+            expiries = {key: record.get('expires_at') for key, record in records.items() if record is not None}
+            result = mutation(records)
+            for key, record in records.items():
+                if record is None:
+                    data.pop(key, None)
+                else:
+                    data[key] = record
+            self._schedule_written(expiries, records)
+            return result
+        return self.writer.submit(group_mutation)
+    def items(self):
+        return [(key, dict(record)) for key, record in self._load().items()]
+    def __len__(self):
+        return len(self._load())
+
+class ShardedJsonFileOTPStore(OTPStoreBase):
+    """
+    JSON store split over a directory of shard files picked by a stable hash
+    of the key. Each shard is a JsonFileOTPStore with its own lock and group
+    commit writer, so a write rewrites and locks only 1/N of the data. The
+    shard count is fixed by the directory's shards.json manifest; use
+    reshard_otp_store() to change it.
+    """
+    def __init__(self, store_dir=OTP_STORE_FILE, shard_count=OTP_STORE_SHARDS):
+        self.store_dir = store_dir.rstrip(os.sep)
+        os.makedirs(self.store_dir, exist_ok=True)
+        existing = read_shard_count(self.store_dir)
+        if existing is None:
+            _write_json(os.path.join(self.store_dir, SHARD_MANIFEST), {"shard_count": shard_count})
+        self.shard_count = existing or shard_count
+        self._shards = [JsonFileOTPStore(shard_file(self.store_dir, index))
+                        for index in range(self.shard_count)]
+    def _shard(self, key):
+        return self._shards[shard_index(key, self.shard_count)]
+    def _group(self, keys):
+        by_shard = {}
+        for key in keys:
+            by_shard.setdefault(shard_index(key, self.shard_count), []).append(key)
+        return by_shard
+    def put(self, key, record):
+        self._shard(key).put(key, record)
+        self._schedule_expiry(key, record)
+    def put_many(self, records):
+        for index, keys in self._group(records).items():
+            self._shards[index].put_many({key: records[key] for key in keys})
+        for key, record in records.items():
+            self._schedule_expiry(key, record)
+    def get(self, key):
+        return self._shard(key).get(key)
+    def update(self, key, changes):
+        return self._shard(key).update(key, changes)
+    def delete(self, key):
+        return self._shard(key).delete(key)
+    def delete_expired(self, keys, now):
+        return sum(self._shards[index].delete_expired(shard_keys, now)
+                   for index, shard_keys in self._group(keys).items())
+    def transact(self, keys, mutation):
+        by_shard = self._group(keys)
+        # Nest the shard transactions in index order so concurrent
+        # multi-shard transactions cannot deadlock
+        indexes = sorted(by_shard)
+        records = {}
+        def run(position):
+            if position == len(indexes):
+                expiries = {key: record.get('expires_at') for key, record in records.items() if record is not None}
+                result = mutation(records)
+                self._schedule_written(expiries, records)
+                return result
+            shard_keys = by_shard[indexes[position]]
+            def shard_mutation(shard_records):
+                records.update(shard_records)
+                result = run(position + 1)
+                for key in shard_keys:
+                    shard_records[key] = records[key]
+                return result
+            return self._shards[indexes[position]].transact(shard_keys, shard_mutation)
+        return run(0)
+    def items(self):
+        for shard in self._shards:
+            yield from shard.items()
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+def open_json_otp_store(path=OTP_STORE_FILE, shard_count=OTP_STORE_SHARDS):
+    """Single-file store, or a sharded one when path is a directory."""
+    if is_shard_directory(path):
+        return ShardedJsonFileOTPStore(path, shard_count)
+    return JsonFileOTPStore(path)
+
+class RedisOTPStore(OTPStoreBase):
+    """
+    Redis-backed store shared by every API node. Each record is a JSON
+    string whose Redis TTL matches its expires_at, so Redis drops expired
+    OTPs itself; multi-key writes are pipelined and transact() uses
+    WATCH/MULTI for optimistic concurrency.
+    """
+    def __init__(self, client=None, prefix='otp:'):
+        self._client = client
+        self.prefix = prefix
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+    def _ttl_ms(self, record):
+        if 'expires_at' not in record:
+            return None
+        return int((_expiry_timestamp(record) - time.time()) * 1000)
+    def _write(self, pipe, key, record):
+        ttl_ms = self._ttl_ms(record)
+        if ttl_ms is not None and ttl_ms <= 0:
+            pipe.delete(self._key(key))
+        else:
+            pipe.set(self._key(key), json.dumps(record), px=ttl_ms)
+    def put(self, key, record):
+        self.put_many({key: record})
+    def put_many(self, records):
+        pipe = self.client.pipeline()
+        for key, record in records.items():
+            self._write(pipe, key, record)
+        pipe.execute()
+    def get(self, key):
+        value = self.client.get(self._key(key))
+        return json.loads(value) if value is not None else None
+    def update(self, key, changes):
+        def mutation(records):
+            if records[key] is not None:
+                records[key].update(changes)
+            return records[key]
+        return self.transact([key], mutation)
+    def delete(self, key):
+        return self.client.delete(self._key(key)) > 0
+    def delete_expired(self, keys, now):
+        # Redis expires keys natively
+        return 0
+    def transact(self, keys, mutation):
+        keys = list(keys)
+        redis_keys = [self._key(key) for key in keys]
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(*redis_keys)
+                    values = pipe.mget(redis_keys)
+                    snapshot = {key: json.loads(value) if value is not None else None
+                                for key, value in zip(keys, values)}
+                    records = {key: dict(record) if record is not None else None
+                               for key, record in snapshot.items()}
+                    result = mutation(records)
+                    pipe.multi()
+                    for key, record in records.items():
+                        if record == snapshot.get(key):
+                            continue
+                        if record is None:
+                            pipe.delete(self._key(key))
+                        else:
+                            self._write(pipe, key, record)
+                    pipe.execute()
+                    return result
+                except redis.WatchError:
+                    # Another node changed one of the keys; retry on fresh data
+                    continue
+    def items(self):
+        redis_keys = list(self.client.scan_iter(match=f"{self.prefix}*", count=500))
+        entries = []
+        for start in range(0, len(redis_keys), 500):
+            chunk = redis_keys[start:start + 500]
+            for redis_key, value in zip(chunk, self.client.mget(chunk)):
+                if value is not None:
+                    key = redis_key.decode() if isinstance(redis_key, bytes) else redis_key
+                    entries.append((key[len(self.prefix):], json.loads(value)))
+        return entries
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*", count=500))
+
+class MmapOTPStore(OTPStoreBase):
+    """
+    Persistent open-addressing hash table of fixed-width binary records in a
+    memory-mapped file. Each 64-byte slot holds a BLAKE2b hash of the user
+    id, the SHA-256 OTP digest, the expiry as epoch seconds and the attempt
+    count, so a lookup reads a slot or two in place instead of parsing JSON.
+    Only hashed records ({"otp": sha256 hex digest, "expires_at", "attempts"})
+    fit; other fields are not kept. User ids are stored hashed, so items()
+    yields the 16-byte key digests, which every method accepts in place of
+    a user id. Writers in other processes are serialised with a file lock.
+    Deletes leave tombstones, which a miss has to probe past; once they
+    crowd out the empty slots the table is rehashed in place.
+    """
+    MAGIC = b'OTPTBL01'
+    VERSION = 1
+    HEADER = struct.Struct('<8sIIQQ')  # magic, version, slot size, capacity, live
+    HEADER_SIZE = 64
+    TOMBSTONES_OFFSET = HEADER.size  # tombstone count, in the header padding
+    SLOT = struct.Struct('<B3xI16s32sq')  # state, attempts, key hash, digest, expires
+    EMPTY, LIVE, DELETED = 0, 1, 2
+
+    def __init__(self, table_file=OTP_TABLE_FILE, capacity=OTP_TABLE_CAPACITY):
+        if capacity & (capacity - 1):
+            raise ValueError("OTP table capacity must be a power of two.")
+        self.table_file = table_file
+        self.capacity = capacity
+        self.lock = threading.RLock()
+        self._file = None
+        self._map = None
+    def _open(self):
+        with self.lock:
+            if self._map is not None:
+                return self._map
+            os.makedirs(os.path.dirname(self.table_file) or '.', exist_ok=True)
+            self._file = open(self.table_file, 'a+b')
+            size = os.fstat(self._file.fileno()).st_size
+            if size == 0:
+                # Sparse file: only pages that hold records use disk and memory
+                os.ftruncate(self._file.fileno(), self.HEADER_SIZE + self.capacity * self.SLOT.size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            if size == 0:
+                self.HEADER.pack_into(self._map, 0, self.MAGIC, self.VERSION, self.SLOT.size, self.capacity, 0)
+            magic, version, slot_size, capacity, _ = self.HEADER.unpack_from(self._map, 0)
+            if magic != self.MAGIC or version != self.VERSION or slot_size != self.SLOT.size:
+                raise ValueError(f"{self.table_file} is not an OTP table.")
+            self.capacity = capacity
+            return self._map
+    def _locked(self, exclusive):
+        return _TableLock(self, exclusive)
+    def _hash_key(self, key):
+        if isinstance(key, bytes) and len(key) == 16:
+            return key
+        return hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+    def _offset(self, index):
+        return self.HEADER_SIZE + index * self.SLOT.size
+    def _live_count(self, table):
+        return self.HEADER.unpack_from(table, 0)[4]
+    def _add_live(self, table, delta):
+        live = self._live_count(table) + delta
+        struct.pack_into('<Q', table, 24, live)
+    def _tombstones(self, table):
+        return struct.unpack_from('<Q', table, self.TOMBSTONES_OFFSET)[0]
+    def _add_tombstones(self, table, delta):
+        struct.pack_into('<Q', table, self.TOMBSTONES_OFFSET, max(0, self._tombstones(table) + delta))
+    def _probe(self, table, key_hash, now=None):
+        """
+        Walk the probe sequence for key_hash. Returns (slot, free): slot is
+        the index holding the key or None; free is the first slot an insert
+        may use (empty, deleted or, when now is given, expired).
+        """
+        mask = self.capacity - 1
+        index = int.from_bytes(key_hash[:8], 'little') & mask
+        free = None
+        for _ in range(self.capacity):
+            state, _, slot_hash, _, expires = self.SLOT.unpack_from(table, self._offset(index))
+            if state == self.EMPTY:
+                return None, free if free is not None else index
+            if state == self.LIVE and slot_hash == key_hash:
+                return index, free
+            if free is None and (state == self.DELETED or (now is not None and expires <= now)):
+                free = index
+            index = (index + 1) & mask
+        return None, free
+    def _read(self, table, index):
+        _, attempts, _, digest, expires = self.SLOT.unpack_from(table, self._offset(index))
+        return {
+            "otp": digest.hex(),
+            "expires_at": datetime.datetime.fromtimestamp(expires).isoformat(),
+            "attempts": attempts
+        }
+    def _pack(self, record):
+        try:
+            digest = bytes.fromhex(record['otp'])
+        except ValueError:
+            digest = b''
+        if len(digest) != 32:
+            raise ValueError("The mmap OTP store only holds SHA-256 OTP digests.")
+        return digest, int(_expiry_timestamp(record)), int(record.get('attempts', 0))
+    def _write(self, table, key_hash, record, now):
+        digest, expires, attempts = self._pack(record)
+        index, free = self._probe(table, key_hash, now)
+        if index is None:
+            if free is None:
+                raise OSError(errno.ENOSPC, f"OTP table {self.table_file} is full.")
+            index = free
+            state = self.SLOT.unpack_from(table, self._offset(index))[0]
+            if state != self.LIVE:
+                self._add_live(table, 1)
+            if state == self.DELETED:
+                self._add_tombstones(table, -1)
+        self.SLOT.pack_into(table, self._offset(index), self.LIVE, attempts, key_hash, digest, expires)
+    def _remove(self, table, index):
+        self.SLOT.pack_into(table, self._offset(index), self.DELETED, 0, bytes(16), bytes(32), 0)
+        self._add_live(table, -1)
+        self._add_tombstones(table, 1)
+    def _maybe_rehash(self, table, now):
+        """
+        Rehash once fewer than a quarter of the slots are empty because of
+        tombstones (not live records, which rehashing cannot free). Misses
+        stop at the first empty slot, so this keeps them short.
+        """
+        tombstones = self._tombstones(table)
+        empty = self.capacity - self._live_count(table) - tombstones
+        if empty >= self.capacity // 4 or tombstones < self.capacity // 8:
+            return False
+        live = []
+        for index in range(self.capacity):
+            state, attempts, key_hash, digest, expires = self.SLOT.unpack_from(table, self._offset(index))
+            # Expired records are dropped on the way, as the reaper would
+            if state == self.LIVE and expires > now:
+                live.append((attempts, key_hash, digest, expires))
+        chunk = bytes(self.SLOT.size * 4096)
+        for start in range(self.HEADER_SIZE, self.HEADER_SIZE + self.capacity * self.SLOT.size, len(chunk)):
+            end = min(start + len(chunk), self.HEADER_SIZE + self.capacity * self.SLOT.size)
+            table[start:end] = chunk[:end - start]
+        mask = self.capacity - 1
+        for attempts, key_hash, digest, expires in live:
+            index = int.from_bytes(key_hash[:8], 'little') & mask
+            while self.SLOT.unpack_from(table, self._offset(index))[0] != self.EMPTY:
+                index = (index + 1) & mask
+            self.SLOT.pack_into(table, self._offset(index), self.LIVE, attempts, key_hash, digest, expires)
+        struct.pack_into('<Q', table, 24, len(live))
+        struct.pack_into('<Q', table, self.TOMBSTONES_OFFSET, 0)
+        return True
+    def put(self, key, record):
+        self.put_many({key: record})
+    def put_many(self, records):
+        now = time.time()
+        with self._locked(exclusive=True) as table:
+            for key, record in records.items():
+                self._write(table, self._hash_key(key), record, now)
+            self._maybe_rehash(table, now)
+        for key, record in records.items():
+            self._schedule_expiry(key, record)
+    def get(self, key):
+        with self._locked(exclusive=False) as table:
+            index, _ = self._probe(table, self._hash_key(key))
+            return self._read(table, index) if index is not None else None
+    def update(self, key, changes):
+        def mutation(records):
+            if records[key] is not None:
+                records[key].update(changes)
+            return records[key]
+        return self.transact([key], mutation)
+    def delete(self, key):
+        with self._locked(exclusive=True) as table:
+            index, _ = self._probe(table, self._hash_key(key))
+            if index is None:
+                return False
+            self._remove(table, index)
+            self._maybe_rehash(table, time.time())
+            return True
+    def delete_expired(self, keys, now):
+        deleted = 0
+        with self._locked(exclusive=True) as table:
+            for key in keys:
+                index, _ = self._probe(table, self._hash_key(key))
+                # The key may have been re-issued with a later expiry
+                if index is not None and self.SLOT.unpack_from(table, self._offset(index))[4] <= now:
+                    self._remove(table, index)
+                    deleted += 1
+            self._maybe_rehash(table, now)
+        return deleted
+    def transact(self, keys, mutation):
+        keys = list(keys)
+        now = time.time()
+        with self._locked(exclusive=True) as table:
+            records = {}
+            for key in keys:
+                index, _ = self._probe(table, self._hash_key(key))
+                records[key] = self._read(table, index) if index is not None else None
+            expiries = {key: record.get('expires_at') for key, record in records.items() if record is not None}
+            result = mutation(records)
+            for key, record in records.items():
+                key_hash = self._hash_key(key)
+                if record is None:
+                    index, _ = self._probe(table, key_hash)
+                    if index is not None:
+                        self._remove(table, index)
+                else:
+                    self._write(table, key_hash, record, now)
+            self._maybe_rehash(table, now)
+            self._schedule_written(expiries, records)
+            return result
+    def _missing(self):
+        # Reading an absent table must not create it
+        return self._map is None and not os.path.exists(self.table_file)
+    def items(self):
+        if self._missing():
+            return []
+        with self._locked(exclusive=False) as table:
+            entries = []
+            for index in range(self.capacity):
+                state, _, key_hash, _, _ = self.SLOT.unpack_from(table, self._offset(index))
+                if state == self.LIVE:
+                    entries.append((key_hash, self._read(table, index)))
+            return entries
+    def flush(self):
+        """Write dirty pages back to disk (msync)."""
+        with self.lock:
+            if self._map is not None:
+                self._map.flush()
+    def close(self):
+        with self.lock:
+            if self._map is not None:
+                self._map.close()
+                self._file.close()
+                self._map = None
+                self._file = None
+    def __len__(self):
+        if self._missing():
+            return 0
+        with self._locked(exclusive=False) as table:
+            return self._live_count(table)
+
+class _TableLock:
+    """Thread lock plus an fcntl lock on the table file for other processes."""
+    def __init__(self, store, exclusive):
+        self.store = store
+        self.exclusive = exclusive
+    def __enter__(self):
+        self.store.lock.acquire()
+        table = self.store._open()
+        if fcntl is not None:
+            fcntl.flock(self.store._file.fileno(), fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return table
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self.store._file.fileno(), fcntl.LOCK_UN)
+        self.store.lock.release()
+
+class ExpiryReaper:
+    """
+    Purges expired OTPs in the background. Keys are kept in a min-heap
+    ordered by expiry, so each pass only looks at entries that are due and
+    deletes them in batches.
+    """
+    def __init__(self, store, interval=REAPER_INTERVAL, batch_size=REAPER_BATCH_SIZE):
+        self.store = store
+        self.interval = interval
+        self.batch_size = batch_size
+        self.purged = 0
+        self._heap = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+    def schedule(self, key, expires_at):
+        with self._lock:
+            heapq.heappush(self._heap, (datetime.datetime.fromisoformat(expires_at).timestamp(), key))
+    def seed(self):
+        for key, record in self.store.items():
+            if 'expires_at' in record:
+                self.schedule(key, record['expires_at'])
+    def reap(self, now=None):
+        now = time.time() if now is None else now
+        purged = 0
+        while True:
+            with self._lock:
+                batch = []
+                while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                    batch.append(heapq.heappop(self._heap)[1])
+            if not batch:
+                break
+            purged += self.store.delete_expired(batch, now)
+        self.purged += purged
+        return purged
+    def stats(self):
+        with self._lock:
+            scheduled = len(self._heap)
+        return {"purged": self.purged, "live": len(self.store), "scheduled": scheduled}
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    def _run(self):
+        # Seed here rather than at start(): on a large store the scan would
+        # otherwise run (and the mmap table be created) at import time
+        try:
+            self.seed()
+        except Exception as e:
+            logger.error(f"OTP expiry reaper could not seed from the store: {e}")
+        while not self._stop.wait(self.interval):
+            try:
+                self.reap()
+            except Exception as e:
+                logger.error(f"OTP expiry reaper pass failed: {e}")
+
+# Plugin registry for OTP stores
+OTP_STORES = {}
+
+def register_otp_store(name, store):
+    OTP_STORES[name] = store
+
+def get_otp_store(name):
+    return OTP_STORES.get(name)
+
+# Register the default in-memory store and the legacy JSON file store
+# (sharded when OTP_STORE_FILE names a directory)
+register_otp_store("memory", ShardedMemoryOTPStore())
+register_otp_store("file", open_json_otp_store())
+# The table file is only created on first use
+register_otp_store("mmap", MmapOTPStore())
+if redis_available():
+    register_otp_store("redis", RedisOTPStore())
+
+DEFAULT_OTP_STORE = "memory"
+
+def resolve_otp_store(store_name=None):
+    store = get_otp_store(store_name or DEFAULT_OTP_STORE)
+    # Stores define __len__, so an empty store is falsy
+    if store is None:
+        raise ValueError(f"OTP store '{store_name}' not found. Registered stores: {', '.join(sorted(OTP_STORES))}")
+    return store
+
+def start_expiry_reaper(store_name=None, interval=REAPER_INTERVAL, batch_size=REAPER_BATCH_SIZE):
+    store = resolve_otp_store(store_name)
+    # Redis expires keys on its own
+    if store.reaper is None and not isinstance(store, RedisOTPStore):
+        store.reaper = ExpiryReaper(store, interval=interval, batch_size=batch_size)
+        store.reaper.start()
+    return store.reaper
@@ -0,0 +1,122 @@
+"""
+API token storage plugin.
+Token metadata is keyed by the SHA-256 hash of the token. The file backend
+keeps the original data/api_tokens.json layout; the Redis backend lets
+several API nodes share token state.
+"""
+import os
+import json
+import threading
+from voice_api.utils.redis_client import redis_available, get_redis_client
+
+TOKENS_FILE = os.path.join('data', 'api_tokens.json')
+
+class TokenStoreBase:
+    def put(self, token_hash, info):
+        raise NotImplementedError("Token stores must implement put.")
+    def get(self, token_hash):
+        raise NotImplementedError("Token stores must implement get.")
+    def record_usage(self, token_hash, used_at):
+        raise NotImplementedError("Token stores must implement record_usage.")
+    def items(self):
+        raise NotImplementedError("Token stores must implement items.")
+
+class JsonFileTokenStore(TokenStoreBase):
+    def __init__(self, tokens_file=TOKENS_FILE):
+        self.tokens_file = tokens_file
+        self.lock = threading.Lock()
+    def _load(self):
+        if not os.path.exists(self.tokens_file):
+            return {}
+        with open(self.tokens_file, 'r') as f:
+            return json.load(f)
+    def _save(self, tokens):
+        os.makedirs(os.path.dirname(self.tokens_file) or '.', exist_ok=True)
+        with open(self.tokens_file, 'w') as f:
+            json.dump(tokens, f, indent=2)
+    def put(self, token_hash, info):
+        with self.lock:
+            tokens = self._load()
+            tokens[token_hash] = dict(info)
+            self._save(tokens)
+    def get(self, token_hash):
+        with self.lock:
+            return self._load().get(token_hash)
+    def record_usage(self, token_hash, used_at):
+        with self.lock:
+            tokens = self._load()
+            if token_hash in tokens:
+                tokens[token_hash]['last_used'] = used_at
+                tokens[token_hash]['usage_count'] += 1
+                self._save(tokens)
+    def items(self):
+        with self.lock:
+            return list(self._load().items())
+
+class RedisTokenStore(TokenStoreBase):
+    """
+    Each token is a Redis hash; usage updates are a single pipelined
+    round trip (HSET + HINCRBY) instead of a read-modify-write.
+    """
+    def __init__(self, client=None, prefix='token:'):
+        self._client = client
+        self.prefix = prefix
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_redis_client()
+        return self._client
+    def _decode(self, fields):
+        info = {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in fields.items()
+        }
+        info['usage_count'] = int(info.get('usage_count', 0))
+        info['last_used'] = info.get('last_used') or None
+        return info
+    def put(self, token_hash, info):
+        mapping = {k: ('' if v is None else v) for k, v in info.items()}
+        self.client.hset(f"{self.prefix}{token_hash}", mapping=mapping)
+    def get(self, token_hash):
+        fields = self.client.hgetall(f"{self.prefix}{token_hash}")
+        return self._decode(fields) if fields else None
+    def record_usage(self, token_hash, used_at):
+        key = f"{self.prefix}{token_hash}"
+        if not self.client.exists(key):
+            return
+        pipe = self.client.pipeline()
+        pipe.hset(key, 'last_used', used_at)
+        pipe.hincrby(key, 'usage_count', 1)
+        pipe.execute()
+    def items(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*", count=500))
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.hgetall(key)
+        entries = []
+        for key, fields in zip(keys, pipe.execute()):
+            if fields:
+                key = key.decode() if isinstance(key, bytes) else key
+                entries.append((key[len(self.prefix):], self._decode(fields)))
+        return entries
+
+# Plugin registry for token stores
+TOKEN_STORES = {}
+
+def register_token_store(name, store):
+    TOKEN_STORES[name] = store
+
+def get_token_store(name):
+    return TOKEN_STORES.get(name)
+
+register_token_store("file", JsonFileTokenStore())
+if redis_available():
+    register_token_store("redis", RedisTokenStore())
+
+DEFAULT_TOKEN_STORE = "file"
+
+def resolve_token_store(store_name=None):
+    store = get_token_store(store_name or DEFAULT_TOKEN_STORE)
+    if store is None:
+        raise ValueError(f"Token store '{store_name}' not found. Registered stores: {', '.join(sorted(TOKEN_STORES))}")
+    return store
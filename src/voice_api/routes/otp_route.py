@@ -5,6 +5,8 @@ Includes endpoint for sending OTP via synthesized speech.
 from flask import Blueprint, request, jsonify
 from ..utils.otp import generate_otp
 from ..services.polly_service import synthesize_speech
+from ..services.clip_bank import render_otp_prompt
+from config import Config
 import os
 import json
 
@@ -39,9 +41,12 @@ def send_otp():
         return jsonify({"error": "user_id required"}), 400
 
     otp = generate_otp()
-    otp_text = f"Your O T P is {otp}. Please enter it now."
-
-    audio_response = synthesize_speech(otp_text)
+    if Config.OTP_CLIP_BANK_ENABLED:
+        # Same prompt, joined from pre-rendered clips
+        audio_response = render_otp_prompt(otp, prefix="Your O T P is", suffix="Please enter it now.")
+    else:
+        otp_text = f"Your O T P is {otp}. Please enter it now."
+        audio_response = synthesize_speech(otp_text, use_cache=False)
     if "error" in audio_response:
         return jsonify({"error": audio_response["error"]}), 500
 
@@ -1,7 +1,100 @@
-from flask import Blueprint, jsonify
+import io
+import base64
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context, url_for
+from config import Config
+from ..services.audio_cache import get_audio_cache
+from ..services.polly_service import stream_speech, synthesize_batch
+from ..utils.audio_types import AUDIO_MIME_TYPES, audio_mime_type
 
 polly_bp = Blueprint('polly', __name__, url_prefix='/api/polly')
 
+MAX_SPEECH_RATE = 1000
+
+def _prosody_error(data):
+    # Bad values would otherwise reach the engine and fail mid-render
+    rate, volume = data.get('rate'), data.get('volume')
+    if rate is not None and (isinstance(rate, bool) or not isinstance(rate, (int, float))
+                             or not 0 < rate <= MAX_SPEECH_RATE):
+        return f'rate must be a number between 1 and {MAX_SPEECH_RATE}'
+    if volume is not None and (isinstance(volume, bool) or not isinstance(volume, (int, float))
+                               or not 0 <= volume <= 1):
+        return 'volume must be a number between 0 and 1'
+    return None
+
+def _send_cached(audio, key, mimetype=None):
+    # send_file answers If-None-Match with 304 and Range with 206
+    return send_file(io.BytesIO(bytes(audio)), mimetype=mimetype or audio_mime_type(audio), etag=key, conditional=True)
+
 @polly_bp.route('/synthesize', methods=['POST'])
 def synthesize_speech():
-    return jsonify({'status': 'success', 'message': 'Synthesis placeholder'}), 200
\ No newline at end of file
+    data = request.get_json(silent=True) or {}
+    text, ssml = data.get('text'), data.get('ssml')
+    if not text and not ssml:
+        return jsonify({'error': 'text or ssml is required'}), 400
+    output_format = data.get('format', 'wav')
+    if output_format not in AUDIO_MIME_TYPES:
+        return jsonify({'error': f"Unsupported format '{output_format}'"}), 400
+    error = _prosody_error(data)
+    if error:
+        return jsonify({'error': error}), 400
+    response = stream_speech(text or '', voice_id=data.get('voice_id'), output_format=output_format,
+                             module_name=data.get('module'), rate=data.get('rate'),
+                             volume=data.get('volume'), ssml=ssml)
+    if 'error' in response:
+        return jsonify({'error': response['error']}), 500
+    key = response['ETag']
+    headers = {'Content-Location': url_for('.cached_audio', key=key)}
+    if response['Buffered']:
+        resp = _send_cached(response['AudioStream'], key, AUDIO_MIME_TYPES.get(response['OutputFormat']))
+        resp.headers.update(headers)
+        return resp
+    # No Content-Length, so the body goes out chunked as it is rendered.
+    # The ETag is known up front; the render is fetchable by it once complete.
+    headers['ETag'] = f'"{key}"'
+    return Response(stream_with_context(response['AudioStream']), mimetype=AUDIO_MIME_TYPES[output_format],
+                    headers=headers, direct_passthrough=True)
+
+@polly_bp.route('/synthesize/batch', methods=['POST'])
+def synthesize_speech_batch():
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    if not isinstance(texts, list) or not texts or not all(isinstance(text, str) and text for text in texts):
+        return jsonify({'error': 'texts must be a non-empty list of strings'}), 400
+    if len(texts) > Config.SYNTHESIS_BATCH_MAX_SIZE:
+        return jsonify({'error': f'Batch size exceeds maximum of {Config.SYNTHESIS_BATCH_MAX_SIZE}'}), 400
+    output_format = data.get('format', 'wav')
+    if output_format not in AUDIO_MIME_TYPES:
+        return jsonify({'error': f"Unsupported format '{output_format}'"}), 400
+    error = _prosody_error(data)
+    if error:
+        return jsonify({'error': error}), 400
+    responses = synthesize_batch(texts, voice_id=data.get('voice_id'), output_format=output_format,
+                                 module_name=data.get('module'), rate=data.get('rate'), volume=data.get('volume'))
+    results = []
+    for response in responses:
+        if 'error' in response:
+            results.append({'error': response['error']})
+        else:
+            audio = response['AudioStream']
+            results.append({'format': response['OutputFormat'],
+                            'content_type': AUDIO_MIME_TYPES.get(response['OutputFormat'], audio_mime_type(audio)),
+                            'audio': base64.b64encode(audio).decode('ascii')})
+    return jsonify({
+        'results': results,
+        'synthesized': sum(1 for result in results if 'audio' in result)
+    }), 200
+
+@polly_bp.route('/audio/<key>', methods=['GET'])
+def cached_audio(key):
+    cache = get_audio_cache()
+    audio = cache.get(key) if cache else None
+    if audio is None:
+        return jsonify({'error': 'Audio not found'}), 404
+    return _send_cached(audio, key)
+
+@polly_bp.route('/cache/metrics', methods=['GET'])
+def audio_cache_metrics():
+    cache = get_audio_cache()
+    if not cache:
+        return jsonify({'enabled': False}), 200
+    return jsonify(dict(cache.metrics(), enabled=True)), 200
@@ -0,0 +1,161 @@
+"""
+Content-addressed cache for synthesized audio.
+Entries are keyed by a hash of everything that determines the audio: the
+parsed text, voice, rate, volume, output format and voice module. A small
+in-memory LRU tier sits in front of an on-disk tier; both are bounded by a
+byte budget and evict least recently used entries first.
+"""
+import os
+import json
+import hashlib
+import threading
+import collections
+from config import Config
+
+def audio_cache_key(parsed_text, voice_id=None, rate=None, volume=None, output_format="mp3", module_name=None):
+    fields = [parsed_text, voice_id, rate, volume, output_format, module_name]
+    return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+
+class AudioCache:
+    def __init__(self, memory_bytes=Config.AUDIO_CACHE_MEMORY_BYTES, cache_dir=Config.AUDIO_CACHE_DIR,
+                 disk_bytes=Config.AUDIO_CACHE_DISK_BYTES):
+        self.memory_bytes = memory_bytes
+        self.cache_dir = cache_dir
+        self.disk_bytes = disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self._memory = collections.OrderedDict()
+        self._memory_used = 0
+        self._disk = collections.OrderedDict()
+        self._disk_used = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            self._load_disk_index()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _load_disk_index(self):
+        # Rebuild the LRU order from modification times
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.tmp'):
+                continue
+            stat = os.stat(self._path(name))
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_used += size
+        self._evict_disk()
+
+    def get(self, key):
+        """Cached audio bytes for key, or None."""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.bytes_saved += len(audio)
+                return audio
+            on_disk = key in self._disk
+        audio = self._read_disk(key) if on_disk else None
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+                return None
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self.disk_hits += 1
+            self.bytes_saved += len(audio)
+            self._put_memory(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        with self._lock:
+            self._put_memory(key, audio)
+            if not self.cache_dir or len(audio) > self.disk_bytes or key in self._disk:
+                return
+        self._write_disk(key, audio)
+
+    def _put_memory(self, key, audio):
+        if len(audio) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_used -= len(self._memory.pop(key))
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+            self.evictions += 1
+
+    def _read_disk(self, key):
+        try:
+            with open(self._path(key), 'rb') as f:
+                audio = f.read()
+            os.utime(self._path(key))
+            return audio
+        except OSError:
+            with self._lock:
+                self._disk_used -= self._disk.pop(key, 0)
+            return None
+
+    def _write_disk(self, key, audio):
+        tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(audio)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            # The disk tier is best effort; the memory tier still has it
+            return
+        with self._lock:
+            if key not in self._disk:
+                self._disk[key] = len(audio)
+                self._disk_used += len(audio)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        while self._disk_used > self.disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def metrics(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used
+            }
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+def get_audio_cache():
+    """Return the shared cache, or None when AUDIO_CACHE_ENABLED is off."""
+    global _audio_cache
+    if not Config.AUDIO_CACHE_ENABLED:
+        return None
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+    return _audio_cache
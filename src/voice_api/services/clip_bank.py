@@ -0,0 +1,180 @@
+"""
+Clip bank for OTP prompts.
+Every OTP prompt is a fixed phrase followed by digits, so the phrases and
+the words "zero" to "nine" are rendered once per (voice, rate, volume,
+language) and each prompt is assembled by joining the PCM buffers with
+short crossfades. NumPy does the crossfades when installed; otherwise the
+same mix runs over the few hundred samples at each joint in pure Python.
+"""
+import io
+import sys
+import wave
+import array
+import threading
+from config import Config
+from ..utils.custom_exceptions import VoiceSynthesisError
+from .engine_pool import get_engine_pool
+from .voice_catalog import resolve_voice
+from ..utils.audio_buffer import RenderTarget
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DIGIT_WORDS = ("zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine")
+OTP_PROMPT_PHRASE = "Your one time password is"
+SILENCE_THRESHOLD = 300
+
+def render_clip(text, voice=None, rate=None, volume=None):
+    """
+    Render text to WAV with a pooled engine.
+    Returns (channels, sample rate, 16-bit PCM bytes).
+    """
+    with RenderTarget(suffix=".wav") as target:
+        with get_engine_pool().engine(rate=rate, volume=volume, voice=resolve_voice(voice)) as engine:
+            engine.save_to_file(text, target.path)
+            engine.runAndWait()
+        with wave.open(target.finish().open(), "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise VoiceSynthesisError("Clip bank needs 16-bit PCM audio")
+            return wav.getnchannels(), wav.getframerate(), wav.readframes(wav.getnframes())
+
+def _samples(pcm):
+    samples = array.array('h')
+    samples.frombytes(pcm)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    if numpy is not None:
+        return numpy.frombuffer(samples.tobytes(), dtype=numpy.int16)
+    return samples
+
+def _trim(samples, threshold=SILENCE_THRESHOLD):
+    """Cut leading and trailing silence so clips sit tightly together."""
+    if numpy is not None:
+        loud = numpy.flatnonzero(numpy.abs(samples.astype(numpy.int32)) > threshold)
+        return samples[loud[0]:loud[-1] + 1] if len(loud) else samples[:0]
+    loud = [i for i, sample in enumerate(samples) if abs(sample) > threshold]
+    return samples[loud[0]:loud[-1] + 1] if loud else samples[:0]
+
+def _silence(count):
+    if numpy is not None:
+        return numpy.zeros(count, dtype=numpy.int16)
+    return array.array('h', bytes(2 * count))
+
+def _crossfade_join(segments, fade):
+    """Join sample buffers, overlapping each joint by up to fade samples."""
+    parts = []
+    carry = segments[0]
+    for segment in segments[1:]:
+        overlap = min(fade, len(carry), len(segment))
+        parts.append(carry[:len(carry) - overlap])
+        tail, head = carry[len(carry) - overlap:], segment[:overlap]
+        if numpy is not None:
+            ramp = numpy.linspace(0.0, 1.0, overlap, dtype=numpy.float32)
+            parts.append((tail * (1.0 - ramp) + head * ramp).astype(numpy.int16))
+        else:
+            parts.append(array.array('h', (
+                int(a + (b - a) * i / overlap) for i, (a, b) in enumerate(zip(tail, head))
+            )))
+        carry = segment[overlap:]
+    parts.append(carry)
+    if numpy is not None:
+        return numpy.concatenate(parts).astype('<i2').tobytes()
+    joined = array.array('h')
+    for part in parts:
+        joined.extend(part)
+    if sys.byteorder == 'big':
+        joined.byteswap()
+    return joined.tobytes()
+
+class _ClipSet:
+    def __init__(self, channels, framerate):
+        self.channels = channels
+        self.framerate = framerate
+        self.clips = {}
+
+class ClipBank:
+    def __init__(self, render=render_clip, crossfade_ms=Config.OTP_CLIP_CROSSFADE_MS,
+                 gap_ms=Config.OTP_CLIP_GAP_MS):
+        self.render = render
+        self.crossfade_ms = crossfade_ms
+        self.gap_ms = gap_ms
+        self.renders = 0
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def _clip(self, clip_set, text, key):
+        clip = clip_set.clips.get(text)
+        if clip is None:
+            voice, rate, volume, _ = key
+            channels, framerate, pcm = self.render(text, voice=voice, rate=rate, volume=volume)
+            if (channels, framerate) != (clip_set.channels, clip_set.framerate):
+                raise VoiceSynthesisError("Clips for one voice must share a sample format")
+            clip = clip_set.clips[text] = _trim(_samples(pcm))
+            self.renders += 1
+        return clip
+
+    def _clip_set(self, key):
+        clip_set = self._sets.get(key)
+        if clip_set is None:
+            # The first clip fixes the sample format for this voice setting
+            voice, rate, volume, _ = key
+            channels, framerate, pcm = self.render(DIGIT_WORDS[0], voice=voice, rate=rate, volume=volume)
+            self.renders += 1
+            clip_set = _ClipSet(channels, framerate)
+            clip_set.clips[DIGIT_WORDS[0]] = _trim(_samples(pcm))
+            for word in DIGIT_WORDS[1:]:
+                self._clip(clip_set, word, key)
+            self._sets[key] = clip_set
+        return clip_set
+
+    def assemble(self, otp, prefix=OTP_PROMPT_PHRASE, suffix=None, voice=None,
+                 rate=None, volume=None, language="en"):
+        """
+        Build the spoken prompt for otp as WAV bytes. Clips are rendered on
+        first use for each voice setting; later calls only join buffers.
+        """
+        key = (voice, rate, volume, language)
+        with self._lock:
+            clip_set = self._clip_set(key)
+            texts = [text for text in (prefix, suffix) if text]
+            phrases = {text: self._clip(clip_set, text, key) for text in texts}
+        samples_per_ms = clip_set.framerate * clip_set.channels // 1000
+        gap = _silence(self.gap_ms * samples_per_ms)
+        segments = [phrases[prefix], gap] if prefix else []
+        for digit in str(otp):
+            segments += [clip_set.clips[DIGIT_WORDS[int(digit)]], gap]
+        if suffix:
+            segments.append(phrases[suffix])
+        else:
+            segments.pop()
+        pcm = _crossfade_join(segments, self.crossfade_ms * samples_per_ms)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(clip_set.channels)
+            wav.setsampwidth(2)
+            wav.setframerate(clip_set.framerate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+_clip_bank = None
+_clip_bank_lock = threading.Lock()
+
+def get_clip_bank():
+    global _clip_bank
+    with _clip_bank_lock:
+        if _clip_bank is None:
+            _clip_bank = ClipBank()
+    return _clip_bank
+
+def render_otp_prompt(otp, prefix=OTP_PROMPT_PHRASE, suffix=None, **settings):
+    """
+    Assemble an OTP prompt from the clip bank, in the same shape as
+    synthesize_speech's response.
+    """
+    try:
+        audio = get_clip_bank().assemble(otp, prefix=prefix, suffix=suffix, **settings)
+    except Exception as e:
+        return {"error": str(e)}
+    return {"OutputFormat": "wav", "AudioStream": audio}
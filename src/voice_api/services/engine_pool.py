@@ -0,0 +1,121 @@
+"""
+Pool of reusable pyttsx3 engines.
+Creating an engine loads the speech driver, so engines are created once and
+checked out per synthesis instead of calling pyttsx3.init() on every
+request. Each checkout resets rate, volume and voice; an engine is replaced
+after max_uses syntheses, after it raises, or when its health check fails.
+"""
+import threading
+import contextlib
+import collections
+import pyttsx3
+from config import Config
+
+class _PooledEngine:
+    def __init__(self, engine):
+        self.engine = engine
+        self.uses = 0
+        self.default_voice = engine.getProperty('voice')
+
+class EnginePool:
+    def __init__(self, size=Config.TTS_ENGINE_POOL_SIZE, max_uses=Config.TTS_ENGINE_MAX_USES,
+                 rate=Config.DEFAULT_VOICE_RATE, volume=Config.DEFAULT_VOICE_VOLUME,
+                 timeout=Config.TTS_ENGINE_CHECKOUT_TIMEOUT, factory=None):
+        self.size = size
+        self.max_uses = max_uses
+        self.rate = rate
+        self.volume = volume
+        self.timeout = timeout
+        # pyttsx3.init() hands back one shared engine per driver, so build
+        # engines directly to give each pool slot its own
+        self.factory = factory or pyttsx3.Engine
+        self.created = 0
+        self.recycled = 0
+        self._idle = collections.deque()
+        self._total = 0
+        self._available = threading.Condition()
+
+    def _checkout(self, timeout):
+        with self._available:
+            if not self._available.wait_for(lambda: self._idle or self._total < self.size, timeout):
+                raise TimeoutError("No speech engine became available")
+            if self._idle:
+                return self._idle.popleft()
+            self._total += 1
+        try:
+            pooled = _PooledEngine(self.factory())
+        except Exception:
+            with self._available:
+                self._total -= 1
+                self._available.notify()
+            raise
+        self.created += 1
+        return pooled
+
+    def _checkin(self, pooled):
+        with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    def _discard(self, pooled):
+        try:
+            pooled.engine.stop()
+        except Exception:
+            pass
+        with self._available:
+            self._total -= 1
+            self.recycled += 1
+            self._available.notify()
+
+    def _healthy(self, pooled):
+        try:
+            return not pooled.engine.isBusy() and pooled.engine.getProperty('rate') is not None
+        except Exception:
+            return False
+
+    @contextlib.contextmanager
+    def engine(self, rate=None, volume=None, voice=None, timeout=None):
+        """
+        Check out an engine reset to the pool defaults (or the given rate,
+        volume and voice id) for the duration of the with block.
+        """
+        while True:
+            pooled = self._checkout(self.timeout if timeout is None else timeout)
+            # Fresh engines skip the check so a broken driver cannot spin here
+            if pooled.uses == 0 or self._healthy(pooled):
+                break
+            self._discard(pooled)
+        try:
+            pooled.engine.setProperty('rate', self.rate if rate is None else rate)
+            pooled.engine.setProperty('volume', self.volume if volume is None else volume)
+            pooled.engine.setProperty('voice', voice or pooled.default_voice)
+            yield pooled.engine
+        except Exception:
+            self._discard(pooled)
+            raise
+        pooled.uses += 1
+        if pooled.uses >= self.max_uses:
+            self._discard(pooled)
+        else:
+            self._checkin(pooled)
+
+    def metrics(self):
+        with self._available:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                "created": self.created,
+                "recycled": self.recycled
+            }
+
+_engine_pool = None
+_engine_pool_lock = threading.Lock()
+
+def get_engine_pool():
+    """Return the process-wide engine pool, creating it on first use."""
+    global _engine_pool
+    with _engine_pool_lock:
+        if _engine_pool is None:
+            _engine_pool = EnginePool()
+    return _engine_pool
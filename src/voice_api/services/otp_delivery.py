@@ -0,0 +1,121 @@
+"""
+Background OTP voice delivery.
+Requests enqueue a speech job and return straight away; worker threads run
+the slow text-to-speech call and record each job's state and timings, so
+request threads are never tied up in engine.runAndWait().
+"""
+import time
+import uuid
+import queue
+import datetime
+import threading
+import collections
+from config import Config
+from ..utils.otp_logic import speak_otp
+
+QUEUED = 'queued'
+SPEAKING = 'speaking'
+DELIVERED = 'delivered'
+FAILED = 'failed'
+
+class DeliveryQueueFull(Exception):
+    """Raised when no more speech jobs can be queued."""
+
+class DeliveryQueue:
+    def __init__(self, deliver=speak_otp, workers=Config.OTP_DELIVERY_WORKERS,
+                 max_queued=Config.OTP_DELIVERY_QUEUE_SIZE, history=Config.OTP_DELIVERY_HISTORY):
+        self.deliver = deliver
+        self.workers = workers
+        self.history = history
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = collections.OrderedDict()
+        self._latest = {}
+        # job_id -> key, so trimming a job can drop its _latest entry
+        self._job_keys = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, key, *args):
+        """
+        Queue deliver(*args) for key (user id or phone number).
+        Returns a snapshot of the new job; raises DeliveryQueueFull.
+        """
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'state': QUEUED,
+            'queued_at': datetime.datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'queue_seconds': None,
+            'speak_seconds': None,
+            'error': None
+        }
+        with self._lock:
+            self._start_workers()
+            try:
+                self._queue.put_nowait((job, time.perf_counter(), args))
+            except queue.Full:
+                raise DeliveryQueueFull("Voice delivery queue is full")
+            self._jobs[job['job_id']] = job
+            self._latest[key] = job['job_id']
+            self._job_keys[job['job_id']] = key
+            self._trim()
+            return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def latest(self, key):
+        """Most recent job for key, or None."""
+        with self._lock:
+            job = self._jobs.get(self._latest.get(key))
+            return dict(job) if job is not None else None
+
+    def _trim(self):
+        # Forget the oldest finished jobs once the history is full
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.history:
+                break
+            if self._jobs[job_id]['state'] in (DELIVERED, FAILED):
+                del self._jobs[job_id]
+                key = self._job_keys.pop(job_id)
+                if self._latest.get(key) == job_id:
+                    del self._latest[key]
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.update(changes)
+
+    def _run(self):
+        while True:
+            job, queued, args = self._queue.get()
+            started = time.perf_counter()
+            self._update(job, state=SPEAKING, started_at=datetime.datetime.now().isoformat(),
+                         queue_seconds=round(started - queued, 3))
+            try:
+                delivered = self.deliver(*args) is not False
+                error = None if delivered else 'Speech synthesis failed'
+            except Exception as e:
+                delivered, error = False, str(e)
+            self._update(job, state=DELIVERED if delivered else FAILED, error=error,
+                         finished_at=datetime.datetime.now().isoformat(),
+                         speak_seconds=round(time.perf_counter() - started, 3))
+            self._queue.task_done()
+
+_delivery_queue = None
+_delivery_queue_lock = threading.Lock()
+
+def get_delivery_queue():
+    global _delivery_queue
+    with _delivery_queue_lock:
+        if _delivery_queue is None:
+            _delivery_queue = DeliveryQueue()
+    return _delivery_queue
@@ -0,0 +1,143 @@
+"""
+Pool of pre-generated OTP codes with their audio already rendered.
+A background thread keeps the pool topped up, so sending an OTP only has
+to claim an entry and bind it to the user instead of waiting on speech
+synthesis.
+"""
+import time
+import threading
+import collections
+from config import Config
+from ..utils.otp import generate_otp
+from ..utils.custom_exceptions import VoiceSynthesisError
+from .polly_service import get_voice_module, DEFAULT_VOICE_MODULE
+from .clip_bank import render_otp_prompt
+
+PooledOTP = collections.namedtuple('PooledOTP', ['otp', 'audio', 'audio_format'])
+
+def render_otp_audio(otp):
+    """
+    Render the spoken OTP prompt to audio bytes.
+    """
+    if Config.OTP_CLIP_BANK_ENABLED:
+        response = render_otp_prompt(otp)
+    else:
+        # Straight to the voice module: spoken codes stay out of the shared
+        # audio cache
+        try:
+            response = get_voice_module(DEFAULT_VOICE_MODULE).synthesize(
+                f"Your one time password is {', '.join(list(otp))}", output_format="wav")
+        except Exception as e:
+            response = {"error": str(e)}
+    if "error" in response:
+        raise VoiceSynthesisError(response["error"])
+    return PooledOTP(otp, response["AudioStream"], response["OutputFormat"])
+
+class OTPAudioPool:
+    def __init__(self, size=Config.OTP_POOL_SIZE, low_water=Config.OTP_POOL_LOW_WATER,
+                 render=render_otp_audio, generate=generate_otp):
+        self.size = size
+        self.low_water = low_water
+        self.render = render
+        self.generate = generate
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+        self.render_errors = 0
+        self.render_seconds = 0.0
+        self._entries = collections.deque()
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def claim(self):
+        """
+        Take a ready entry from the pool, or None if it is empty.
+        """
+        with self._lock:
+            entry = self._entries.popleft() if self._entries else None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            if len(self._entries) < self.low_water:
+                self._refill.set()
+        return entry
+
+    def fill(self):
+        """
+        Render entries until the pool is full. Returns how many were added.
+        """
+        added = 0
+        while not self._stop.is_set():
+            with self._lock:
+                if len(self._entries) >= self.size:
+                    break
+            started = time.perf_counter()
+            try:
+                entry = self.render(self.generate())
+            except Exception:
+                self.render_errors += 1
+                break
+            with self._lock:
+                self._entries.append(entry)
+                self.rendered += 1
+                self.render_seconds += time.perf_counter() - started
+            added += 1
+        return added
+
+    def metrics(self):
+        with self._lock:
+            claims = self.hits + self.misses
+            return {
+                "available": len(self._entries),
+                "size": self.size,
+                "low_water": self.low_water,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / claims if claims else 0.0,
+                "rendered": self.rendered,
+                "render_errors": self.render_errors,
+                "refill_rate": self.rendered / self.render_seconds if self.render_seconds else 0.0,
+            }
+
+    def start(self):
+        if self._thread is None:
+            self._refill.set()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._refill.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._refill.wait()
+            self._refill.clear()
+            if not self._stop.is_set():
+                self.fill()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_otp_pool():
+    """
+    Return the shared pool, starting it on first use. None when disabled.
+    """
+    global _pool
+    if not Config.OTP_POOL_ENABLED:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = OTPAudioPool()
+            _pool.start()
+    return _pool
+
+def claim_pooled_otp():
+    pool = get_otp_pool()
+    return pool.claim() if pool else None
@@ -1,8 +1,16 @@
-import pyttsx3
-import tempfile
-import os
 from dotenv import load_dotenv
 import re
+import itertools
+import wave
+import struct
+from .engine_pool import get_engine_pool
+from .tts_workers import get_tts_workers
+from .audio_cache import get_audio_cache, audio_cache_key
+from .voice_catalog import resolve_voice
+from .transcoder import get_transcoder, is_wav
+from ..utils.audio_buffer import RenderTarget
+from ..utils.custom_exceptions import VoiceSynthesisError
+from ..utils.ssml import parse_ssml, is_plain, segment_prosody
 
 load_dotenv()
 
@@ -12,54 +20,176 @@ Includes a mock for local testing and error handling.
 """
 
 """
-Voice module plugin interface and pyttsx3 implementation for plug-and-play support, now with SSML-like and adaptive features.
+Voice module plugin interface and pyttsx3 implementation for plug-and-play support, now with SSML and adaptive features.
 """
 
 class VoiceModuleBase:
     def synthesize(self, text, voice_id=None, output_format="mp3", rate=None, volume=None, ssml=None):
         raise NotImplementedError("Voice modules must implement the synthesize method.")
+    def stream(self, text, voice_id=None, output_format="mp3", rate=None, volume=None, ssml=None):
+        """
+        Yield the audio in pieces. Modules that can render incrementally
+        override this; the default yields the whole synthesis at once.
+        """
+        response = self.synthesize(text, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume, ssml=ssml)
+        if "error" in response:
+            raise VoiceSynthesisError(response["error"])
+        yield bytes(response["AudioStream"])
+    def synthesize_batch(self, texts, voice_id=None, output_format="mp3", rate=None, volume=None):
+        """
+        Synthesize several texts with shared settings, one response each.
+        Modules that can share one engine run across texts override this.
+        """
+        return [self.synthesize(text, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume)
+                for text in texts]
 
 class Pyttsx3VoiceModule(VoiceModuleBase):
     def synthesize(self, text, voice_id=None, output_format="mp3", rate=None, volume=None, ssml=None):
-        engine = pyttsx3.init()
-        # Apply voice
-        if voice_id:
-            voices = engine.getProperty('voices')
-            for v in voices:
-                if voice_id in v.id:
-                    engine.setProperty('voice', v.id)
-                    break
-        # Adaptive rate and volume
-        if rate is not None:
-            engine.setProperty('rate', rate)
-        if volume is not None:
-            engine.setProperty('volume', volume)
-        # SSML-like support: parse <break>, <emphasis>, <prosody> tags
-        parsed_text = self._parse_ssml(text if ssml is None else ssml)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tf:
-            temp_path = tf.name
+        # The engine writes WAV; synthesize_speech transcodes to output_format
+        audio = self.render(text, voice_id=voice_id, rate=rate, volume=volume, ssml=ssml)
+        return {"OutputFormat": "wav", "AudioStream": audio.view()}
+    def synthesize_batch(self, texts, voice_id=None, output_format="mp3", rate=None, volume=None):
+        audio = self.render_batch(texts, voice_id=voice_id, rate=rate, volume=volume)
+        return [{"OutputFormat": "wav", "AudioStream": rendered.view()} for rendered in audio]
+    def render(self, text, voice_id=None, rate=None, volume=None, ssml=None):
+        """
+        Render into RAM-backed storage and return the RenderedAudio, which
+        hands out a memoryview or a file object over the same pages.
+        """
+        return self.render_batch([text if ssml is None else ssml], voice_id=voice_id, rate=rate, volume=volume)[0]
+    def render_batch(self, sources, voice_id=None, rate=None, volume=None):
+        """
+        Render several texts or SSML documents in a single engine run and
+        return a RenderedAudio for each, in order.
+        """
+        # SSML becomes a speech plan; each segment gets its own rate and volume
+        plans = [parse_ssml(source) for source in sources]
+        spoken = [_spoken_segments(plan) for plan in plans]
+        parts = iter(self._render_segments([plan[i] for plan, indexes in zip(plans, spoken) for i in indexes],
+                                           voice_id=voice_id, rate=rate, volume=volume))
+        results = []
+        for plan, indexes in zip(plans, spoken):
+            rendered = [next(parts) for _ in indexes]
+            if is_plain(plan):
+                results.append(rendered[0])
+            else:
+                params, frames = _join_plan(plan, indexes, rendered)
+                with RenderTarget(suffix=".wav") as target:
+                    with wave.open(target.path, "wb") as wav:
+                        wav.setnchannels(params[0])
+                        wav.setsampwidth(params[1])
+                        wav.setframerate(params[2])
+                        wav.writeframes(frames)
+                    results.append(target.finish())
+        return results
+    def render_pcm(self, plan, voice_id=None, rate=None, volume=None):
+        """
+        Render a speech plan to WAV in one engine run and return ((channels,
+        sample width, frame rate), PCM frames), with silence for its pauses.
+        """
+        indexes = _spoken_segments(plan)
+        rendered = self._render_segments([plan[i] for i in indexes], voice_id=voice_id, rate=rate, volume=volume)
+        return _join_plan(plan, indexes, rendered)
+    def _render_segments(self, segments, voice_id=None, rate=None, volume=None):
+        if not segments:
+            return []
+        pool = get_engine_pool()
+        base_rate = pool.rate if rate is None else rate
+        base_volume = pool.volume if volume is None else volume
+        targets = [RenderTarget(suffix=".wav") for _ in segments]
         try:
-            engine.save_to_file(parsed_text, temp_path)
-            engine.runAndWait()
-            with open(temp_path, "rb") as f:
-                audio_data = f.read()
+            # Adaptive rate and volume; the pool resets anything not given.
+            # The voice comes from the catalog, not a scan of the driver's list
+            with pool.engine(rate=rate, volume=volume, voice=resolve_voice(voice_id)) as engine:
+                # Property changes queue behind the saves, so one runAndWait()
+                # renders every segment with its own prosody
+                for segment, target in zip(segments, targets):
+                    segment_rate, segment_volume = segment_prosody(segment, base_rate, base_volume)
+                    engine.setProperty('rate', segment_rate)
+                    engine.setProperty('volume', segment_volume)
+                    engine.save_to_file(segment.text, target.path)
+                engine.runAndWait()
+            return [target.finish() for target in targets]
         finally:
-            os.remove(temp_path)
-        return {"OutputFormat": output_format, "AudioStream": audio_data}
-    def _parse_ssml(self, text):
-        # Replace <break time="Xms"/> with appropriate pauses
-        text = re.sub(r'<break time="(\d+)ms"\s*/>', lambda m: ' ' * (int(m.group(1)) // 250), text)
-        # Replace <emphasis>...</emphasis> with uppercase
-        text = re.sub(r'<emphasis>(.*?)</emphasis>', lambda m: m.group(1).upper(), text)
-        # Replace <prosody rate="slow">...</prosody> with slow marker
-        text = re.sub(r'<prosody rate="slow">(.*?)</prosody>', lambda m: '[SLOW] ' + m.group(1), text)
-        # Replace <prosody rate="fast">...</prosody> with fast marker
-        text = re.sub(r'<prosody rate="fast">(.*?)</prosody>', lambda m: '[FAST] ' + m.group(1), text)
-        # Replace <prosody volume="loud">...</prosody> with loud marker
-        text = re.sub(r'<prosody volume="loud">(.*?)</prosody>', lambda m: '[LOUD] ' + m.group(1), text)
-        # Replace <prosody volume="soft">...</prosody> with soft marker
-        text = re.sub(r'<prosody volume="soft">(.*?)</prosody>', lambda m: '[SOFT] ' + m.group(1), text)
-        return text
+            for target in targets:
+                target.close()
+    def stream(self, text, voice_id=None, output_format="mp3", rate=None, volume=None, ssml=None):
+        if output_format != "wav":
+            yield from super().stream(text, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume, ssml=ssml)
+            return
+        # Speak one sentence at a time so the first one is on the wire
+        # while the rest are still being rendered
+        pieces = split_plan(parse_ssml(text if ssml is None else ssml))
+        yield from wav_stream(self.render_pcm(piece, voice_id=voice_id, rate=rate, volume=volume) for piece in pieces)
+
+def _spoken_segments(plan):
+    # Pause-only segments need no engine time, unless nothing is spoken
+    return [i for i, segment in enumerate(plan) if segment.text] or [0]
+
+def _join_plan(plan, indexes, rendered):
+    """PCM for a plan from its rendered segments, with silence for pauses."""
+    pcm = {}
+    params = None
+    for i, audio in zip(indexes, rendered):
+        with wave.open(audio.open(), "rb") as wav:
+            segment_params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+            pcm[i] = wav.readframes(wav.getnframes())
+        if params is None:
+            params = segment_params
+        elif segment_params != params:
+            raise VoiceSynthesisError("Plan segments must share a sample format")
+    channels, sample_width, framerate = params
+    frames = []
+    for i, segment in enumerate(plan):
+        if segment.pause_ms:
+            frames.append(bytes(framerate * segment.pause_ms // 1000 * channels * sample_width))
+        frames.append(pcm.get(i, b""))
+    return params, b"".join(frames)
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?;])\s+')
+# Sizes a streaming WAV header cannot know yet; players read to the end
+WAV_STREAM_SIZE = 0xFFFFFFFF
+
+def split_utterance(text):
+    """Split text into sentences, the unit streamed synthesis renders at a time."""
+    segments = [segment for segment in SENTENCE_BREAK.split(text.strip()) if segment.strip()]
+    return segments or [text]
+
+def split_plan(plan):
+    """Split a speech plan into one plan per sentence."""
+    pieces = []
+    for segment in plan:
+        for i, sentence in enumerate(split_utterance(segment.text)):
+            # The pause belongs before the segment's first sentence
+            pieces.append((segment._replace(text=sentence, pause_ms=segment.pause_ms if i == 0 else 0),))
+    return pieces
+
+def wav_header(channels, sample_width, framerate, data_size=WAV_STREAM_SIZE):
+    riff_size = WAV_STREAM_SIZE if data_size == WAV_STREAM_SIZE else 36 + data_size
+    return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', riff_size, b'WAVE', b'fmt ', 16, 1, channels,
+                       framerate, framerate * channels * sample_width, channels * sample_width,
+                       sample_width * 8, b'data', data_size)
+
+def wav_stream(segments):
+    """
+    Turn (params, frames) pairs into one WAV stream: a header with open-ended
+    sizes as soon as the first segment is ready, then each segment's frames.
+    """
+    stream_params = None
+    for params, frames in segments:
+        if stream_params is None:
+            stream_params = params
+            yield wav_header(*params)
+        elif params != stream_params:
+            raise VoiceSynthesisError("Streamed segments must share a sample format")
+        yield frames
+
+def seal_wav_stream(audio):
+    """Fill in the real sizes of a WAV produced by wav_stream."""
+    if len(audio) < 44 or struct.unpack_from('<I', audio, 40)[0] != WAV_STREAM_SIZE:
+        return audio
+    channels, framerate, sample_width = struct.unpack_from('<H I 6x H', audio, 22)
+    return wav_header(channels, sample_width // 8, framerate, len(audio) - 44) + audio[44:]
 
 # Plugin registry for voice modules
 VOICE_MODULES = {}
@@ -76,11 +206,175 @@ register_voice_module("pyttsx3", Pyttsx3VoiceModule())
 # Default synthesize_speech function using the selected voice module
 DEFAULT_VOICE_MODULE = "pyttsx3"
 
-def synthesize_speech(text, voice_id=None, output_format="mp3", module_name=None, rate=None, volume=None, ssml=None):
+def synthesize_speech(text, voice_id=None, output_format="mp3", module_name=None, rate=None, volume=None, ssml=None,
+                      use_cache=True):
+    # use_cache=False keeps text that must not be stored (spoken OTPs) out
+    # of the audio cache, memory and disk alike
+    module = get_voice_module(module_name or DEFAULT_VOICE_MODULE)
+    if not module:
+        return {"error": f"Voice module '{module_name}' not found."}
+    cache = get_audio_cache() if use_cache else None
+    key = source_key = None
+    if cache:
+        key = speech_cache_key(module, text, voice_id, output_format, module_name, rate, volume, ssml)
+        audio = cache.get(key)
+        if audio is not None:
+            return {"OutputFormat": output_format, "AudioStream": audio}
+        # Every format is transcoded from the one cached WAV render
+        source_key = speech_cache_key(module, text, voice_id, "wav", module_name, rate, volume, ssml)
+        source = cache.get(source_key) if source_key != key else None
+        if source is not None:
+            return _transcoded({"OutputFormat": "wav", "AudioStream": source}, output_format, cache, key)
+    try:
+        workers = get_tts_workers()
+        if workers and isinstance(module, Pyttsx3VoiceModule):
+            # Run the built-in engine in a worker process, off the request thread
+            response = workers.result(workers.submit(_synthesize_in_worker, text, voice_id, output_format, rate, volume, ssml))
+        else:
+            response = module.synthesize(text, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume, ssml=ssml)
+    except Exception as e:
+        return {"error": str(e)}
+    return _transcoded(response, output_format, cache, key, source_key)
+
+def _transcoded(response, output_format, cache=None, key=None, source_key=None):
+    """
+    Convert a WAV render to output_format and cache the result under key,
+    next to the render itself under source_key. Audio in any other format is
+    the module's own encoding and passes through.
+    """
+    if "error" in response:
+        return response
+    audio = response["AudioStream"]
+    if output_format != "wav" and is_wav(audio):
+        if cache and source_key:
+            cache.put(source_key, audio)
+        try:
+            produced, audio = get_transcoder().transcode(audio, output_format)
+        except Exception as e:
+            return {"error": str(e)}
+        response = {"OutputFormat": produced, "AudioStream": audio}
+        if produced != output_format:
+            # A WAV fallback is already cached as the render
+            return response
+    if cache:
+        cache.put(key, audio)
+    return response
+
+def synthesize_batch(texts, voice_id=None, output_format="mp3", module_name=None, rate=None, volume=None):
+    """
+    Synthesize many texts (plain or SSML) with shared settings and return
+    one synthesize_speech-style response per text, in order. Cached audio is
+    reused; the remaining distinct texts are rendered together, in a single
+    engine run or one run per TTS worker.
+    """
+    module = get_voice_module(module_name or DEFAULT_VOICE_MODULE)
+    if not module:
+        return [{"error": f"Voice module '{module_name}' not found."} for _ in texts]
+    cache = get_audio_cache()
+    responses = [None] * len(texts)
+    keys = {}
+    if cache:
+        for i, text in enumerate(texts):
+            keys[text] = keys.get(text) or speech_cache_key(module, text, voice_id, output_format, module_name, rate, volume)
+            audio = cache.get(keys[text])
+            if audio is not None:
+                responses[i] = {"OutputFormat": output_format, "AudioStream": audio}
+    pending = list(dict.fromkeys(text for text, response in zip(texts, responses) if response is None))
+    try:
+        workers = get_tts_workers()
+        if not pending:
+            rendered = []
+        elif workers and isinstance(module, Pyttsx3VoiceModule):
+            # Split the batch evenly so each worker makes one engine run
+            size = -(-len(pending) // workers.workers)
+            futures = [workers.submit(_synthesize_batch_in_worker, pending[i:i + size], voice_id, output_format, rate, volume)
+                       for i in range(0, len(pending), size)]
+            rendered = [response for future in futures for response in workers.result(future)]
+        else:
+            rendered = module.synthesize_batch(pending, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume)
+    except Exception as e:
+        rendered = [{"error": str(e)} for _ in pending]
+    by_text = {}
+    for text, response in zip(pending, rendered):
+        source_key = speech_cache_key(module, text, voice_id, "wav", module_name, rate, volume) if cache else None
+        by_text[text] = _transcoded(response, output_format, cache, keys.get(text), source_key)
+    return [response if response is not None else by_text[text] for text, response in zip(texts, responses)]
+
+def speech_cache_key(module, text, voice_id=None, output_format="mp3", module_name=None, rate=None, volume=None, ssml=None):
+    source = text if ssml is None else ssml
+    # Key on what the engine will actually speak, not on markup spelling
+    if isinstance(module, Pyttsx3VoiceModule):
+        source = parse_ssml(source)
+    return audio_cache_key(source, voice_id, rate, volume, output_format, module_name or DEFAULT_VOICE_MODULE)
+
+def stream_speech(text, voice_id=None, output_format="wav", module_name=None, rate=None, volume=None, ssml=None):
+    """
+    Like synthesize_speech, but AudioStream is an iterator of byte chunks
+    that starts yielding before the whole utterance is rendered. Audio that
+    is already complete (a cached render, or any format other than WAV,
+    which has to be transcoded whole) comes back as bytes with Buffered set.
+    ETag is the audio cache key; a fully consumed stream is stored under it.
+    """
     module = get_voice_module(module_name or DEFAULT_VOICE_MODULE)
     if not module:
         return {"error": f"Voice module '{module_name}' not found."}
+    if output_format != "wav":
+        response = synthesize_speech(text, voice_id=voice_id, output_format=output_format, module_name=module_name,
+                                     rate=rate, volume=volume, ssml=ssml)
+        if "error" in response:
+            return response
+        key = speech_cache_key(module, text, voice_id, response["OutputFormat"], module_name, rate, volume, ssml)
+        return dict(response, ETag=key, Buffered=True)
+    key = speech_cache_key(module, text, voice_id, output_format, module_name, rate, volume, ssml)
+    cache = get_audio_cache()
+    audio = cache.get(key) if cache else None
+    if audio is not None:
+        return {"OutputFormat": output_format, "AudioStream": audio, "ETag": key, "Buffered": True}
     try:
-        return module.synthesize(text, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume, ssml=ssml)
+        workers = get_tts_workers()
+        if workers and isinstance(module, Pyttsx3VoiceModule) and output_format == "wav":
+            # Queue every sentence up front so workers render ahead of the stream
+            pieces = split_plan(parse_ssml(text if ssml is None else ssml))
+            futures = [workers.submit(_render_pcm_in_worker, piece, voice_id, rate, volume) for piece in pieces]
+            stream = wav_stream(workers.result(future) for future in futures)
+        else:
+            stream = module.stream(text, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume, ssml=ssml)
+        # Render the first piece now, so a failure to start is an error
+        # response rather than a broken stream after a 200
+        first = next(stream, None)
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+    stream = itertools.chain([first], stream) if first is not None else iter(())
+    if cache:
+        stream = _cache_stream(stream, cache, key, output_format)
+    return {"OutputFormat": output_format, "AudioStream": stream, "ETag": key, "Buffered": False}
+
+def _cache_stream(stream, cache, key, output_format):
+    chunks = []
+    for chunk in stream:
+        chunks.append(chunk)
+        yield chunk
+    # Only complete renders are cached; an abandoned stream never gets here
+    audio = b"".join(chunks)
+    if output_format == "wav":
+        audio = seal_wav_stream(audio)
+    cache.put(key, audio)
+
+def _render_pcm_in_worker(plan, voice_id, rate, volume):
+    return get_voice_module(DEFAULT_VOICE_MODULE).render_pcm(plan, voice_id=voice_id, rate=rate, volume=volume)
+
+def _synthesize_in_worker(text, voice_id, output_format, rate, volume, ssml):
+    module = get_voice_module(DEFAULT_VOICE_MODULE)
+    response = module.synthesize(text, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume, ssml=ssml)
+    # Results cross the process boundary pickled, so send plain bytes
+    if "AudioStream" in response:
+        response["AudioStream"] = bytes(response["AudioStream"])
+    return response
+
+def _synthesize_batch_in_worker(texts, voice_id, output_format, rate, volume):
+    module = get_voice_module(DEFAULT_VOICE_MODULE)
+    responses = module.synthesize_batch(texts, voice_id=voice_id, output_format=output_format, rate=rate, volume=volume)
+    for response in responses:
+        if "AudioStream" in response:
+            response["AudioStream"] = bytes(response["AudioStream"])
+    return responses
@@ -0,0 +1,188 @@
+"""
+Encrypted store of OTP prompt audio for replays.
+Each live OTP gets one entry holding the code and, once rendered, its
+spoken prompt. Both are Fernet-encrypted, so neither the digits nor the
+audio sit in memory in the clear. A replay decrypts and streams the
+stored audio instead of running the engine again. Entries are dropped
+when the OTP is verified or expires, and the oldest are evicted once the
+entry or byte budget is reached.
+"""
+import time
+import datetime
+import threading
+import collections
+from cryptography.fernet import Fernet, InvalidToken
+from config import Config
+from .otp_pool import render_otp_audio
+
+ReplayAudio = collections.namedtuple('ReplayAudio', ['audio', 'audio_format'])
+
+def _timestamp(expires_at):
+    if isinstance(expires_at, str):
+        expires_at = datetime.datetime.fromisoformat(expires_at)
+    if isinstance(expires_at, datetime.datetime):
+        return expires_at.timestamp()
+    return float(expires_at)
+
+class _Entry:
+    __slots__ = ('expires', 'otp', 'audio', 'audio_format')
+    def __init__(self, expires, otp):
+        self.expires = expires
+        self.otp = otp
+        self.audio = None
+        self.audio_format = None
+    @property
+    def size(self):
+        return len(self.otp) + len(self.audio or b'')
+
+class ReplayAudioStore:
+    def __init__(self, max_entries=Config.OTP_REPLAY_MAX_ENTRIES, max_bytes=Config.OTP_REPLAY_MAX_BYTES,
+                 key=Config.OTP_REPLAY_KEY, render=render_otp_audio):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.render = render
+        self.hits = 0
+        self.renders = 0
+        self.misses = 0
+        self.evictions = 0
+        self.purged = 0
+        # Without a configured key nothing outlives the process, which is
+        # fine for audio that only lives as long as its OTP
+        self._fernet = Fernet(key or Fernet.generate_key())
+        # Insertion order is expiry order: every OTP gets the same lifetime
+        self._entries = collections.OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def put(self, key, otp, expires_at, audio=None, audio_format=None):
+        """
+        Keep otp for key (user id or phone number) until expires_at,
+        replacing any earlier entry. Pass audio when it is already rendered.
+        """
+        entry = _Entry(_timestamp(expires_at), self._fernet.encrypt(otp.encode()))
+        if audio is not None:
+            entry.audio, entry.audio_format = self._fernet.encrypt(bytes(audio)), audio_format
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._used += entry.size
+            self._purge(time.time())
+            self._evict()
+
+    def replay(self, key, otp=None, render=True):
+        """
+        Audio for key's live OTP as ReplayAudio, rendering it on the first
+        replay only (or, with render=False, not at all). None when there is
+        no live entry, it is for another OTP or it has no audio to replay.
+        Raises VoiceSynthesisError if the first render fails.
+        """
+        with self._lock:
+            entry = self._live(key, otp, time.time())
+            if entry is None or (entry.audio is None and not render):
+                self.misses += 1
+                return None
+            if entry.audio is not None:
+                self.hits += 1
+                return ReplayAudio(self._fernet.decrypt(entry.audio), entry.audio_format)
+            code = self._fernet.decrypt(entry.otp).decode()
+        # Render outside the lock; replays of other OTPs stay I/O only
+        rendered = self.render(code)
+        with self._lock:
+            self.renders += 1
+            if self._entries.get(key) is entry and entry.audio is None:
+                self._used -= entry.size
+                entry.audio, entry.audio_format = self._fernet.encrypt(bytes(rendered.audio)), rendered.audio_format
+                self._used += entry.size
+                self._evict()
+        return ReplayAudio(bytes(rendered.audio), rendered.audio_format)
+
+    def seal(self, otp):
+        """
+        The OTP encrypted with this store's key, for keeping next to its
+        hash in the OTP store so another process can replay it. Only used
+        when OTP_REPLAY_SHARED is on.
+        """
+        return self._fernet.encrypt(otp.encode()).decode('ascii')
+
+    def unseal(self, token):
+        """The OTP in a sealed token, or None if this key cannot open it."""
+        if not token:
+            return None
+        try:
+            return self._fernet.decrypt(token.encode('ascii')).decode()
+        except InvalidToken:
+            return None
+
+    def discard(self, key):
+        """Drop key's entry, e.g. once its OTP is verified."""
+        with self._lock:
+            return self._remove(key)
+
+    def purge_expired(self, now=None):
+        with self._lock:
+            return self._purge(time.time() if now is None else now)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._used,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "renders": self.renders,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "purged": self.purged,
+            }
+
+    def _live(self, key, otp, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= now:
+            self._remove(key)
+            self.purged += 1
+            return None
+        if otp is not None and self._fernet.decrypt(entry.otp).decode() != str(otp):
+            return None
+        return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._used -= entry.size
+        return True
+
+    def _purge(self, now):
+        purged = 0
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires > now:
+                break
+            self._remove(key)
+            purged += 1
+        self.purged += purged
+        return purged
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._used > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_replay_store():
+    """
+    Return the shared replay store, creating it on first use. None when
+    disabled.
+    """
+    global _store
+    if not Config.OTP_REPLAY_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = ReplayAudioStore()
+    return _store
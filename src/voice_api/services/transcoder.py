@@ -0,0 +1,224 @@
+"""
+Transcoding stage for rendered speech.
+Engines write WAV whatever format was asked for; this stage converts the
+render to raw 16-bit PCM, 8 kHz G.711 mu-law for telephony, or a compressed
+format (mp3 through lameenc or ffmpeg, ogg_vorbis through ffmpeg). With
+TRANSCODE_WORKERS set, conversions run in a process pool off the request
+thread. A compressed format with no encoder installed falls back to WAV,
+and the response says so.
+"""
+import io
+import sys
+import time
+import wave
+import array
+import shutil
+import logging
+import warnings
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from config import Config
+from ..utils.custom_exceptions import VoiceSynthesisError
+
+with warnings.catch_warnings():
+    # Deprecated since 3.11 and gone in 3.13; the pure Python paths cover it
+    warnings.simplefilter('ignore', DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:
+        audioop = None
+
+try:
+    import lameenc
+except ImportError:
+    lameenc = None
+
+logger = logging.getLogger(__name__)
+
+FFMPEG = shutil.which('ffmpeg')
+MULAW_RATE = 8000
+# output_format -> (ffmpeg codec, ffmpeg container)
+FFMPEG_CODECS = {'mp3': ('libmp3lame', 'mp3'), 'ogg_vorbis': ('libvorbis', 'ogg')}
+TRANSCODE_FORMATS = ('wav', 'pcm', 'mulaw') + tuple(FFMPEG_CODECS)
+
+class TranscodeError(VoiceSynthesisError):
+    """Raised when audio cannot be converted to the requested format."""
+    pass
+
+def is_wav(audio):
+    return bytes(audio[:4]) == b'RIFF' and bytes(audio[8:12]) == b'WAVE'
+
+def read_wav(audio):
+    """Return (channels, sample rate, 16-bit PCM frames) for WAV bytes."""
+    with wave.open(io.BytesIO(bytes(audio)), 'rb') as wav:
+        channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+    if width != 2:
+        if audioop is None:
+            raise TranscodeError("Only 16-bit WAV can be transcoded without audioop")
+        frames = audioop.lin2lin(frames, width, 2)
+    return channels, rate, frames
+
+def _samples(frames):
+    samples = array.array('h')
+    samples.frombytes(frames)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+def _frames(samples):
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples.tobytes()
+
+def to_mono(frames, channels):
+    if channels == 1:
+        return frames
+    if audioop is not None and channels == 2:
+        return audioop.tomono(frames, 2, 0.5, 0.5)
+    samples = _samples(frames)
+    return _frames(array.array('h', (
+        sum(samples[i:i + channels]) // channels for i in range(0, len(samples), channels)
+    )))
+
+def resample(frames, rate, new_rate):
+    """Resample mono 16-bit PCM from rate to new_rate."""
+    if rate == new_rate:
+        return frames
+    if audioop is not None:
+        return audioop.ratecv(frames, 2, 1, rate, new_rate, None)[0]
+    samples = _samples(frames)
+    count = len(samples) * new_rate // rate
+    step = rate / new_rate
+    out = array.array('h')
+    for i in range(count):
+        position = i * step
+        j = int(position)
+        following = samples[j + 1] if j + 1 < len(samples) else samples[j]
+        out.append(int(samples[j] + (following - samples[j]) * (position - j)))
+    return _frames(out)
+
+def _ulaw(sample):
+    # G.711 mu-law on the 14-bit sample, as audioop does: bias, find the
+    # segment, keep four mantissa bits
+    value = sample >> 2
+    sign = 0x80 if value < 0 else 0
+    value = min(-value if sign else value, 8159) + 33
+    exponent = max(0, value.bit_length() - 6)
+    if exponent > 7:
+        return ~(sign | 0x7F) & 0xFF
+    mantissa = (value >> (exponent + 1)) & 0x0F
+    return ~(sign | (exponent << 4) | mantissa) & 0xFF
+
+def encode_mulaw(frames):
+    """Encode mono 16-bit PCM as 8-bit mu-law."""
+    if audioop is not None:
+        return audioop.lin2ulaw(frames, 2)
+    return bytes(_ulaw(sample) for sample in _samples(frames))
+
+def compressed_encoder(output_format):
+    """Name of the encoder that will produce output_format, or None."""
+    if output_format == 'mp3' and lameenc is not None:
+        return 'lameenc'
+    if output_format in FFMPEG_CODECS and FFMPEG:
+        return 'ffmpeg'
+    return None
+
+def encode_compressed(frames, channels, rate, output_format, bitrate=Config.TRANSCODE_BITRATE_KBPS):
+    encoder = compressed_encoder(output_format)
+    if encoder == 'lameenc':
+        mp3 = lameenc.Encoder()
+        mp3.set_bit_rate(bitrate)
+        mp3.set_in_sample_rate(rate)
+        mp3.set_channels(channels)
+        mp3.set_quality(2)
+        return bytes(mp3.encode(frames) + mp3.flush())
+    if encoder == 'ffmpeg':
+        codec, container = FFMPEG_CODECS[output_format]
+        try:
+            result = subprocess.run(
+                [FFMPEG, '-hide_banner', '-loglevel', 'error', '-f', 's16le', '-ar', str(rate), '-ac', str(channels),
+                 '-i', 'pipe:0', '-c:a', codec, '-b:a', f'{bitrate}k', '-f', container, 'pipe:1'],
+                input=frames, capture_output=True, check=True, timeout=Config.TRANSCODE_TIMEOUT)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise TranscodeError(f"ffmpeg could not encode {output_format}: {e}")
+        return result.stdout
+    raise TranscodeError(f"No encoder installed for {output_format}")
+
+def transcode(audio, output_format):
+    """
+    Convert WAV bytes to output_format. Returns (format, bytes); format is
+    'wav' when a compressed format has no encoder installed.
+    """
+    if output_format == 'wav':
+        return 'wav', bytes(audio)
+    if output_format not in TRANSCODE_FORMATS:
+        raise TranscodeError(f"Unsupported output format '{output_format}'")
+    if output_format in FFMPEG_CODECS and compressed_encoder(output_format) is None:
+        return 'wav', bytes(audio)
+    channels, rate, frames = read_wav(audio)
+    if output_format == 'pcm':
+        return 'pcm', frames
+    if output_format == 'mulaw':
+        return 'mulaw', encode_mulaw(resample(to_mono(frames, channels), rate, MULAW_RATE))
+    return output_format, encode_compressed(frames, channels, rate, output_format)
+
+class Transcoder:
+    def __init__(self, workers=Config.TRANSCODE_WORKERS, timeout=Config.TRANSCODE_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self.counts = {}
+        self.fallbacks = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._warned = set()
+        # spawn, not fork, for the same reason as the TTS workers; a child
+        # process transcodes inline rather than starting a nested pool
+        if workers and multiprocessing.parent_process() is None:
+            self._executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self._executor = None
+
+    def transcode(self, audio, output_format):
+        started = time.perf_counter()
+        if self._executor is None:
+            result = transcode(audio, output_format)
+        else:
+            result = self._executor.submit(transcode, bytes(audio), output_format).result(self.timeout)
+        produced = result[0]
+        with self._lock:
+            self.counts[produced] = self.counts.get(produced, 0) + 1
+            self.seconds += time.perf_counter() - started
+            if produced != output_format:
+                self.fallbacks += 1
+                if output_format not in self._warned:
+                    self._warned.add(output_format)
+                    logger.warning(f"No encoder installed for {output_format}; serving WAV instead")
+        return result
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "transcoded": dict(self.counts),
+                "fallbacks": self.fallbacks,
+                "seconds": self.seconds,
+                "encoders": {name: compressed_encoder(name) for name in FFMPEG_CODECS}
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+
+_transcoder = None
+_transcoder_lock = threading.Lock()
+
+def get_transcoder():
+    """Return the shared transcoder, creating it on first use."""
+    global _transcoder
+    with _transcoder_lock:
+        if _transcoder is None:
+            _transcoder = Transcoder(workers=Config.TRANSCODE_WORKERS)
+    return _transcoder
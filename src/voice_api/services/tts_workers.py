@@ -0,0 +1,177 @@
+"""
+Process pool for text-to-speech.
+Synthesis is CPU-heavy and blocks inside the speech driver, so when
+TTS_WORKERS is set it runs in dedicated worker processes, each owning its
+own engine, instead of in Flask request threads. Jobs wait in a bounded
+queue and are returned as futures; a job that overruns its timeout has its
+worker process killed and replaced.
+"""
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from config import Config
+from ..utils.custom_exceptions import VoiceSynthesisError
+
+class TTSQueueFull(VoiceSynthesisError):
+    """Raised when the TTS job queue is full."""
+    pass
+
+class TTSJobTimeout(VoiceSynthesisError):
+    """Raised when a TTS job runs longer than its timeout."""
+    pass
+
+def _worker_main(conn):
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        func, args, kwargs = job
+        try:
+            conn.send((True, func(*args, **kwargs)))
+        except Exception as e:
+            # Exceptions may not pickle; send the message instead
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+class TTSWorkerPool:
+    def __init__(self, workers=Config.TTS_WORKERS, max_queued=Config.TTS_QUEUE_SIZE,
+                 timeout=Config.TTS_JOB_TIMEOUT, wait_timeout=Config.TTS_WAIT_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self.wait_timeout = wait_timeout
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.restarts = 0
+        # spawn, not fork: the parent runs request threads and speech drivers
+        self._context = multiprocessing.get_context('spawn')
+        self._jobs = queue.Queue(maxsize=max_queued)
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        for _ in range(workers):
+            thread = threading.Thread(target=self._dispatch, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, func, *args, timeout=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) for a worker process. func must be a
+        module-level function. Returns a Future; raises TTSQueueFull.
+        """
+        future = Future()
+        try:
+            self._jobs.put_nowait((future, func, args, kwargs, timeout or self.timeout))
+        except queue.Full:
+            raise TTSQueueFull("Speech synthesis is busy, try again later")
+        return future
+
+    def result(self, future, timeout=None):
+        """
+        Wait for a submitted job, time spent queued included. Raises
+        TTSJobTimeout after wait_timeout seconds.
+        """
+        try:
+            return future.result(timeout or self.wait_timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise TTSJobTimeout(f"Speech synthesis did not finish within {timeout or self.wait_timeout}s")
+
+    def queued(self):
+        return self._jobs.qsize()
+
+    def metrics(self):
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "queued": self.queued(),
+                "completed": self.completed,
+                "failed": self.failed,
+                "timed_out": self.timed_out,
+                "restarts": self.restarts
+            }
+
+    def shutdown(self):
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _spawn(self):
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, conn
+
+    def _restart(self, process, conn):
+        process.kill()
+        process.join()
+        conn.close()
+        self._count('restarts')
+        return self._spawn()
+
+    def _dispatch(self):
+        # Each dispatcher thread owns one worker process
+        process, conn = self._spawn()
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            future, func, args, kwargs, timeout = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                conn.send((func, args, kwargs))
+                if conn.poll(timeout):
+                    ok, value = conn.recv()
+                    if ok:
+                        self._count('completed')
+                        future.set_result(value)
+                    else:
+                        self._count('failed')
+                        future.set_exception(VoiceSynthesisError(value))
+                else:
+                    self._count('timed_out')
+                    process, conn = self._restart(process, conn)
+                    future.set_exception(TTSJobTimeout(f"Speech synthesis timed out after {timeout}s"))
+            except (EOFError, OSError) as e:
+                self._count('failed')
+                process, conn = self._restart(process, conn)
+                future.set_exception(VoiceSynthesisError(f"TTS worker exited: {e}"))
+            except Exception as e:
+                # e.g. a job or result that does not pickle; the pipe is still usable
+                self._count('failed')
+                future.set_exception(VoiceSynthesisError(f"TTS job failed: {e}"))
+        try:
+            conn.send(None)
+        except OSError:
+            pass
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+        conn.close()
+
+_tts_workers = None
+_tts_workers_lock = threading.Lock()
+
+def get_tts_workers():
+    """
+    Return the shared worker pool, or None when TTS_WORKERS is 0 or when
+    called inside a child process (a spawned worker re-imports the app and
+    must not build a pool of its own).
+    """
+    global _tts_workers
+    if not Config.TTS_WORKERS or multiprocessing.parent_process() is not None:
+        return None
+    with _tts_workers_lock:
+        if _tts_workers is None:
+            _tts_workers = TTSWorkerPool(workers=Config.TTS_WORKERS)
+    return _tts_workers
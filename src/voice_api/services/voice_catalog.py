@@ -0,0 +1,149 @@
+"""
+Catalog of the voices the speech engine offers.
+Listing voices means asking the driver, so the list is read once and
+indexed by exact id, name, language and gender; resolving a requested voice
+is then a dictionary lookup instead of a scan of every installed voice.
+refresh() re-reads the driver after voices are installed or removed.
+"""
+import time
+import threading
+from config import Config
+from .engine_pool import get_engine_pool
+
+# Gender spellings used by the different pyttsx3 drivers
+GENDER_ALIASES = {
+    'voicegenderfemale': 'female',
+    'voicegendermale': 'male',
+    'voicegenderneutral': 'neutral'
+}
+
+def load_engine_voices():
+    with get_engine_pool().engine() as engine:
+        return engine.getProperty('voices')
+
+def _language_tags(languages):
+    tags = []
+    for language in languages or []:
+        if isinstance(language, bytes):
+            # espeak prefixes each language with a priority byte
+            language = language[1:].decode('utf-8', 'ignore')
+        language = language.strip().lower().replace('_', '-')
+        if language:
+            tags.append(language)
+    return tags
+
+def _gender(gender):
+    gender = (gender or '').strip().lower()
+    return GENDER_ALIASES.get(gender, gender) or None
+
+def _voice_entry(voice):
+    return {
+        'id': voice.id,
+        'name': voice.name,
+        'languages': _language_tags(getattr(voice, 'languages', None)),
+        'gender': _gender(getattr(voice, 'gender', None)),
+        'age': getattr(voice, 'age', None)
+    }
+
+def _short_id(voice_id):
+    # Last segment of path-like ids: 'gmw/en-US' or a SAPI registry key
+    return voice_id.replace('\\', '/').rstrip('/').rsplit('/', 1)[-1].lower()
+
+class VoiceCatalog:
+    def __init__(self, load=load_engine_voices, default_gender=Config.DEFAULT_VOICE_GENDER):
+        self.load = load
+        self.default_gender = _gender(default_gender)
+        self.loaded_at = None
+        self.error = None
+        self._voices = []
+        self._by_id = {}
+        self._by_name = {}
+        self._by_language = {}
+        self._by_gender = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Re-read the engine's voices and rebuild the indexes."""
+        try:
+            voices = [_voice_entry(voice) for voice in self.load()]
+            error = None
+        except Exception as e:
+            voices, error = [], str(e)
+        by_id, by_name, by_language, by_gender = {}, {}, {}, {}
+        for voice in voices:
+            by_id[voice['id']] = voice
+            # First voice wins for the looser keys
+            by_name.setdefault(voice['name'].lower(), voice)
+            by_name.setdefault(_short_id(voice['id']), voice)
+            for tag in voice['languages']:
+                for key in {tag, tag.split('-')[0]}:
+                    by_language.setdefault(key, []).append(voice)
+            if voice['gender']:
+                by_gender.setdefault(voice['gender'], []).append(voice)
+        with self._lock:
+            self._voices = voices
+            self._by_id, self._by_name = by_id, by_name
+            self._by_language, self._by_gender = by_language, by_gender
+            self.loaded_at = time.time()
+            self.error = error
+        return len(voices)
+
+    def voices(self, language=None, gender=None):
+        with self._lock:
+            if not language:
+                return list(self._by_gender.get(_gender(gender), []) if gender else self._voices)
+            voices = self._by_language.get(language.lower(), [])
+            if gender:
+                voices = [voice for voice in voices if voice['gender'] == _gender(gender)]
+            return list(voices)
+
+    def get(self, voice):
+        """Voice entry for an exact id, a name or a short id; None if unknown."""
+        if not voice:
+            return None
+        with self._lock:
+            return self._by_id.get(voice) or self._by_name.get(voice.lower())
+
+    def resolve(self, voice=None, language=None, gender=None):
+        """
+        Engine voice id for a requested voice, falling back to the first voice
+        matching language and gender (DEFAULT_VOICE_GENDER when not given).
+        None leaves the engine on its own default voice.
+        """
+        entry = self.get(voice)
+        if entry:
+            return entry['id']
+        gender = _gender(gender) or self.default_gender
+        with self._lock:
+            if language:
+                candidates = self._by_language.get(language.lower(), [])
+                for entry in candidates:
+                    if not gender or entry['gender'] == gender:
+                        return entry['id']
+                return candidates[0]['id'] if candidates else None
+            candidates = self._by_gender.get(gender, []) if gender else self._voices
+            return candidates[0]['id'] if candidates else None
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "voices": len(self._voices),
+                "languages": len(self._by_language),
+                "loaded_at": self.loaded_at,
+                "error": self.error
+            }
+
+_voice_catalog = None
+_voice_catalog_lock = threading.Lock()
+
+def get_voice_catalog():
+    """Return the shared catalog, loading it on first use."""
+    global _voice_catalog
+    with _voice_catalog_lock:
+        if _voice_catalog is None:
+            _voice_catalog = VoiceCatalog()
+            _voice_catalog.refresh()
+    return _voice_catalog
+
+def resolve_voice(voice=None, language=None, gender=None):
+    return get_voice_catalog().resolve(voice, language=language, gender=gender)
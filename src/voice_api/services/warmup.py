@@ -0,0 +1,187 @@
+"""
+Startup warm-up.
+Without it the first requests after a restart pay for loading the speech
+driver, enumerating voices and rendering the OTP prompt clips. Warm-up
+runs those steps on a background thread as the app starts: it fills the
+engine pool (and the TTS worker processes), loads the voice catalog,
+renders a probe utterance, renders the clip bank and starts the OTP pool.
+The app's /ready endpoint answers 503 until every step has finished.
+A failed step is retried with backoff, and /ready starts another round
+for steps that still failed, so a transient error does not leave the
+node out of rotation for good.
+"""
+import time
+import logging
+import threading
+import contextlib
+import multiprocessing
+from config import Config
+from ..utils.custom_exceptions import VoiceSynthesisError
+from .engine_pool import get_engine_pool
+from .voice_catalog import get_voice_catalog
+from .tts_workers import get_tts_workers
+from .polly_service import synthesize_speech
+from .clip_bank import get_clip_bank, OTP_PROMPT_PHRASE
+from .otp_pool import get_otp_pool
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+def _warm_worker():
+    # Runs inside a TTS worker process, which has its own pool and catalog
+    with get_engine_pool().engine():
+        pass
+    get_voice_catalog()
+
+def warm_engines():
+    """Create every engine the pool may hold, and start the TTS workers."""
+    pool = get_engine_pool()
+    with contextlib.ExitStack() as stack:
+        for _ in range(pool.size):
+            stack.enter_context(pool.engine())
+    workers = get_tts_workers()
+    if workers:
+        # Roughly one job per worker process; each loads its own driver
+        for future in [workers.submit(_warm_worker) for _ in range(workers.workers)]:
+            workers.result(future)
+
+def warm_voice_catalog():
+    catalog = get_voice_catalog()
+    error = catalog.metrics()["error"]
+    if error:
+        raise VoiceSynthesisError(f"Could not load voices: {error}")
+
+def render_probe():
+    """Synthesize a short utterance end to end."""
+    response = synthesize_speech(Config.WARMUP_PROBE_TEXT, output_format="wav")
+    if "error" in response:
+        raise VoiceSynthesisError(response["error"])
+
+def warm_prompt_caches():
+    """Render the OTP prompt clips and start filling the OTP pool."""
+    if Config.OTP_CLIP_BANK_ENABLED:
+        # The first prompt renders the phrase and all ten digits
+        get_clip_bank().assemble("0", prefix=OTP_PROMPT_PHRASE)
+    get_otp_pool()
+
+# (name, function, step that must have succeeded first)
+DEFAULT_STEPS = (
+    ("engines", warm_engines, None),
+    ("voice_catalog", warm_voice_catalog, None),
+    ("probe", render_probe, "engines"),
+    ("prompt_caches", warm_prompt_caches, "engines"),
+)
+
+class WarmUp:
+    def __init__(self, steps=DEFAULT_STEPS, retries=Config.WARMUP_RETRIES, backoff=Config.WARMUP_RETRY_BACKOFF):
+        self.steps = steps
+        self.retries = retries
+        self.backoff = backoff
+        self.started_at = None
+        self.finished_at = None
+        self._results = {name: {"state": PENDING, "seconds": None, "error": None} for name, _, _ in steps}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+
+    def run(self):
+        """
+        Run every step that has not yet succeeded, in order. A step whose
+        prerequisite failed is skipped; a failing step is retried up to
+        retries times, waiting backoff seconds and doubling each time.
+        """
+        self._done.clear()
+        self.started_at = time.time()
+        self.finished_at = None
+        for name, step, requires in self.steps:
+            if self._results[name]["state"] == DONE:
+                continue
+            if requires and self._results[requires]["state"] != DONE:
+                self._update(name, state=SKIPPED, error=f"{requires} did not warm up")
+                continue
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+                self._update(name, state=RUNNING, error=None)
+                started = time.perf_counter()
+                try:
+                    step()
+                    self._update(name, state=DONE, seconds=round(time.perf_counter() - started, 3))
+                    break
+                except Exception as e:
+                    logger.error(f"Warm-up step {name} failed (attempt {attempt + 1}): {e}")
+                    self._update(name, state=FAILED, error=str(e), seconds=round(time.perf_counter() - started, 3))
+        self.finished_at = time.time()
+        self._done.set()
+        return self.ready
+
+    @property
+    def ready(self):
+        """True once every step has run and succeeded."""
+        with self._lock:
+            return self._done.is_set() and all(result["state"] == DONE for result in self._results.values())
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def status(self):
+        with self._lock:
+            finished = self._done.is_set()
+            failed = any(result["state"] in (FAILED, SKIPPED) for result in self._results.values())
+            return {
+                "status": ("failed" if failed else "ready") if finished else "warming",
+                "ready": finished and not failed,
+                "steps": {name: dict(result) for name, result in self._results.items()},
+                "seconds": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None
+            }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, daemon=True)
+                self._thread.start()
+
+    def retry(self):
+        """
+        Start another round in the background if the last one finished with
+        failed or skipped steps. Returns True if a round was started.
+        """
+        with self._lock:
+            if not self._done.is_set() or (self._thread is not None and self._thread.is_alive()):
+                return False
+            if all(result["state"] == DONE for result in self._results.values()):
+                return False
+            self._done.clear()
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+            return True
+
+    def _update(self, name, **changes):
+        with self._lock:
+            self._results[name].update(changes)
+
+_warmup = None
+_warmup_lock = threading.Lock()
+
+def get_warmup():
+    """The app's warm-up, or None when WARMUP_ENABLED is off."""
+    return _warmup
+
+def start_warmup():
+    """
+    Start warming up in the background, once per process. Returns the
+    WarmUp, or None when disabled or called inside a worker process.
+    """
+    global _warmup
+    if not Config.WARMUP_ENABLED or multiprocessing.parent_process() is not None:
+        return None
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = WarmUp()
+            _warmup.start()
+    return _warmup
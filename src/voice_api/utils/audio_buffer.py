@@ -0,0 +1,94 @@
+"""
+RAM-backed render targets for speech engines.
+Engines such as pyttsx3 can only write audio to a path. A RenderTarget
+hands them one backed by memory (a memfd on Linux, else a file in
+/dev/shm, else an ordinary temp file) and the finished audio is mapped
+rather than read back, so callers get a memoryview or a file object
+without another copy or any filesystem churn.
+"""
+import io
+import os
+import mmap
+import tempfile
+
+SHM_DIR = '/dev/shm'
+
+class RenderedAudio:
+    """Finished audio held in a memory mapping."""
+    def __init__(self, fd):
+        size = os.fstat(fd).st_size
+        self._map = mmap.mmap(fd, size, access=mmap.ACCESS_READ) if size else None
+    def view(self):
+        """Zero-copy memoryview over the audio; keeps the mapping alive."""
+        return memoryview(self._map) if self._map is not None else memoryview(b'')
+    def open(self):
+        """New file object reading the audio from the start."""
+        return _ViewReader(self.view())
+    def __len__(self):
+        return len(self._map) if self._map is not None else 0
+
+class _ViewReader(io.RawIOBase):
+    def __init__(self, view):
+        self._view = view
+        self._pos = 0
+    def readable(self):
+        return True
+    def seekable(self):
+        return True
+    def tell(self):
+        return self._pos
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+    def readinto(self, buffer):
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+class RenderTarget:
+    """
+    Path an engine can write to, backed by RAM where the platform allows.
+    Use as a context manager; finish() maps what was written.
+    """
+    def __init__(self, suffix='.wav'):
+        self.fd = None
+        self.path = None
+        self.kind = 'memfd'
+        self._unlink = False
+        if hasattr(os, 'memfd_create'):
+            try:
+                fd = os.memfd_create('tts-audio', os.MFD_CLOEXEC)
+            except OSError:
+                fd = None
+            if fd is not None and os.path.exists(f'/proc/self/fd/{fd}'):
+                self.fd, self.path = fd, f'/proc/self/fd/{fd}'
+            elif fd is not None:
+                os.close(fd)
+        if self.fd is None:
+            directory = SHM_DIR if os.path.isdir(SHM_DIR) else None
+            self.fd, self.path = tempfile.mkstemp(suffix=suffix, dir=directory)
+            self.kind = 'shm' if directory else 'file'
+            self._unlink = True
+    def finish(self):
+        """Map the written audio; the target can be closed afterwards."""
+        if self._unlink:
+            # The engine may have replaced the file, so reopen by path
+            with open(self.path, 'rb') as f:
+                return RenderedAudio(f.fileno())
+        return RenderedAudio(self.fd)
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        if self._unlink:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self._unlink = False
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
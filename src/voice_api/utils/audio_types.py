@@ -0,0 +1,22 @@
+"""
+Audio content types shared by the routes and blueprints that send audio.
+"""
+
+AUDIO_MIME_TYPES = {
+    'wav': 'audio/wav',
+    'mp3': 'audio/mpeg',
+    'ogg_vorbis': 'audio/ogg',
+    'pcm': 'audio/L16',
+    'mulaw': 'audio/basic'
+}
+
+def audio_mime_type(audio):
+    """Sniff a cached render's type from its leading bytes."""
+    head = bytes(audio[:4])
+    if head == b'RIFF':
+        return AUDIO_MIME_TYPES['wav']
+    if head == b'OggS':
+        return AUDIO_MIME_TYPES['ogg_vorbis']
+    if head[:3] == b'ID3' or head[:2] in (b'\xff\xfb', b'\xff\xf3', b'\xff\xf2'):
+        return AUDIO_MIME_TYPES['mp3']
+    return 'application/octet-stream'
@@ -0,0 +1,111 @@
+"""
+Durable writer for JSON-backed stores.
+Mutations from concurrent threads are queued and applied together in one
+group commit: a single read, one write to a temp file, fsync and an atomic
+rename, all under an exclusive file lock so other processes sharing the
+file never lose updates.
+"""
+import os
+import json
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+class _PendingMutation:
+    def __init__(self, mutation):
+        self.mutation = mutation
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+class GroupCommitWriter:
+    def __init__(self, path, indent=2, prepare=None, on_commit=None):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.indent = indent
+        self.prepare = prepare
+        self.on_commit = on_commit
+        self.commits = 0
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+
+    def _file_lock(self, exclusive):
+        lock_file = open(self.lock_path, 'a')
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return lock_file
+
+    def _read_unlocked(self):
+        if not os.path.exists(self.path):
+            data = {}
+        else:
+            with open(self.path, 'r') as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    data = {}
+        return self.prepare(data) if self.prepare else data
+
+    def read(self):
+        """Read the current contents under a shared lock."""
+        lock_file = self._file_lock(exclusive=False)
+        try:
+            return self._read_unlocked()
+        finally:
+            lock_file.close()
+
+    def submit(self, mutation):
+        """
+        Queue mutation(data) and block until the group commit that applied it
+        is on disk. Returns whatever the mutation returned.
+        """
+        pending = _PendingMutation(mutation)
+        with self._pending_lock:
+            self._pending.append(pending)
+        # Whoever holds the commit lock flushes everything queued so far;
+        # a waiter whose mutation was flushed meanwhile has nothing left to do.
+        with self._commit_lock:
+            if not pending.done.is_set():
+                self._flush()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _flush(self):
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            lock_file = self._file_lock(exclusive=True)
+            try:
+                data = self._read_unlocked()
+                for pending in batch:
+                    try:
+                        pending.result = pending.mutation(data)
+                    except Exception as e:
+                        pending.error = e
+                self._write_unlocked(data)
+            finally:
+                lock_file.close()
+            self.commits += 1
+            if self.on_commit:
+                self.on_commit(data)
+        except (IOError, OSError) as e:
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+    def _write_unlocked(self, data):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=self.indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -1,15 +1,25 @@
-import json
-import os
 import secrets
 import datetime
-import pyttsx3
+import hmac
 import hashlib
 import logging
 from config import Config
+from voice_api.plugins.otp_store import resolve_otp_store, start_expiry_reaper
+from voice_api.services.engine_pool import get_engine_pool
+from voice_api.services.voice_catalog import resolve_voice
+from voice_api.services.tts_workers import get_tts_workers
+from voice_api.services.replay_store import get_replay_store
+from voice_api.services.otp_pool import render_otp_audio
+from voice_api.utils.custom_exceptions import VoiceSynthesisError
 
 logger = logging.getLogger(__name__)
 OTP_STORE_FILE = Config.OTP_STORE_FILE
 OTP_EXPIRY_MINUTES = Config.OTP_EXPIRY_MINUTES
+MAX_OTP_ATTEMPTS = Config.MAX_OTP_ATTEMPTS
+OTP_STORE_BACKEND = Config.OTP_STORE_BACKEND
+
+# Purge expired OTPs in the background so the store stays bounded
+start_expiry_reaper(OTP_STORE_BACKEND, interval=Config.OTP_REAPER_INTERVAL)
 
 
 def generate_otp():
@@ -20,54 +30,56 @@ def generate_otp():
     """
     return str(secrets.randbelow(900000) + 100000)
 
-def store_otp(user_id, otp):
+def _get_store():
+    return resolve_otp_store(OTP_STORE_BACKEND)
+
+def store_otp(user_id, otp, audio=None, audio_format=None):
     """
-    Stores the OTP for a user with a 5-minute expiration.
+    Stores the OTP for a user with a 5-minute expiration. When replays
+    are enabled the prompt audio is kept for them, rendered here unless
+    the caller already has it, so a replay never synthesizes.
     """
     try:
-        if not os.path.exists(OTP_STORE_FILE):
-            with open(OTP_STORE_FILE, 'w') as f:
-                json.dump({}, f)
-
-        with open(OTP_STORE_FILE, 'r+') as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                data = {}
-            
-            expiration_time = datetime.datetime.now() + datetime.timedelta(minutes=OTP_EXPIRY_MINUTES)
-            hashed_otp = hashlib.sha256(otp.encode()).hexdigest()
-            
-            data[user_id] = {
-                "otp": hashed_otp,
-                "expires_at": expiration_time.isoformat()
-            }
-            
-            f.seek(0)
-            json.dump(data, f, indent=2)
-            f.truncate()
-            return user_id
+        expiration_time = datetime.datetime.now() + datetime.timedelta(minutes=OTP_EXPIRY_MINUTES)
+        hashed_otp = hashlib.sha256(otp.encode()).hexdigest()
+        record = {
+            "otp": hashed_otp,
+            "expires_at": expiration_time.isoformat()
+        }
+        replay = get_replay_store()
+        if replay and audio is None:
+            audio, audio_format = render_replay_audio(otp)
+        if replay and Config.OTP_REPLAY_SHARED:
+            # Opt-in sealed copy for replays from a process that does not hold it
+            record["replay"] = replay.seal(otp)
+        _get_store().put(user_id, record)
+        if replay:
+            replay.put(user_id, otp, expiration_time, audio, audio_format)
+        return user_id
     except (IOError, OSError) as e:
         from voice_api.utils.custom_exceptions import OTPStorageError
         raise OTPStorageError(f"Failed to store OTP: {str(e)}")
 
+def render_replay_audio(otp):
+    """
+    (audio, audio_format) of the OTP prompt for the replay store, or
+    (None, None) if it cannot be rendered; the send still goes ahead.
+    """
+    try:
+        rendered = render_otp_audio(otp)
+    except VoiceSynthesisError as e:
+        logger.warning(f"Could not render OTP prompt for replays: {e}")
+        return None, None
+    return rendered.audio, rendered.audio_format
+
 def get_stored_otp(user_id, otp):
     """
     Verify the OTP for a user against the stored hash.
     """
-    if not os.path.exists(OTP_STORE_FILE):
-        return None
-
-    with open(OTP_STORE_FILE, 'r') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            return None
-    
-    if user_id not in data:
+    stored_data = _get_store().get(user_id)
+    if not stored_data:
         return None
     
-    stored_data = data[user_id]
     expires_at = datetime.datetime.fromisoformat(stored_data['expires_at'])
     
     if datetime.datetime.now() >= expires_at:
@@ -79,23 +91,100 @@ def get_stored_otp(user_id, otp):
     
     return None
 
+def verify_otps(pairs):
+    """
+    Verify many (user_id, otp) pairs against one snapshot of the store.
+    Failed attempts are counted and verified OTPs consumed in a single write.
+    Returns:
+        list: One status per pair: 'verified', 'invalid', 'expired',
+        'locked' or 'not_found'.
+    """
+    def mutation(records):
+        now = datetime.datetime.now()
+        statuses = []
+        for user_id, otp in pairs:
+            stored_data = records.get(user_id)
+            if not stored_data:
+                statuses.append('not_found')
+            elif now >= datetime.datetime.fromisoformat(stored_data['expires_at']):
+                records[user_id] = None
+                statuses.append('expired')
+            elif stored_data.get('attempts', 0) >= MAX_OTP_ATTEMPTS:
+                statuses.append('locked')
+            elif hmac.compare_digest(hashlib.sha256(otp.encode()).hexdigest(), stored_data['otp']):
+                # Consume the OTP so it cannot be verified twice
+                records[user_id] = None
+                statuses.append('verified')
+            else:
+                stored_data['attempts'] = stored_data.get('attempts', 0) + 1
+                statuses.append('invalid')
+        return statuses
+
+    try:
+        statuses = _get_store().transact({user_id for user_id, _ in pairs}, mutation)
+    except (IOError, OSError) as e:
+        from voice_api.utils.custom_exceptions import OTPStorageError
+        raise OTPStorageError(f"Failed to verify OTPs: {str(e)}")
+    for (user_id, _), status in zip(pairs, statuses):
+        if status in ('verified', 'expired'):
+            discard_otp_audio(user_id)
+    return statuses
+
+def replay_otp_audio(user_id):
+    """
+    The spoken prompt for a user's live OTP as ReplayAudio, or None. The
+    audio stored when the OTP was sent is decrypted, never re-rendered.
+    Only with OTP_REPLAY_SHARED, after a restart, on another node or once
+    evicted, the code is unsealed from the OTP store record (which needs
+    the same OTP_REPLAY_KEY) and rendered once on this node.
+    """
+    replay = get_replay_store()
+    if not replay:
+        return None
+    replayed = replay.replay(user_id, render=False)
+    if replayed is None and Config.OTP_REPLAY_SHARED:
+        record = _get_store().get(user_id)
+        otp = replay.unseal(record.get("replay")) if record else None
+        if otp is None or datetime.datetime.fromisoformat(record["expires_at"]) <= datetime.datetime.now():
+            return None
+        replay.put(user_id, otp, record["expires_at"])
+        replayed = replay.replay(user_id, otp)
+    return replayed
+
+def discard_otp_audio(user_id):
+    """Drop a user's replay audio once the OTP is used up."""
+    replay = get_replay_store()
+    if replay:
+        replay.discard(user_id)
+
 def speak_otp(otp):
     """
-    Speaks the OTP aloud using configurable settings.
+    Speaks the OTP aloud using configurable settings, in a TTS worker
+    process when TTS_WORKERS is set.
+    Returns:
+        bool: True if the OTP was spoken, False if the fallback was used.
+    Raises:
+        TTSQueueFull: The TTS workers have no room for another job.
+        VoiceSynthesisError: The worker failed or timed out.
     """
+    workers = get_tts_workers()
+    if not workers:
+        return _speak_otp_in_process(otp)
+    return workers.result(workers.submit(_speak_otp_in_process, otp))
+
+def _speak_otp_in_process(otp):
     try:
-        engine = pyttsx3.init()
-        
-        # Set properties from configuration
-        engine.setProperty('rate', Config.DEFAULT_VOICE_RATE)
-        engine.setProperty('volume', Config.DEFAULT_VOICE_VOLUME)
-        
-        # Log voice output
-        logger.info(f"Speaking OTP for user")
-        
-        engine.say(f"Your one time password is {', '.join(list(otp))}")
-        engine.runAndWait()
+        # Pooled engines come reset to the configured rate, volume and voice
+        with get_engine_pool().engine(rate=Config.DEFAULT_VOICE_RATE, volume=Config.DEFAULT_VOICE_VOLUME,
+                                      voice=resolve_voice()) as engine:
+            # Log voice output
+            logger.info(f"Speaking OTP for user")
+            
+            engine.say(f"Your one time password is {', '.join(list(otp))}")
+            engine.runAndWait()
+        return True
     except Exception as e:
         logger.error(f"Error speaking OTP: {str(e)}")
         # Fallback to print if TTS fails
-        print(f"[TTS Fallback] Your OTP is: {', '.join(list(otp))}")
\ No newline at end of file
+        print(f"[TTS Fallback] Your OTP is: {', '.join(list(otp))}")
+        return False
\ No newline at end of file
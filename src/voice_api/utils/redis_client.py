@@ -0,0 +1,35 @@
+"""
+Shared Redis connection pools for the Redis-backed stores.
+The redis package is optional; stores that need it check redis_available().
+"""
+import os
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 50))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def redis_available():
+    return redis is not None
+
+def get_redis_client(url=None):
+    """
+    Return a client backed by one connection pool per URL, so every store
+    and request thread shares the same bounded set of sockets.
+    """
+    if redis is None:
+        raise ImportError("The 'redis' package is required for the Redis backend.")
+    url = url or REDIS_URL
+    with _pools_lock:
+        pool = _pools.get(url)
+        if pool is None:
+            pool = redis.ConnectionPool.from_url(url, max_connections=REDIS_MAX_CONNECTIONS)
+            _pools[url] = pool
+    return redis.Redis(connection_pool=pool)
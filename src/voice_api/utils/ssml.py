@@ -0,0 +1,221 @@
+"""
+SSML parsing into speech plans.
+One tokenizer pass turns SSML (or plain text) into a plan: a tuple of
+segments, each with its text, relative rate and volume, the pause before
+it and its emphasis level. Engines apply those per segment instead of
+speaking markup. Unknown tags are dropped and their content kept; <sub>
+speaks its alias. Plans are immutable, and markup is memoized by source so
+a prompt template that repeats is only parsed once. Plain text and sources
+carrying a code (a run of four or more digits, as in an OTP prompt) are
+parsed every time instead: they rarely repeat, and the cache would keep
+spoken codes in memory. The cache itself refuses such sources, whichever
+way it is reached.
+"""
+import os
+import re
+import html
+import threading
+import collections
+
+SSML_PLAN_CACHE_SIZE = int(os.environ.get('SSML_PLAN_CACHE_SIZE', 1024))
+
+SpeechSegment = collections.namedtuple('SpeechSegment', ['text', 'rate', 'volume', 'pause_ms', 'emphasis'])
+
+RATE_KEYWORDS = {'x-slow': 0.5, 'slow': 0.75, 'medium': 1.0, 'default': 1.0, 'fast': 1.25, 'x-fast': 1.5}
+VOLUME_KEYWORDS = {'silent': 0.0, 'x-soft': 0.4, 'soft': 0.6, 'medium': 1.0, 'default': 1.0, 'loud': 1.2, 'x-loud': 1.4}
+BREAK_STRENGTHS = {'none': 0, 'x-weak': 100, 'weak': 250, 'medium': 400, 'strong': 750, 'x-strong': 1200}
+# (rate, volume) multipliers standing in for emphasis, which engines lack
+EMPHASIS_PROSODY = {'strong': (0.85, 1.25), 'moderate': (0.92, 1.12), 'none': (1.0, 1.0), 'reduced': (1.1, 0.8)}
+
+TOKEN = re.compile(r'''
+    (?P<skip><!--.*?-->|<\?.*?\?>|<![^>]*>)
+  | <(?P<close>/)?(?P<name>[A-Za-z][\w:.-]*)
+     (?P<attrs>(?:\s+[\w:.-]+\s*=\s*(?:"[^"]*"|'[^']*'))*)\s*(?P<empty>/)?>
+  | (?P<text>[^<]+|<)
+''', re.S | re.X)
+ATTR = re.compile(r'''([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+DURATION = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s)\s*$', re.I)
+PERCENT = re.compile(r'^\s*([+-]?\d+(?:\.\d+)?)\s*%\s*$')
+CODE = re.compile(r'\d{4,}')
+DECIBELS = re.compile(r'^\s*([+-]?\d+(?:\.\d+)?)\s*dB\s*$', re.I)
+
+def _attrs(raw):
+    return {m.group(1).lower(): html.unescape(m.group(2) if m.group(2) is not None else m.group(3))
+            for m in ATTR.finditer(raw or '')}
+
+def _rate_factor(value):
+    if value is None:
+        return 1.0
+    value = value.strip().lower()
+    if value in RATE_KEYWORDS:
+        return RATE_KEYWORDS[value]
+    match = PERCENT.match(value)
+    if match:
+        # "+10%" is relative to the current rate, "80%" is a fraction of it
+        number = float(match.group(1))
+        return max(0.0, 1.0 + number / 100 if value[0] in '+-' else number / 100)
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return 1.0
+
+def _volume_factor(value):
+    if value is None:
+        return 1.0
+    value = value.strip().lower()
+    if value in VOLUME_KEYWORDS:
+        return VOLUME_KEYWORDS[value]
+    match = DECIBELS.match(value)
+    if match:
+        return 10 ** (float(match.group(1)) / 20)
+    match = PERCENT.match(value)
+    if match:
+        number = float(match.group(1))
+        return max(0.0, 1.0 + number / 100 if value[0] in '+-' else number / 100)
+    return 1.0
+
+def _break_ms(attrs):
+    match = DURATION.match(attrs.get('time', ''))
+    if match:
+        amount = float(match.group(1))
+        return int(amount * 1000 if match.group(2).lower() == 's' else amount)
+    return BREAK_STRENGTHS.get(attrs.get('strength', 'medium').lower(), BREAK_STRENGTHS['medium'])
+
+def _collapse(text):
+    return ' '.join(text.split())
+
+class _PlanBuilder:
+    def __init__(self):
+        # (tag, rate, volume, emphasis) for each open prosody-bearing tag
+        self.stack = [(None, 1.0, 1.0, None)]
+        self.segments = []
+        self.text = []
+        self.text_props = None
+        self.pause = 0
+        self.skip_until = None
+
+    def props(self):
+        _, rate, volume, emphasis = self.stack[-1]
+        return rate, volume, emphasis
+
+    def add_text(self, text):
+        props = self.props()
+        if self.text and props != self.text_props:
+            if _collapse(''.join(self.text)):
+                self.flush()
+            else:
+                # Only whitespace so far; it belongs to no segment
+                self.text = []
+        if not self.text:
+            self.text_props = props
+        self.text.append(text)
+
+    def add_pause(self, ms):
+        self.flush()
+        self.pause += ms
+
+    def flush(self):
+        text = _collapse(''.join(self.text))
+        self.text = []
+        if text and self.segments and not self.pause and not any(c.isalnum() for c in text):
+            # Trailing punctuation outside a tag is not worth its own render
+            last = self.segments[-1]
+            self.segments[-1] = last._replace(text=last.text + text)
+        elif text:
+            rate, volume, emphasis = self.text_props
+            self.segments.append(SpeechSegment(text, rate, volume, self.pause, emphasis))
+            self.pause = 0
+
+    def open(self, name, attrs):
+        _, rate, volume, emphasis = self.stack[-1]
+        if name == 'prosody':
+            self.stack.append((name, rate * _rate_factor(attrs.get('rate')),
+                               volume * _volume_factor(attrs.get('volume')), emphasis))
+        elif name == 'emphasis':
+            self.stack.append((name, rate, volume, attrs.get('level', 'moderate').lower()))
+
+    def close(self, name):
+        # Tolerate unbalanced markup: close back to the matching tag if open
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth][0] == name:
+                del self.stack[depth:]
+                break
+
+    def tag(self, name, attrs, closing, empty):
+        if self.skip_until:
+            if closing and name == self.skip_until:
+                self.skip_until = None
+            return
+        if name == 'break':
+            if not closing:
+                self.add_pause(_break_ms(attrs))
+        elif name == 'sub':
+            if not closing and 'alias' in attrs:
+                self.add_text(' ' + attrs['alias'] + ' ')
+                if not empty:
+                    self.skip_until = 'sub'
+        elif name in ('p', 's', 'speak'):
+            # Sentence and paragraph edges separate words
+            self.add_text(' ')
+        elif name in ('prosody', 'emphasis'):
+            if closing:
+                self.close(name)
+            elif not empty:
+                self.open(name, attrs)
+
+    def finish(self):
+        self.flush()
+        if self.pause or not self.segments:
+            # A trailing break, or nothing to say at all
+            self.segments.append(SpeechSegment('', 1.0, 1.0, self.pause, None))
+        return tuple(self.segments)
+
+def parse_ssml(source):
+    """Parse SSML or plain text into a speech plan (a tuple of SpeechSegment)."""
+    if '<' not in source and '&' not in source:
+        return (SpeechSegment(_collapse(source), 1.0, 1.0, 0, None),)
+    return _parse_markup_cached(source)
+
+_plan_cache = collections.OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+def _parse_markup_cached(source):
+    """
+    _parse_markup memoized by source, least recently used first out. A
+    source carrying a code is parsed but never becomes a cache key.
+    """
+    if CODE.search(source) or SSML_PLAN_CACHE_SIZE <= 0:
+        return _parse_markup(source)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(source)
+        if plan is not None:
+            _plan_cache.move_to_end(source)
+            return plan
+    plan = _parse_markup(source)
+    with _plan_cache_lock:
+        plan = _plan_cache.setdefault(source, plan)
+        while len(_plan_cache) > SSML_PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+def _parse_markup(source):
+    builder = _PlanBuilder()
+    for match in TOKEN.finditer(source):
+        if match.group('skip'):
+            continue
+        if match.group('name'):
+            builder.tag(match.group('name').lower(), _attrs(match.group('attrs')),
+                        bool(match.group('close')), bool(match.group('empty')))
+        elif not builder.skip_until:
+            builder.add_text(html.unescape(match.group('text')))
+    return builder.finish()
+
+def is_plain(plan):
+    """True for a single segment with no prosody, pause or emphasis."""
+    return len(plan) == 1 and plan[0][1:] == (1.0, 1.0, 0, None)
+
+def segment_prosody(segment, base_rate, base_volume):
+    """Absolute (rate, volume) engine properties for a segment."""
+    rate, volume = EMPHASIS_PROSODY.get(segment.emphasis, (1.0, 1.0))
+    return (max(1, int(round(base_rate * segment.rate * rate))),
+            max(0.0, min(1.0, base_volume * segment.volume * volume)))
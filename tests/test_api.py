@@ -2,6 +2,7 @@ import unittest
 import os
 import sys
 from datetime import datetime
+from unittest.mock import patch
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app import app
 from src.voice_api.plugins import analytics
@@ -47,6 +48,57 @@ class TestVoiceAPI(unittest.TestCase):
         resp = self.client.post('/api/otp/send', json={})
         self.assertEqual(resp.status_code, 400)
 
+    @patch('blueprints.otp.queue_speak_otp')
+    def test_send_otp_batch(self, mock_queue_speak):
+        user_ids = ['batch_user1', 'batch_user2', 'batch_user3']
+        resp = self.client.post('/api/otp/send/batch', json={'user_ids': user_ids + ['batch_user1', '']})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.get_json()['results']
+        queued = [r for r in results if r['status'] == 'queued']
+        self.assertEqual(sorted(r['user_id'] for r in queued), user_ids)
+        self.assertEqual(len([r for r in results if r['status'] == 'error']), 2)
+        self.assertEqual(mock_queue_speak.call_count, 3)
+
+        verify_resp = self.client.post('/calls/otp/verify', json={
+            'user_id': queued[0]['user_id'],
+            'otp': queued[0]['otp']
+        })
+        self.assertEqual(verify_resp.status_code, 200)
+
+    @patch('blueprints.otp.queue_speak_otp')
+    def test_send_otp_batch_keeps_input_order(self, mock_queue_speak):
+        resp = self.client.post('/api/otp/send/batch', json={'user_ids': ['order_a', '', 'order_b', 'order_a']})
+        results = resp.get_json()['results']
+        self.assertEqual([r['user_id'] for r in results], ['order_a', '', 'order_b', 'order_a'])
+        self.assertEqual([r['status'] for r in results], ['queued', 'error', 'queued', 'error'])
+
+    def test_send_otp_batch_queue_full(self):
+        from utils.otp_logic import DeliveryQueueFull
+        with patch('blueprints.otp.queue_speak_otp', side_effect=[None, DeliveryQueueFull('Voice delivery queue is full')]):
+            resp = self.client.post('/api/otp/send/batch', json={'user_ids': ['full_a', 'full_b']})
+        results = resp.get_json()['results']
+        self.assertEqual([r['status'] for r in results], ['queued', 'error'])
+        self.assertEqual(results[1]['message'], 'Voice delivery queue is full')
+
+    def test_verify_consumes_otp_once_under_concurrency(self):
+        import threading
+        from utils.otp_logic import store_otp, consume_otp
+        store_otp('race_user', '314159')
+        self.assertFalse(consume_otp('race_user', '271828'))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(consume_otp('race_user', '314159'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 1)
+        resp = self.client.post('/calls/otp/verify', json={'user_id': 'race_user', 'otp': '314159'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_send_otp_batch_requires_user_ids(self):
+        resp = self.client.post('/api/otp/send/batch', json={'user_ids': []})
+        self.assertEqual(resp.status_code, 400)
+
     def test_replay_otp_voice_placeholder(self):
         user_id = 'user123'
         resp = self.client.post('/calls/otp/replay', json={'user_id': user_id})
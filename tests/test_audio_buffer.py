@@ -0,0 +1,62 @@
+import unittest
+import io
+import os
+import sys
+import wave
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.utils import audio_buffer
+
+def write_wav(path, frames=b'\x01\x00\x02\x00' * 100):
+    # Engines write by path, as pyttsx3's save_to_file does
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(frames)
+
+class RenderTargetContract:
+    def test_render_view_and_stream(self):
+        with audio_buffer.RenderTarget() as target:
+            write_wav(target.path)
+            audio = target.finish()
+        view = audio.view()
+        self.assertIsInstance(view, memoryview)
+        self.assertEqual(bytes(view[:4]), b'RIFF')
+        with wave.open(audio.open(), 'rb') as wav:
+            self.assertEqual(wav.getnframes(), 200)
+        reader = audio.open()
+        self.assertEqual(reader.read(4), b'RIFF')
+        reader.seek(-4, io.SEEK_END)
+        self.assertEqual(reader.read(), b'\x01\x00\x02\x00')
+        self.assertEqual(len(audio), len(view))
+
+    def test_nothing_left_behind(self):
+        with audio_buffer.RenderTarget() as target:
+            write_wav(target.path)
+            path, kind = target.path, target.kind
+        if kind != 'memfd':
+            self.assertFalse(os.path.exists(path))
+
+    def test_empty_render(self):
+        with audio_buffer.RenderTarget() as target:
+            self.assertEqual(bytes(target.finish().view()), b'')
+
+class TestRenderTarget(RenderTargetContract, unittest.TestCase):
+    def test_prefers_memfd(self):
+        with audio_buffer.RenderTarget() as target:
+            if hasattr(os, 'memfd_create'):
+                self.assertEqual(target.kind, 'memfd')
+
+class TestRenderTargetWithoutMemfd(RenderTargetContract, unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(audio_buffer.os, 'memfd_create', create=True, side_effect=OSError)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_falls_back_to_shm(self):
+        with audio_buffer.RenderTarget() as target:
+            self.assertEqual(target.kind, 'shm' if os.path.isdir('/dev/shm') else 'file')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import audio_cache, polly_service
+
+class TestAudioCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmpdir.name, 'audio_cache')
+        self.cache = audio_cache.AudioCache(memory_bytes=10, cache_dir=self.cache_dir, disk_bytes=20)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key_depends_on_every_setting(self):
+        base = audio_cache.audio_cache_key('hello', 'v1', 150, 1.0, 'mp3', 'pyttsx3')
+        self.assertEqual(base, audio_cache.audio_cache_key('hello', 'v1', 150, 1.0, 'mp3', 'pyttsx3'))
+        for changed in [('bye', 'v1', 150, 1.0, 'mp3'), ('hello', 'v2', 150, 1.0, 'mp3'),
+                        ('hello', 'v1', 120, 1.0, 'mp3'), ('hello', 'v1', 150, 0.5, 'mp3'),
+                        ('hello', 'v1', 150, 1.0, 'wav')]:
+            self.assertNotEqual(base, audio_cache.audio_cache_key(*changed, module_name='pyttsx3'))
+
+    def test_memory_lru_eviction(self):
+        self.cache.put('a', b'aaaa')
+        self.cache.put('b', b'bbbb')
+        self.cache.get('a')
+        self.cache.put('c', b'cccc')
+        metrics = self.cache.metrics()
+        self.assertEqual(metrics['memory_entries'], 2)
+        self.assertEqual(metrics['memory_bytes'], 8)
+        # b was least recently used; it is still served from disk
+        self.assertEqual(self.cache.get('b'), b'bbbb')
+        self.assertEqual(self.cache.metrics()['disk_hits'], 1)
+
+    def test_disk_tier_survives_restart_and_respects_budget(self):
+        for key in 'abcdef':
+            self.cache.put(key, key.encode() * 5)
+        self.assertLessEqual(self.cache.metrics()['disk_bytes'], 20)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 4)
+        reopened = audio_cache.AudioCache(memory_bytes=10, cache_dir=self.cache_dir, disk_bytes=20)
+        self.assertEqual(reopened.get('f'), b'fffff')
+        self.assertIsNone(reopened.get('a'))
+
+    def test_metrics(self):
+        self.cache.put('a', b'aaaa')
+        self.cache.get('a')
+        self.cache.get('a')
+        self.cache.get('missing')
+        metrics = self.cache.metrics()
+        self.assertEqual((metrics['hits'], metrics['misses']), (2, 1))
+        self.assertEqual(metrics['bytes_saved'], 8)
+        self.assertAlmostEqual(metrics['hit_rate'], 2 / 3)
+
+class CountingVoiceModule(polly_service.VoiceModuleBase):
+    def __init__(self):
+        self.calls = 0
+    def synthesize(self, text, voice_id=None, output_format="mp3", rate=None, volume=None, ssml=None):
+        self.calls += 1
+        return {"OutputFormat": output_format, "AudioStream": f"{text}:{rate}".encode()}
+
+class TestSynthesizeSpeechCache(unittest.TestCase):
+    def setUp(self):
+        self.module = CountingVoiceModule()
+        polly_service.register_voice_module('counting', self.module)
+        patcher = patch.object(polly_service, 'get_audio_cache',
+                               return_value=audio_cache.AudioCache(memory_bytes=1024, cache_dir=None))
+        self.cache = patcher.start()()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        del polly_service.VOICE_MODULES['counting']
+
+    def test_repeated_prompt_is_synthesized_once(self):
+        first = polly_service.synthesize_speech('Welcome back', module_name='counting')
+        second = polly_service.synthesize_speech('Welcome back', module_name='counting')
+        self.assertEqual(first, second)
+        self.assertEqual(self.module.calls, 1)
+        polly_service.synthesize_speech('Welcome back', module_name='counting', rate=120)
+        self.assertEqual(self.module.calls, 2)
+        self.assertEqual(self.cache.metrics()['bytes_saved'], len(first['AudioStream']))
+
+    def test_uncached_text_is_never_stored(self):
+        for _ in range(2):
+            polly_service.synthesize_speech('Your O T P is 123456', module_name='counting', use_cache=False)
+        self.assertEqual(self.module.calls, 2)
+        self.assertEqual(self.cache.metrics()['memory_entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
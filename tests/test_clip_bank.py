@@ -0,0 +1,82 @@
+import unittest
+import os
+import io
+import sys
+import wave
+import math
+import array
+import time
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import clip_bank
+
+FRAMERATE = 8000
+
+def tone(text, voice=None, rate=None, volume=None):
+    """Fake renderer: 50ms of silence, a tone whose length depends on text, then silence."""
+    body = [int(8000 * math.sin(i / 5)) or 1000 for i in range(40 * len(text))]
+    samples = array.array('h', [0] * 400 + body + [0] * 400)
+    return 1, FRAMERATE, samples.tobytes()
+
+def frames(wav_bytes):
+    with wave.open(io.BytesIO(wav_bytes)) as wav:
+        return wav.getnchannels(), wav.getframerate(), wav.getnframes()
+
+class ClipBankContract:
+    def setUp(self):
+        self.calls = []
+        def render(text, **settings):
+            self.calls.append((text, settings.get('rate')))
+            return tone(text)
+        self.bank = clip_bank.ClipBank(render=render, crossfade_ms=5, gap_ms=100)
+
+    def test_clips_rendered_once_per_voice_setting(self):
+        self.bank.assemble('123456')
+        self.bank.assemble('654321')
+        self.assertEqual(self.bank.renders, 11)
+        self.bank.assemble('123456', rate=200)
+        self.assertEqual(self.bank.renders, 22)
+        self.assertEqual(sum(1 for text, rate in self.calls if text == 'zero'), 2)
+
+    def test_assembled_length(self):
+        channels, framerate, nframes = frames(self.bank.assemble('123456'))
+        self.assertEqual((channels, framerate), (1, FRAMERATE))
+        # Clips are trimmed to the tone; joints overlap by the crossfade
+        words = [clip_bank.OTP_PROMPT_PHRASE] + [clip_bank.DIGIT_WORDS[d] for d in (1, 2, 3, 4, 5, 6)]
+        speech = sum(40 * len(word) for word in words)
+        gaps = 6 * 800
+        self.assertEqual(nframes, speech + gaps - 12 * 40)
+
+    def test_prompt_phrases_are_cached(self):
+        self.bank.assemble('111111', prefix='Your O T P is', suffix='Please enter it now.')
+        renders = self.bank.renders
+        self.bank.assemble('222222', prefix='Your O T P is', suffix='Please enter it now.')
+        self.assertEqual(self.bank.renders, renders)
+
+    def test_assembly_is_fast(self):
+        self.bank.assemble('123456')
+        start = time.perf_counter()
+        for _ in range(100):
+            self.bank.assemble('987654')
+        self.assertLess((time.perf_counter() - start) / 100, 0.01)
+
+class TestClipBank(ClipBankContract, unittest.TestCase):
+    pass
+
+class TestClipBankWithoutNumpy(ClipBankContract, unittest.TestCase):
+    def setUp(self):
+        patcher = patch.object(clip_bank, 'numpy', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+class TestRenderOTPPrompt(unittest.TestCase):
+    def test_errors_are_returned_like_synthesize_speech(self):
+        def broken(text, **settings):
+            raise RuntimeError('no driver')
+        with patch.object(clip_bank, '_clip_bank', clip_bank.ClipBank(render=broken)):
+            self.assertEqual(clip_bank.render_otp_prompt('123456'), {'error': 'no driver'})
+
+if __name__ == '__main__':
+    unittest.main()
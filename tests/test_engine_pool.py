@@ -0,0 +1,105 @@
+import unittest
+import os
+import sys
+import threading
+import importlib.util
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import engine_pool
+
+def load_voice_api_engine_pool():
+    path = os.path.join(os.path.dirname(__file__), '..', 'voice-api', 'utils', 'engine_pool.py')
+    spec = importlib.util.spec_from_file_location('voice_api_engine_pool', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class FakeEngine:
+    instances = 0
+    def __init__(self):
+        FakeEngine.instances += 1
+        self.properties = {'rate': 200, 'volume': 1.0, 'voice': 'default'}
+        self.busy = False
+        self.stopped = False
+    def getProperty(self, name):
+        return self.properties[name]
+    def setProperty(self, name, value):
+        self.properties[name] = value
+    def isBusy(self):
+        return self.busy
+    def stop(self):
+        self.stopped = True
+
+class TestEnginePool(unittest.TestCase):
+    def setUp(self):
+        FakeEngine.instances = 0
+        self.pool = engine_pool.EnginePool(size=2, max_uses=3, rate=150, volume=0.8, timeout=0.1, factory=FakeEngine)
+
+    def test_engine_is_reused_and_reset(self):
+        with self.pool.engine(rate=90, volume=0.5, voice='other') as engine:
+            first = engine
+            self.assertEqual(engine.properties, {'rate': 90, 'volume': 0.5, 'voice': 'other'})
+        with self.pool.engine() as engine:
+            self.assertIs(engine, first)
+            self.assertEqual(engine.properties, {'rate': 150, 'volume': 0.8, 'voice': 'default'})
+        self.assertEqual(FakeEngine.instances, 1)
+
+    def test_recycled_after_max_uses(self):
+        for _ in range(3):
+            with self.pool.engine() as engine:
+                first = engine
+        self.assertTrue(first.stopped)
+        with self.pool.engine() as engine:
+            self.assertIsNot(engine, first)
+        self.assertEqual(self.pool.metrics()['recycled'], 1)
+
+    def test_recycled_after_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.engine() as engine:
+                broken = engine
+                raise RuntimeError('driver crashed')
+        self.assertTrue(broken.stopped)
+        with self.pool.engine() as engine:
+            self.assertIsNot(engine, broken)
+
+    def test_unhealthy_engine_replaced(self):
+        with self.pool.engine() as engine:
+            stuck = engine
+        stuck.busy = True
+        with self.pool.engine() as engine:
+            self.assertIsNot(engine, stuck)
+
+    def test_bounded_size(self):
+        release = threading.Event()
+        def hold():
+            with self.pool.engine():
+                release.wait(2)
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for t in threads:
+            t.start()
+        while self.pool.metrics()['in_use'] < 2:
+            pass
+        with self.assertRaises(TimeoutError):
+            with self.pool.engine():
+                pass
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(FakeEngine.instances, 2)
+
+class TestVoiceAPIEnginePool(unittest.TestCase):
+    def test_settings_applied_on_checkout(self):
+        module = load_voice_api_engine_pool()
+        settings = {'rate': 120}
+        pool = module.EnginePool(settings=lambda: settings, factory=FakeEngine)
+        with pool.engine() as engine:
+            first = engine
+            self.assertEqual(engine.properties['rate'], 120)
+            self.assertEqual(engine.properties['volume'], 0.9)
+        settings['rate'] = 180
+        with pool.engine() as engine:
+            self.assertIs(engine, first)
+            self.assertEqual(engine.properties['rate'], 180)
+
+if __name__ == '__main__':
+    unittest.main()
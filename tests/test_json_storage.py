@@ -0,0 +1,58 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+import threading
+import multiprocessing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.utils import json_storage
+
+def _increment_in_process(path, key, count):
+    writer = json_storage.GroupCommitWriter(path)
+    for _ in range(count):
+        writer.submit(lambda data: data.__setitem__(key, data.get(key, 0) + 1))
+
+class TestGroupCommitWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'store.json')
+        self.writer = json_storage.GroupCommitWriter(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_submit_returns_mutation_result(self):
+        self.writer.submit(lambda data: data.__setitem__('a', 1))
+        self.assertEqual(self.writer.submit(lambda data: data['a'] + 1), 2)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {'a': 1})
+
+    def test_mutation_error_is_raised_to_its_caller(self):
+        with self.assertRaises(KeyError):
+            self.writer.submit(lambda data: data['missing'])
+
+    def test_concurrent_threads_do_not_lose_updates(self):
+        def worker(n):
+            for i in range(50):
+                self.writer.submit(lambda data, k=f'{n}_{i}': data.__setitem__(k, True))
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.writer.read()), 400)
+        self.assertLessEqual(self.writer.commits, 400)
+
+    @unittest.skipIf(json_storage.fcntl is None, 'fcntl not available')
+    def test_concurrent_processes_do_not_lose_updates(self):
+        ctx = multiprocessing.get_context('fork')
+        procs = [ctx.Process(target=_increment_in_process, args=(self.path, 'counter', 25)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        self.assertEqual(self.writer.read()['counter'], 100)
+
+if __name__ == '__main__':
+    unittest.main()
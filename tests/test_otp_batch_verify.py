@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import datetime
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from flask import Flask
+from voice_api.plugins import otp_store
+from voice_api.utils import otp_logic
+from voice_api.blueprints.otp import otp_blueprint
+
+class TestVerifyOTPBatch(unittest.TestCase):
+    def setUp(self):
+        self.store = otp_store.ShardedMemoryOTPStore(shard_count=4)
+        otp_store.register_otp_store('batch_test', self.store)
+        self.backend_patch = patch.object(otp_logic, 'OTP_STORE_BACKEND', 'batch_test')
+        self.backend_patch.start()
+        app = Flask(__name__)
+        app.register_blueprint(otp_blueprint)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.backend_patch.stop()
+        del otp_store.OTP_STORES['batch_test']
+
+    def test_batch_statuses(self):
+        otp_logic.store_otp('alice', '111111')
+        otp_logic.store_otp('bob', '222222')
+        otp_logic.store_otp('carol', '333333')
+        self.store.update('carol', {'expires_at': (datetime.datetime.now() - datetime.timedelta(minutes=1)).isoformat()})
+        resp = self.client.post('/calls/otp/verify/batch', json={'items': [
+            {'user_id': 'alice', 'otp': '111111'},
+            {'user_id': 'alice', 'otp': '111111'},
+            {'user_id': 'bob', 'otp': '000000'},
+            {'user_id': 'carol', 'otp': '333333'},
+            {'user_id': 'dave', 'otp': '444444'},
+        ]})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual([r['status'] for r in data['results']],
+                         ['verified', 'not_found', 'invalid', 'expired', 'not_found'])
+        self.assertEqual(data['verified'], 1)
+        self.assertIsNone(self.store.get('alice'))
+        self.assertEqual(self.store.get('bob')['attempts'], 1)
+        self.assertIsNone(self.store.get('carol'))
+
+    def test_locked_after_max_attempts(self):
+        otp_logic.store_otp('bob', '222222')
+        items = [{'user_id': 'bob', 'otp': '000000'}] * otp_logic.MAX_OTP_ATTEMPTS
+        items.append({'user_id': 'bob', 'otp': '222222'})
+        statuses = [r['status'] for r in self.client.post('/calls/otp/verify/batch', json={'items': items}).get_json()['results']]
+        self.assertEqual(statuses[-1], 'locked')
+
+    def test_single_storage_transaction(self):
+        otp_logic.store_otp('alice', '111111')
+        with patch.object(self.store, 'transact', wraps=self.store.transact) as mock_transact:
+            self.client.post('/calls/otp/verify/batch', json={'items': [
+                {'user_id': 'alice', 'otp': '111111'},
+                {'user_id': 'bob', 'otp': '222222'},
+            ]})
+        self.assertEqual(mock_transact.call_count, 1)
+
+    def test_single_verify_shares_lockout_and_consumes(self):
+        otp_logic.store_otp('bob', '222222')
+        items = [{'user_id': 'bob', 'otp': '000000'}] * otp_logic.MAX_OTP_ATTEMPTS
+        self.client.post('/calls/otp/verify/batch', json={'items': items})
+        resp = self.client.post('/calls/otp/verify', json={'user_id': 'bob', 'otp': '222222'})
+        self.assertEqual((resp.status_code, resp.get_json()['status']), (400, 'locked'))
+
+        otp_logic.store_otp('alice', '111111')
+        self.assertEqual(self.client.post('/calls/otp/verify', json={'user_id': 'alice', 'otp': '111111'}).status_code, 200)
+        self.assertEqual(self.client.post('/calls/otp/verify', json={'user_id': 'alice', 'otp': '111111'}).status_code, 400)
+
+    def test_invalid_payload(self):
+        self.assertEqual(self.client.post('/calls/otp/verify/batch', json={'items': []}).status_code, 400)
+        self.assertEqual(self.client.post('/calls/otp/verify/batch', json={'items': [{'user_id': 'a'}]}).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import sys
+import time
+import threading
+import importlib.util
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from flask import Flask
+from voice_api.plugins import otp_store
+from voice_api.utils import otp_logic
+from voice_api.services import otp_delivery, otp_pool, tts_workers
+from voice_api.blueprints import otp as otp_blueprint_module
+
+def load_voice_api_delivery():
+    path = os.path.join(os.path.dirname(__file__), '..', 'voice-api', 'utils', 'otp_delivery.py')
+    spec = importlib.util.spec_from_file_location('voice_api_otp_delivery', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def wait_for_state(delivery_queue, job_id, state, timeout=2):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = delivery_queue.get(job_id)
+        if job['state'] == state:
+            return job
+        time.sleep(0.01)
+    return delivery_queue.get(job_id)
+
+class DeliveryQueueContract:
+    def test_job_moves_through_states(self):
+        release = threading.Event()
+        delivery_queue = self.module.DeliveryQueue(lambda otp: release.wait(2))
+        job = delivery_queue.submit('alice', '123456')
+        self.assertEqual(job['state'], 'queued')
+        self.assertEqual(wait_for_state(delivery_queue, job['job_id'], 'speaking')['state'], 'speaking')
+        release.set()
+        job = wait_for_state(delivery_queue, job['job_id'], 'delivered')
+        self.assertEqual(job['state'], 'delivered')
+        self.assertIsNotNone(job['finished_at'])
+        self.assertGreaterEqual(job['speak_seconds'], 0)
+        self.assertEqual(delivery_queue.latest('alice')['job_id'], job['job_id'])
+
+    def test_failed_delivery(self):
+        def deliver(otp):
+            raise RuntimeError('no audio device')
+        delivery_queue = self.module.DeliveryQueue(deliver)
+        job = wait_for_state(delivery_queue, delivery_queue.submit('alice', '1')['job_id'], 'failed')
+        self.assertEqual(job['error'], 'no audio device')
+        delivery_queue = self.module.DeliveryQueue(lambda otp: False)
+        job = wait_for_state(delivery_queue, delivery_queue.submit('bob', '2')['job_id'], 'failed')
+        self.assertEqual(job['state'], 'failed')
+
+    def test_queue_full(self):
+        release = threading.Event()
+        delivery_queue = self.module.DeliveryQueue(lambda otp: release.wait(2), max_queued=1)
+        first = delivery_queue.submit('a', '1')
+        wait_for_state(delivery_queue, first['job_id'], 'speaking')
+        delivery_queue.submit('b', '2')
+        with self.assertRaises(self.module.DeliveryQueueFull):
+            delivery_queue.submit('c', '3')
+        release.set()
+
+    def test_trimmed_jobs_leave_latest(self):
+        delivery_queue = self.module.DeliveryQueue(lambda otp: True, history=2)
+        for n in range(5):
+            job = delivery_queue.submit(f'user{n}', str(n))
+            wait_for_state(delivery_queue, job['job_id'], 'delivered')
+        self.assertLessEqual(len(delivery_queue._latest), 3)
+        self.assertIsNone(delivery_queue.latest('user0'))
+        self.assertEqual(delivery_queue.latest('user4')['state'], 'delivered')
+
+class TestDeliveryQueue(DeliveryQueueContract, unittest.TestCase):
+    module = otp_delivery
+
+class TestVoiceAPIDeliveryQueue(DeliveryQueueContract, unittest.TestCase):
+    module = load_voice_api_delivery()
+
+class TestAsyncSendOTP(unittest.TestCase):
+    def setUp(self):
+        otp_store.register_otp_store('delivery_test', otp_store.ShardedMemoryOTPStore(shard_count=4))
+        self.spoken = []
+        self.delivery_queue = otp_delivery.DeliveryQueue(self.spoken.append)
+        self.patches = [
+            patch.object(otp_logic, 'OTP_STORE_BACKEND', 'delivery_test'),
+            patch.object(otp_blueprint_module, 'claim_pooled_otp', return_value=None),
+            patch.object(otp_blueprint_module, 'get_delivery_queue', return_value=self.delivery_queue),
+        ]
+        for p in self.patches:
+            p.start()
+        app = Flask(__name__)
+        app.register_blueprint(otp_blueprint_module.otp_blueprint)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        del otp_store.OTP_STORES['delivery_test']
+
+    def test_send_returns_202_and_status_tracks_job(self):
+        resp = self.client.post('/api/otp/send', json={'user_id': 'alice', 'async': True})
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.get_json()['job_id']
+        wait_for_state(self.delivery_queue, job_id, 'delivered')
+        status = self.client.get('/api/otp/status/alice').get_json()
+        self.assertEqual(status['job_id'], job_id)
+        self.assertEqual(status['state'], 'delivered')
+        self.assertEqual(len(self.spoken), 1)
+        self.assertIsNotNone(otp_logic.get_stored_otp('alice', self.spoken[0]))
+
+    def test_pooled_audio_only_when_asked_for(self):
+        pooled = otp_pool.PooledOTP('135790', b'RIFF-pooled', 'wav')
+        with patch.object(otp_blueprint_module, 'claim_pooled_otp', return_value=pooled), \
+                patch.object(otp_blueprint_module, 'speak_otp') as speak:
+            resp = self.client.post('/api/otp/send', json={'user_id': 'alice'})
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('audio', resp.get_json())
+            speak.assert_called_once_with(resp.get_json()['otp'])
+            resp = self.client.post('/api/otp/send', json={'user_id': 'bob', 'return_audio': True})
+            self.assertEqual(resp.get_json()['otp'], '135790')
+            self.assertEqual(resp.get_json()['audio_format'], 'wav')
+            speak.assert_called_once()
+
+    def test_busy_speech_workers_answer_503(self):
+        with patch.object(otp_blueprint_module, 'speak_otp', side_effect=tts_workers.TTSQueueFull('busy')):
+            resp = self.client.post('/api/otp/send', json={'user_id': 'alice'})
+        self.assertEqual(resp.status_code, 503)
+        with patch.object(otp_blueprint_module, 'speak_otp', return_value=False):
+            resp = self.client.post('/api/otp/send', json={'user_id': 'alice'})
+        self.assertEqual(resp.status_code, 500)
+
+    def test_status_unknown_user(self):
+        self.assertEqual(self.client.get('/api/otp/status/nobody').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 from voice_api.utils.otp_logic import store_otp, get_stored_otp, OTP_STORE_FILE
 from voice_api.utils.custom_exceptions import OTPStorageError
 
+@patch('voice_api.utils.otp_logic.OTP_STORE_BACKEND', 'file')
 class TestOTPHashing(unittest.TestCase):
 
     def setUp(self):
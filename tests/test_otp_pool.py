@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import itertools
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import otp_pool
+
+def fake_render(otp):
+    return otp_pool.PooledOTP(otp, b'audio-' + otp.encode(), 'wav')
+
+class TestOTPAudioPool(unittest.TestCase):
+    def setUp(self):
+        codes = (f'{n:06d}' for n in itertools.count(100000))
+        self.pool = otp_pool.OTPAudioPool(size=5, low_water=2, render=fake_render, generate=lambda: next(codes))
+
+    def test_fill_and_claim(self):
+        self.assertEqual(self.pool.fill(), 5)
+        entry = self.pool.claim()
+        self.assertEqual(entry.otp, '100000')
+        self.assertEqual(entry.audio, b'audio-100000')
+        self.assertNotEqual(self.pool.claim().otp, entry.otp)
+
+    def test_miss_when_empty(self):
+        self.assertIsNone(self.pool.claim())
+        metrics = self.pool.metrics()
+        self.assertEqual(metrics['misses'], 1)
+        self.assertEqual(metrics['hit_rate'], 0.0)
+
+    def test_low_water_triggers_refill(self):
+        self.pool.fill()
+        for _ in range(3):
+            self.pool.claim()
+        self.assertFalse(self.pool._refill.is_set())
+        self.pool.claim()
+        self.assertTrue(self.pool._refill.is_set())
+
+    def wait_until_full(self):
+        for _ in range(200):
+            if self.pool.metrics()['available'] == 5:
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_background_refill(self):
+        self.pool.start()
+        try:
+            self.assertTrue(self.wait_until_full())
+            for _ in range(4):
+                self.pool.claim()
+            self.assertTrue(self.wait_until_full())
+            metrics = self.pool.metrics()
+            self.assertEqual(metrics['rendered'], 9)
+            self.assertEqual(metrics['hits'], 4)
+            self.assertGreater(metrics['refill_rate'], 0)
+        finally:
+            self.pool.stop()
+
+    def test_render_failure_is_counted(self):
+        def failing_render(otp):
+            raise RuntimeError('no driver')
+        pool = otp_pool.OTPAudioPool(size=5, low_water=2, render=failing_render)
+        self.assertEqual(pool.fill(), 0)
+        self.assertEqual(pool.metrics()['render_errors'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
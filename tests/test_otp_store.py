@@ -0,0 +1,325 @@
+import unittest
+import os
+import sys
+import threading
+import datetime
+import json
+import unittest.mock
+import tempfile
+import hashlib
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.plugins import otp_store
+
+class TestShardedMemoryOTPStore(unittest.TestCase):
+    def setUp(self):
+        self.store = otp_store.ShardedMemoryOTPStore(shard_count=4)
+
+    def test_put_get_delete(self):
+        self.store.put('user001', {'otp': 'abc', 'expires_at': '2030-01-01T00:00:00'})
+        self.assertEqual(self.store.get('user001')['otp'], 'abc')
+        self.assertTrue(self.store.delete('user001'))
+        self.assertIsNone(self.store.get('user001'))
+        self.assertFalse(self.store.delete('user001'))
+
+    def test_get_returns_copy(self):
+        self.store.put('user001', {'otp': 'abc'})
+        self.store.get('user001')['otp'] = 'changed'
+        self.assertEqual(self.store.get('user001')['otp'], 'abc')
+
+    def test_update(self):
+        self.store.put('user001', {'otp': 'abc', 'attempts': 0})
+        updated = self.store.update('user001', {'attempts': 1})
+        self.assertEqual(updated['attempts'], 1)
+        self.assertIsNone(self.store.update('missing', {'attempts': 1}))
+
+    def test_put_many(self):
+        self.store.put_many({f'user{i}': {'otp': str(i)} for i in range(10)})
+        self.assertEqual(len(self.store), 10)
+        self.assertEqual(self.store.get('user7')['otp'], '7')
+
+    def test_concurrent_writers(self):
+        def writer(offset):
+            for i in range(200):
+                self.store.put(f'user{offset}_{i}', {'otp': str(i)})
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.store), 1600)
+
+class TestJsonFileOTPStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store_file = os.path.join(self.tmpdir.name, 'otp_store.json')
+        self.store = otp_store.JsonFileOTPStore(self.store_file)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_legacy_file(self):
+        legacy = {
+            'otp_alice_111111': {'user_id': 'alice', 'otp': '111111', 'expires_at': '2030-01-01T00:00:00'},
+            'otp_alice_222222': {'user_id': 'alice', 'otp': '222222', 'expires_at': '2030-01-01T00:05:00'},
+            'otp_bob_333333': {'user_id': 'bob', 'otp': '333333', 'expires_at': '2030-01-01T00:01:00'},
+        }
+        with open(self.store_file, 'w') as f:
+            json.dump(legacy, f)
+
+    def test_legacy_file_is_indexed_by_user(self):
+        self.write_legacy_file()
+        self.assertEqual(self.store.get('alice')['otp'], '222222')
+        self.assertEqual(self.store.get('bob')['otp'], '333333')
+
+    def test_lookups_reuse_parsed_index(self):
+        self.store.put('alice', {'otp': 'x', 'expires_at': '2030-01-01T00:00:00'})
+        with unittest.mock.patch('builtins.open', side_effect=AssertionError('re-read')):
+            self.assertEqual(self.store.get('alice')['otp'], 'x')
+
+    def test_external_change_is_picked_up(self):
+        self.store.put('alice', {'otp': 'x', 'expires_at': '2030-01-01T00:00:00'})
+        with open(self.store_file, 'w') as f:
+            json.dump({'alice': {'otp': 'changed!', 'expires_at': '2030-01-01T00:00:00'}}, f)
+        self.assertEqual(self.store.get('alice')['otp'], 'changed!')
+
+    def test_transact_applies_updates_in_one_commit(self):
+        self.store.put_many({'alice': {'otp': 'a', 'attempts': 0}, 'bob': {'otp': 'b'}})
+        commits = self.store.writer.commits
+        def mutation(records):
+            records['alice']['attempts'] += 1
+            records['bob'] = None
+            return len(records)
+        self.assertEqual(self.store.transact({'alice', 'bob', 'carol'}, mutation), 3)
+        self.assertEqual(self.store.writer.commits, commits + 1)
+        self.assertEqual(self.store.get('alice')['attempts'], 1)
+        self.assertIsNone(self.store.get('bob'))
+        self.assertIsNone(self.store.get('carol'))
+
+    def test_migrate_otp_store_file(self):
+        self.write_legacy_file()
+        self.assertEqual(otp_store.migrate_otp_store_file(self.store_file), 3)
+        with open(self.store_file) as f:
+            data = json.load(f)
+        self.assertEqual(sorted(data), ['alice', 'bob'])
+        self.assertEqual(data['alice']['otp'], '222222')
+        self.assertEqual(otp_store.migrate_otp_store_file(self.store_file), 0)
+
+class TestShardedJsonFileOTPStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store_dir = os.path.join(self.tmpdir.name, 'otp_store')
+        self.store = otp_store.ShardedJsonFileOTPStore(self.store_dir, shard_count=4)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_put_get_and_spread(self):
+        self.store.put_many({f'user{i}': {'otp': str(i)} for i in range(40)})
+        self.assertEqual(len(self.store), 40)
+        self.assertEqual(self.store.get('user7')['otp'], '7')
+        for index in range(4):
+            with open(otp_store.shard_file(self.store_dir, index)) as f:
+                self.assertTrue(json.load(f))
+
+    def test_transact_across_shards(self):
+        keys = [f'user{i}' for i in range(8)]
+        self.store.put_many({key: {'otp': 'x', 'attempts': 0} for key in keys})
+        def mutation(records):
+            for key in keys:
+                records[key]['attempts'] += 1
+            records['user0'] = None
+            return len(records)
+        self.assertEqual(self.store.transact(keys, mutation), 8)
+        self.assertIsNone(self.store.get('user0'))
+        self.assertEqual(self.store.get('user5')['attempts'], 1)
+
+    def test_open_json_otp_store_picks_layout(self):
+        self.assertIsInstance(otp_store.open_json_otp_store(self.store_dir), otp_store.ShardedJsonFileOTPStore)
+        single = otp_store.open_json_otp_store(os.path.join(self.tmpdir.name, 'otp_store.json'))
+        self.assertIsInstance(single, otp_store.JsonFileOTPStore)
+
+    def test_reshard_from_file_and_directory(self):
+        single_file = os.path.join(self.tmpdir.name, 'otp_store.json')
+        with open(single_file, 'w') as f:
+            json.dump({f'user{i}': {'otp': str(i)} for i in range(50)}, f)
+        target = os.path.join(self.tmpdir.name, 'resharded')
+        self.assertEqual(otp_store.reshard_otp_store(single_file, target, 3), 50)
+        self.assertEqual(otp_store.read_shard_count(target), 3)
+        self.assertEqual(otp_store.reshard_otp_store(target, target, 8), 50)
+        store = otp_store.ShardedJsonFileOTPStore(target)
+        self.assertEqual(store.shard_count, 8)
+        self.assertEqual(len(store), 50)
+        self.assertEqual(store.get('user42')['otp'], '42')
+        self.assertFalse(os.path.exists(target + '.old'))
+
+class TestMmapOTPStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.table_file = os.path.join(self.tmpdir.name, 'otp_table.bin')
+        self.store = otp_store.MmapOTPStore(self.table_file, capacity=8)
+        self.expires_at = datetime.datetime(2030, 1, 1, 12, 0, 0).isoformat()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def record(self, otp='111111', **fields):
+        return dict({'otp': hashlib.sha256(otp.encode()).hexdigest(), 'expires_at': self.expires_at}, **fields)
+
+    def test_reaper_start_does_not_create_table(self):
+        reaper = otp_store.ExpiryReaper(self.store, interval=60)
+        reaper.start()
+        reaper.stop()
+        self.assertEqual(reaper.stats()['live'], 0)
+        self.assertFalse(os.path.exists(self.table_file))
+
+    def test_put_get_delete(self):
+        self.store.put('user001', self.record())
+        self.assertEqual(self.store.get('user001'), self.record(attempts=0))
+        self.assertTrue(self.store.delete('user001'))
+        self.assertIsNone(self.store.get('user001'))
+        self.assertFalse(self.store.delete('user001'))
+        self.assertEqual(len(self.store), 0)
+
+    def test_update_and_transact(self):
+        self.store.put_many({'alice': self.record(), 'bob': self.record('222222')})
+        self.assertEqual(self.store.update('alice', {'attempts': 2})['attempts'], 2)
+        self.assertIsNone(self.store.update('carol', {'attempts': 1}))
+        def mutation(records):
+            records['alice'] = None
+            records['carol'] = self.record('333333')
+            return 'done'
+        self.assertEqual(self.store.transact(['alice', 'carol'], mutation), 'done')
+        self.assertIsNone(self.store.get('alice'))
+        self.assertEqual(sorted(r['otp'] for _, r in self.store.items()),
+                         sorted([self.record('222222')['otp'], self.record('333333')['otp']]))
+
+    def test_probing_survives_deletes_and_reuses_slots(self):
+        for i in range(8):
+            self.store.put(f'user{i}', self.record(str(i)))
+        with self.assertRaises(OSError):
+            self.store.put('user8', self.record())
+        self.store.delete('user3')
+        self.store.put('user8', self.record('8'))
+        for i in [0, 1, 2, 4, 5, 6, 7, 8]:
+            self.assertEqual(self.store.get(f'user{i}')['otp'], self.record(str(i))['otp'])
+        self.assertEqual(len(self.store), 8)
+
+    def test_churn_keeps_miss_probes_short(self):
+        store = otp_store.MmapOTPStore(os.path.join(self.tmpdir.name, 'churn.bin'), capacity=256)
+        self.addCleanup(store.close)
+        for i in range(32):
+            store.put(f'resident{i}', self.record(str(i)))
+        for i in range(5000):
+            store.put(f'churn{i}', self.record())
+            store.delete(f'churn{i}')
+        table = store._open()
+        states = [store.SLOT.unpack_from(table, store._offset(i))[0] for i in range(store.capacity)]
+        self.assertGreaterEqual(states.count(store.EMPTY), store.capacity // 4)
+        self.assertEqual(store._tombstones(table), states.count(store.DELETED))
+        lengths = []
+        for i in range(100):
+            key_hash = store._hash_key(f'missing{i}')
+            index = int.from_bytes(key_hash[:8], 'little') & (store.capacity - 1)
+            length = 1
+            while store.SLOT.unpack_from(table, store._offset(index))[0] != store.EMPTY:
+                index, length = (index + 1) & (store.capacity - 1), length + 1
+            lengths.append(length)
+        self.assertLess(sum(lengths) / len(lengths), 16)
+        for i in range(32):
+            self.assertEqual(store.get(f'resident{i}')['otp'], self.record(str(i))['otp'])
+        self.assertEqual(len(store), 32)
+
+    def test_expired_slots_are_reused(self):
+        expired = (datetime.datetime.now() - datetime.timedelta(minutes=1)).isoformat()
+        for i in range(8):
+            self.store.put(f'user{i}', self.record(expires_at=expired))
+        self.store.put('fresh', self.record())
+        self.assertEqual(self.store.get('fresh')['otp'], self.record()['otp'])
+
+    def test_table_persists_across_reopen(self):
+        self.store.put('user001', self.record())
+        self.store.close()
+        reopened = otp_store.MmapOTPStore(self.table_file, capacity=1024)
+        self.assertEqual(reopened.get('user001')['otp'], self.record()['otp'])
+        self.assertEqual(reopened.capacity, 8)
+        reopened.close()
+
+    def test_items_keys_are_usable_digests(self):
+        self.store.put('user001', self.record())
+        key, _ = self.store.items()[0]
+        self.assertEqual(self.store.delete_expired([key], datetime.datetime(2031, 1, 1).timestamp()), 1)
+
+    def test_rejects_plain_otps(self):
+        with self.assertRaises(ValueError):
+            self.store.put('user001', {'otp': '123456', 'expires_at': self.expires_at})
+
+class TestExpiryReaper(unittest.TestCase):
+    def setUp(self):
+        self.store = otp_store.ShardedMemoryOTPStore(shard_count=4)
+        self.reaper = otp_store.ExpiryReaper(self.store, batch_size=3)
+        self.store.reaper = self.reaper
+        self.now = datetime.datetime(2030, 1, 1, 12, 0, 0)
+
+    def put(self, key, minutes):
+        expires_at = self.now + datetime.timedelta(minutes=minutes)
+        self.store.put(key, {'otp': 'x', 'expires_at': expires_at.isoformat()})
+
+    def test_reap_purges_only_due_entries_in_batches(self):
+        for i in range(7):
+            self.put(f'expired{i}', -1)
+        self.put('live', 5)
+        purged = self.reaper.reap(now=self.now.timestamp())
+        self.assertEqual(purged, 7)
+        self.assertEqual(self.reaper.stats(), {'purged': 7, 'live': 1, 'scheduled': 1})
+        self.assertIsNotNone(self.store.get('live'))
+
+    def test_reissued_otp_is_not_purged(self):
+        self.put('user001', -1)
+        self.put('user001', 5)
+        self.assertEqual(self.reaper.reap(now=self.now.timestamp()), 0)
+        self.assertIsNotNone(self.store.get('user001'))
+
+    def test_seed_schedules_existing_records(self):
+        store = otp_store.ShardedMemoryOTPStore(shard_count=4)
+        expired = (self.now - datetime.timedelta(minutes=1)).isoformat()
+        store.put('old', {'otp': 'x', 'expires_at': expired})
+        reaper = otp_store.ExpiryReaper(store)
+        reaper.seed()
+        self.assertEqual(reaper.reap(now=self.now.timestamp()), 1)
+        self.assertEqual(len(store), 0)
+
+    def test_transact_writes_are_scheduled(self):
+        expired = (self.now - datetime.timedelta(minutes=1)).isoformat()
+        def mutation(records):
+            records['written'] = {'otp': 'x', 'expires_at': expired}
+        self.store.transact({'written'}, mutation)
+        # Records whose expiry did not change are not scheduled twice
+        self.store.transact({'written'}, lambda records: records['written'].update(attempts=1))
+        self.assertEqual(self.reaper.stats()['scheduled'], 1)
+        self.assertEqual(self.reaper.reap(now=self.now.timestamp()), 1)
+        self.assertIsNone(self.store.get('written'))
+
+    def test_failed_pass_is_logged(self):
+        self.reaper.interval = 0.01
+        with unittest.mock.patch.object(self.reaper, 'reap', side_effect=OSError('disk gone')), \
+             self.assertLogs(otp_store.logger, level='ERROR') as logs:
+            self.reaper.start()
+            self.addCleanup(self.reaper.stop)
+            for _ in range(200):
+                if logs.records:
+                    break
+                threading.Event().wait(0.01)
+        self.assertIn('disk gone', logs.output[0])
+
+class TestOTPStoreRegistry(unittest.TestCase):
+    def test_default_store_is_memory(self):
+        self.assertIsInstance(otp_store.resolve_otp_store(), otp_store.ShardedMemoryOTPStore)
+
+    def test_unknown_store(self):
+        with self.assertRaises(ValueError) as ctx:
+            otp_store.resolve_otp_store('missing')
+        self.assertIn('memory', str(ctx.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import io
+import os
+import sys
+import wave
+from unittest.mock import patch
+from flask import Flask
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import audio_cache, polly_service
+from voice_api.routes import polly_route
+
+class SentenceVoiceModule(polly_service.Pyttsx3VoiceModule):
+    """Renders each sentence as a run of one sample value, logging the order."""
+    def __init__(self):
+        self.log = []
+    def render_pcm(self, plan, voice_id=None, rate=None, volume=None):
+        self.log.append(('render', ' '.join(segment.text for segment in plan if segment.text)))
+        return (1, 2, 8000), bytes([len(self.log), 0]) * 4
+
+class TestStreamSpeech(unittest.TestCase):
+    def setUp(self):
+        self.module = SentenceVoiceModule()
+        polly_service.register_voice_module('sentences', self.module)
+        self.cache = audio_cache.AudioCache(memory_bytes=4096, cache_dir=None)
+        patcher = patch.object(polly_service, 'get_audio_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        del polly_service.VOICE_MODULES['sentences']
+
+    def test_split_utterance(self):
+        self.assertEqual(polly_service.split_utterance('Hello there. How are you? Fine!'),
+                         ['Hello there.', 'How are you?', 'Fine!'])
+        self.assertEqual(polly_service.split_utterance('no break'), ['no break'])
+
+    def test_first_chunk_before_whole_utterance(self):
+        response = polly_service.stream_speech('One. Two. Three.', module_name='sentences')
+        stream = response['AudioStream']
+        self.assertFalse(response['Buffered'])
+        self.assertEqual(next(stream)[:4], b'RIFF')
+        self.assertEqual(self.module.log, [('render', 'One.')])
+        rest = list(stream)
+        self.assertEqual(len(self.module.log), 3)
+        self.assertEqual(len(rest), 3)
+
+    def test_completed_stream_is_cached_as_valid_wav(self):
+        response = polly_service.stream_speech('One. Two.', module_name='sentences')
+        b''.join(response['AudioStream'])
+        cached = polly_service.stream_speech('One. Two.', module_name='sentences')
+        self.assertTrue(cached['Buffered'])
+        self.assertEqual(cached['ETag'], response['ETag'])
+        with wave.open(io.BytesIO(cached['AudioStream']), 'rb') as wav:
+            self.assertEqual(wav.getnframes(), 8)
+            self.assertEqual(wav.getframerate(), 8000)
+        self.assertEqual(len(self.module.log), 2)
+
+    def test_abandoned_stream_is_not_cached(self):
+        response = polly_service.stream_speech('One. Two.', module_name='sentences')
+        next(response['AudioStream'])
+        response['AudioStream'].close()
+        self.assertIsNone(self.cache.get(response['ETag']))
+
+    def test_unknown_module(self):
+        self.assertIn('error', polly_service.stream_speech('hi', module_name='missing'))
+
+class TestSynthesizeEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.module = SentenceVoiceModule()
+        polly_service.register_voice_module('sentences', self.module)
+        cache = audio_cache.AudioCache(memory_bytes=4096, cache_dir=None)
+        for target in (polly_service, polly_route):
+            patcher = patch.object(target, 'get_audio_cache', return_value=cache)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        app = Flask(__name__)
+        app.register_blueprint(polly_route.polly_bp)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        del polly_service.VOICE_MODULES['sentences']
+
+    def synthesize(self, **payload):
+        payload.setdefault('module', 'sentences')
+        return self.client.post('/api/polly/synthesize', json=payload)
+
+    def test_streams_binary_audio(self):
+        resp = self.synthesize(text='One. Two.')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.mimetype, 'audio/wav')
+        self.assertTrue(resp.is_streamed)
+        self.assertIsNone(resp.content_length)
+        self.assertTrue(resp.headers['ETag'])
+        self.assertEqual(resp.get_data()[:4], b'RIFF')
+
+    def test_cached_render_supports_etag_and_range(self):
+        first = self.synthesize(text='One. Two.')
+        first.get_data()
+        etag = first.headers['ETag'].strip('"')
+        location = first.headers['Content-Location']
+        self.assertEqual(location, f'/api/polly/audio/{etag}')
+
+        again = self.synthesize(text='One. Two.')
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.content_length, 60)
+        self.assertEqual(len(self.module.log), 2)
+
+        self.assertEqual(self.client.get(location, headers={'If-None-Match': f'"{etag}"'}).status_code, 304)
+        partial = self.client.get(location, headers={'Range': 'bytes=44-47'})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.headers['Content-Range'], 'bytes 44-47/60')
+        self.assertEqual(partial.get_data(), b'\x01\x00\x01\x00')
+
+    def test_failure_before_first_chunk_is_a_json_error(self):
+        with patch.object(self.module, 'render_pcm', side_effect=TimeoutError('engine stuck')):
+            resp = self.synthesize(text='One. Two.')
+        self.assertEqual(resp.status_code, 500)
+        self.assertEqual(resp.get_json()['error'], 'engine stuck')
+
+    def test_validation(self):
+        self.assertEqual(self.synthesize().status_code, 400)
+        self.assertEqual(self.synthesize(text='hi', format='flac').status_code, 400)
+        for prosody in ({'rate': 'fast'}, {'rate': 0}, {'rate': True}, {'volume': 2}, {'volume': '0.5'}):
+            self.assertEqual(self.synthesize(text='hi', **prosody).status_code, 400, prosody)
+        self.assertEqual(self.synthesize(text='hi', rate=180, volume=0.5).status_code, 200)
+        self.assertEqual(self.client.get('/api/polly/audio/unknown').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
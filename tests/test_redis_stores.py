@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import datetime
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.plugins import otp_store, token_store
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+def in_minutes(minutes):
+    return (datetime.datetime.now() + datetime.timedelta(minutes=minutes)).isoformat()
+
+@unittest.skipIf(fakeredis is None, 'fakeredis not installed')
+class TestRedisOTPStore(unittest.TestCase):
+    def setUp(self):
+        self.client = fakeredis.FakeRedis()
+        self.store = otp_store.RedisOTPStore(client=self.client)
+
+    def test_put_get_delete(self):
+        self.store.put('alice', {'otp': 'x', 'expires_at': in_minutes(5)})
+        self.assertEqual(self.store.get('alice')['otp'], 'x')
+        self.assertTrue(self.store.delete('alice'))
+        self.assertIsNone(self.store.get('alice'))
+
+    def test_native_ttl_matches_expiry(self):
+        self.store.put('alice', {'otp': 'x', 'expires_at': in_minutes(5)})
+        ttl = self.client.pttl('otp:alice')
+        self.assertGreater(ttl, 4 * 60 * 1000)
+        self.assertLessEqual(ttl, 5 * 60 * 1000)
+
+    def test_already_expired_record_is_not_written(self):
+        self.store.put('alice', {'otp': 'x', 'expires_at': in_minutes(-1)})
+        self.assertIsNone(self.store.get('alice'))
+
+    def test_put_many_and_items(self):
+        self.store.put_many({f'user{i}': {'otp': str(i), 'expires_at': in_minutes(5)} for i in range(20)})
+        self.assertEqual(len(self.store), 20)
+        self.assertEqual(dict(self.store.items())['user7']['otp'], '7')
+
+    def test_update_and_transact(self):
+        self.store.put('alice', {'otp': 'x', 'attempts': 0, 'expires_at': in_minutes(5)})
+        self.assertEqual(self.store.update('alice', {'attempts': 1})['attempts'], 1)
+        self.assertIsNone(self.store.update('bob', {'attempts': 1}))
+        def mutation(records):
+            records['alice'] = None
+            records['bob'] = {'otp': 'y', 'expires_at': in_minutes(5)}
+            return 'done'
+        self.assertEqual(self.store.transact(['alice', 'bob'], mutation), 'done')
+        self.assertIsNone(self.store.get('alice'))
+        self.assertEqual(self.store.get('bob')['otp'], 'y')
+
+    def test_shared_between_nodes(self):
+        other_node = otp_store.RedisOTPStore(client=self.client)
+        self.store.put('alice', {'otp': 'x', 'expires_at': in_minutes(5)})
+        self.assertEqual(other_node.get('alice')['otp'], 'x')
+
+@unittest.skipIf(fakeredis is None, 'fakeredis not installed')
+class TestRedisTokenStore(unittest.TestCase):
+    def setUp(self):
+        self.store = token_store.RedisTokenStore(client=fakeredis.FakeRedis())
+
+    def test_put_get_and_usage(self):
+        self.store.put('hash1', {'name': 'ci', 'created_at': '2030-01-01T00:00:00', 'last_used': None, 'usage_count': 0})
+        self.assertIsNone(self.store.get('hash1')['last_used'])
+        self.store.record_usage('hash1', '2030-01-02T00:00:00')
+        self.store.record_usage('hash1', '2030-01-03T00:00:00')
+        info = self.store.get('hash1')
+        self.assertEqual(info['usage_count'], 2)
+        self.assertEqual(info['last_used'], '2030-01-03T00:00:00')
+        self.assertEqual([h for h, _ in self.store.items()], ['hash1'])
+
+    def test_usage_of_unknown_token_is_ignored(self):
+        self.store.record_usage('missing', '2030-01-02T00:00:00')
+        self.assertIsNone(self.store.get('missing'))
+
+class TestTokenStoreRegistry(unittest.TestCase):
+    def test_unknown_store(self):
+        with self.assertRaises(ValueError) as ctx:
+            token_store.resolve_token_store('missing')
+        self.assertIn('file', str(ctx.exception))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+import os
+import sys
+import time
+import datetime
+import importlib.util
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import app
+from voice_api.services import replay_store
+import utils.otp_logic as otp_logic
+
+def fake_render(otp):
+    return replay_store.ReplayAudio(f'RIFF{otp}'.encode(), 'wav')
+
+def soon(seconds=60):
+    return datetime.datetime.now() + datetime.timedelta(seconds=seconds)
+
+class TestReplayAudioStore(unittest.TestCase):
+    def setUp(self):
+        self.renders = []
+        def render(otp):
+            self.renders.append(otp)
+            return fake_render(otp)
+        self.store = replay_store.ReplayAudioStore(max_entries=3, max_bytes=1 << 20, key=None, render=render)
+
+    def test_renders_once_then_replays_stored_audio(self):
+        self.store.put('alice', '123456', soon())
+        self.assertEqual(self.store.replay('alice'), (b'RIFF123456', 'wav'))
+        self.assertEqual(self.store.replay('alice', '123456'), (b'RIFF123456', 'wav'))
+        self.assertEqual(self.renders, ['123456'])
+        self.assertEqual(self.store.metrics()['hits'], 1)
+
+    def test_prerendered_audio_is_never_rendered(self):
+        self.store.put('alice', '123456', soon(), audio=b'pooled', audio_format='wav')
+        self.assertEqual(self.store.replay('alice').audio, b'pooled')
+        self.assertEqual(self.renders, [])
+
+    def test_no_render_without_stored_audio(self):
+        self.store.put('alice', '123456', soon())
+        self.assertIsNone(self.store.replay('alice', render=False))
+        self.assertEqual(self.renders, [])
+
+    def test_encrypted_in_memory(self):
+        self.store.put('alice', '123456', soon(), audio=b'RIFF-plain-audio', audio_format='wav')
+        entry = self.store._entries['alice']
+        self.assertNotIn(b'123456', entry.otp)
+        self.assertNotIn(b'plain-audio', entry.audio)
+
+    def test_other_otp_or_new_send(self):
+        self.store.put('alice', '123456', soon())
+        self.assertIsNone(self.store.replay('alice', '999999'))
+        self.store.put('alice', '654321', soon())
+        self.assertEqual(self.store.replay('alice').audio, b'RIFF654321')
+
+    def test_discard_and_expiry(self):
+        self.store.put('alice', '111111', soon())
+        self.assertTrue(self.store.discard('alice'))
+        self.assertIsNone(self.store.replay('alice'))
+        self.store.put('bob', '222222', time.time() - 1)
+        self.assertIsNone(self.store.replay('bob'))
+        self.store.put('carol', '333333', soon(1))
+        self.assertEqual(self.store.purge_expired(time.time() + 5), 1)
+        self.assertEqual(self.store.metrics()['entries'], 0)
+        self.assertEqual(self.store.metrics()['bytes'], 0)
+
+    def test_bounded(self):
+        for i in range(5):
+            self.store.put(f'user{i}', f'{i}' * 6, soon())
+        self.assertEqual(self.store.metrics()['entries'], 3)
+        self.assertEqual(self.store.metrics()['evictions'], 2)
+        self.assertIsNone(self.store.replay('user0'))
+        # Budgets count ciphertext, about 4/3 of the audio plus a token header
+        small = replay_store.ReplayAudioStore(max_entries=10, max_bytes=1000, render=fake_render)
+        small.put('a', '1', soon(), audio=bytes(400), audio_format='wav')
+        small.put('b', '2', soon(), audio=bytes(400), audio_format='wav')
+        self.assertEqual(list(small._entries), ['b'])
+
+class TestRootReplayFlow(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.store = replay_store.ReplayAudioStore(render=fake_render)
+        for patcher in [patch.object(otp_logic, 'get_replay_store', return_value=self.store),
+                        patch.object(otp_logic, 'render_otp_audio', side_effect=self.render_at_send),
+                        patch('blueprints.otp.speak_otp')]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def render_at_send(self, otp):
+        return replay_store.ReplayAudio(f'SENT{otp}'.encode(), 'wav')
+
+    def test_replay_streams_audio_rendered_at_send_until_verified(self):
+        otp = self.client.post('/api/otp/send', json={'user_id': 'replay_user'}).get_json()['otp']
+        for _ in range(3):
+            resp = self.client.post('/calls/otp/replay', json={'user_id': 'replay_user'})
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.data, f'SENT{otp}'.encode())
+            self.assertEqual(resp.mimetype, 'audio/wav')
+        self.assertEqual(self.store.metrics()['renders'], 0)
+        self.client.post('/calls/otp/verify', json={'user_id': 'replay_user', 'otp': otp})
+        self.assertEqual(self.client.post('/calls/otp/replay', json={'user_id': 'replay_user'}).status_code, 404)
+
+    def test_replay_after_restart_renders_from_store(self):
+        otp = self.client.post('/api/otp/send', json={'user_id': 'restart_user'}).get_json()['otp']
+        # A fresh process (or another node) has nothing in its replay store
+        restarted = replay_store.ReplayAudioStore(render=fake_render)
+        with patch.object(otp_logic, 'get_replay_store', return_value=restarted):
+            resp = self.client.post('/calls/otp/replay', json={'user_id': 'restart_user'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data, f'RIFF{otp}'.encode())
+
+class TestPackageReplayFallback(unittest.TestCase):
+    def setUp(self):
+        from voice_api.plugins import otp_store
+        from voice_api.utils import otp_logic as package_otp_logic
+        self.otp_logic = package_otp_logic
+        otp_store.register_otp_store('replay_test', otp_store.ShardedMemoryOTPStore(shard_count=4))
+        self.addCleanup(otp_store.OTP_STORES.pop, 'replay_test')
+        self.records = otp_store.OTP_STORES['replay_test']
+        key = replay_store.Fernet.generate_key()
+        self.nodes = [replay_store.ReplayAudioStore(key=key, render=fake_render) for _ in range(2)]
+        for patcher in [patch.object(package_otp_logic, 'OTP_STORE_BACKEND', 'replay_test'),
+                        patch.object(package_otp_logic, 'get_replay_store', side_effect=lambda: self.node),
+                        patch.object(package_otp_logic, 'render_otp_audio', side_effect=fake_render)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_store_holds_only_the_hash_by_default(self):
+        self.node = self.nodes[0]
+        self.otp_logic.store_otp('carol', '975310')
+        self.assertEqual(set(self.records.get('carol')), {'otp', 'expires_at'})
+        self.assertEqual(self.otp_logic.replay_otp_audio('carol').audio, b'RIFF975310')
+        self.assertEqual(self.node.metrics()['renders'], 0)
+        # Another node has no audio and no code to render it from
+        self.node = self.nodes[1]
+        self.assertIsNone(self.otp_logic.replay_otp_audio('carol'))
+        self.assertEqual(self.node.metrics()['renders'], 0)
+
+    @patch.object(replay_store.Config, 'OTP_REPLAY_SHARED', True)
+    def test_other_node_unseals_code_from_store(self):
+        self.node = self.nodes[0]
+        self.otp_logic.store_otp('alice', '246810')
+        self.assertNotIn('246810', self.records.get('alice')['replay'])
+        self.node = self.nodes[1]
+        self.assertEqual(self.otp_logic.replay_otp_audio('alice').audio, b'RIFF246810')
+        self.assertEqual(self.otp_logic.verify_otps([('alice', '246810')]), ['verified'])
+        self.assertIsNone(self.otp_logic.replay_otp_audio('alice'))
+
+    @patch.object(replay_store.Config, 'OTP_REPLAY_SHARED', True)
+    def test_other_key_cannot_replay(self):
+        self.node = self.nodes[0]
+        self.otp_logic.store_otp('bob', '135791')
+        self.node = replay_store.ReplayAudioStore(render=fake_render)
+        self.assertIsNone(self.otp_logic.replay_otp_audio('bob'))
+
+class TestVoiceApiReplayStore(unittest.TestCase):
+    def test_render_once_and_discard(self):
+        path = os.path.join(os.path.dirname(__file__), '..', 'voice-api', 'utils', 'replay_store.py')
+        spec = importlib.util.spec_from_file_location('voice_api_replay_store', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        renders = []
+        store = module.ReplayAudioStore(lambda otp: renders.append(otp) or module.ReplayAudio(b'wav' + otp.encode(), 'wav'))
+        store.put('+15550100', '424242', soon().isoformat())
+        self.assertEqual(store.replay('+15550100', '424242').audio, b'wav424242')
+        self.assertEqual(store.replay('+15550100').audio, b'wav424242')
+        self.assertEqual(renders, ['424242'])
+        store.discard('+15550100')
+        self.assertIsNone(store.replay('+15550100'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import os
+import sys
+import wave
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import engine_pool, polly_service
+from voice_api.utils import ssml
+from voice_api.utils.ssml import SpeechSegment
+
+def plan_text(plan):
+    return ' '.join(segment.text for segment in plan if segment.text)
+
+class TestParseSSML(unittest.TestCase):
+    def test_plain_text_is_one_plain_segment(self):
+        plan = ssml.parse_ssml('Hello   world')
+        self.assertEqual(plan, (SpeechSegment('Hello world', 1.0, 1.0, 0, None),))
+        self.assertTrue(ssml.is_plain(plan))
+
+    def test_plan_segments(self):
+        plan = ssml.parse_ssml(
+            '<speak>Your code is <break time="0.5s"/><emphasis level="strong">1 2 3</emphasis>. '
+            "<prosody rate='slow' volume='-6dB'>Thanks &amp; bye</prosody><break strength='weak'/></speak>")
+        self.assertEqual([segment.text for segment in plan], ['Your code is', '1 2 3.', 'Thanks & bye', ''])
+        self.assertEqual(plan[1].pause_ms, 500)
+        self.assertEqual(plan[1].emphasis, 'strong')
+        self.assertEqual(plan[2].rate, 0.75)
+        self.assertAlmostEqual(plan[2].volume, 0.5, places=2)
+        self.assertEqual(plan[3].pause_ms, 250)
+
+    def test_nested_prosody_multiplies(self):
+        plan = ssml.parse_ssml('<prosody rate="+20%">a <prosody rate="50%">b</prosody> c</prosody>')
+        self.assertEqual([(segment.text, segment.rate) for segment in plan], [('a', 1.2), ('b', 0.6), ('c', 1.2)])
+
+    def test_unknown_tags_are_not_spoken(self):
+        plan = ssml.parse_ssml('<speak><!-- note --><say-as interpret-as="digits">42</say-as> '
+                               '<sub alias="World Wide Web">WWW</sub> <custom x="1">kept</custom></speak>')
+        self.assertEqual(plan_text(plan), '42 World Wide Web kept')
+
+    def test_unbalanced_markup(self):
+        plan = ssml.parse_ssml('<prosody rate="fast">quick</emphasis> still fast')
+        self.assertEqual(plan, (SpeechSegment('quick still fast', 1.25, 1.0, 0, None),))
+        self.assertEqual(plan_text(ssml.parse_ssml('a < b')), 'a < b')
+
+    def test_plans_are_memoized(self):
+        source = '<speak>Memo <break/> test</speak>'
+        self.assertIs(ssml.parse_ssml(source), ssml.parse_ssml(source))
+
+    def test_codes_are_not_memoized(self):
+        cached = len(ssml._plan_cache)
+        plan = ssml.parse_ssml('<speak>Your code is <say-as interpret-as="digits">482913</say-as></speak>')
+        ssml.parse_ssml('Your code is 482913')
+        # Straight into the cache, bypassing parse_ssml
+        direct = ssml._parse_markup_cached('<speak>Code <break/> 482913</speak>')
+        self.assertIsNot(direct, ssml._parse_markup_cached('<speak>Code <break/> 482913</speak>'))
+        self.assertEqual(plan_text(plan), 'Your code is 482913')
+        self.assertEqual(len(ssml._plan_cache), cached)
+        self.assertFalse([source for source in ssml._plan_cache if '482913' in source])
+
+    def test_cache_is_bounded(self):
+        with patch.object(ssml, 'SSML_PLAN_CACHE_SIZE', 2):
+            ssml._plan_cache.clear()
+            for word in ['one', 'two', 'three']:
+                ssml.parse_ssml(f'<speak>{word}</speak>')
+            self.assertEqual(list(ssml._plan_cache), ['<speak>two</speak>', '<speak>three</speak>'])
+
+    def test_segment_prosody(self):
+        segment = SpeechSegment('x', 0.5, 2.0, 0, 'strong')
+        self.assertEqual(ssml.segment_prosody(segment, 200, 0.5), (85, 1.0))
+
+class RecordingEngine:
+    def __init__(self):
+        self.properties = {'rate': 200, 'volume': 1.0, 'voice': 'default'}
+        self.queued = []
+        self.saved = []
+        self.runs = 0
+    def getProperty(self, name):
+        return self.properties[name]
+    def setProperty(self, name, value):
+        self.properties[name] = value
+    def save_to_file(self, text, path):
+        self.queued.append((text, self.properties['rate'], self.properties['volume'], path))
+        self.saved.append(self.queued[-1])
+    def runAndWait(self):
+        self.runs += 1
+        for text, _, _, path in self.queued:
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(1000)
+                wav.writeframes(b'\x01\x00' * len(text))
+        self.queued = []
+    def isBusy(self):
+        return False
+
+class TestPlanRendering(unittest.TestCase):
+    def setUp(self):
+        self.engine = RecordingEngine()
+        pool = engine_pool.EnginePool(size=1, rate=100, volume=1.0, factory=lambda: self.engine)
+        patcher = patch.object(polly_service, 'get_engine_pool', return_value=pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(polly_service, 'resolve_voice', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_plan_drives_engine_properties_in_one_run(self):
+        module = polly_service.Pyttsx3VoiceModule()
+        audio = module.render(None, ssml='<speak>ab<break time="100ms"/><prosody rate="slow" volume="soft">cd</prosody></speak>')
+        self.assertEqual([call[:3] for call in self.engine.saved], [('ab', 100, 1.0), ('cd', 75, 0.6)])
+        self.assertEqual(self.engine.runs, 1)
+        with wave.open(audio.open(), 'rb') as wav:
+            # 2 frames, 100 frames of silence, 2 frames
+            self.assertEqual(wav.getnframes(), 104)
+            frames = wav.readframes(104)
+        self.assertEqual(frames[4:204], bytes(200))
+
+if __name__ == '__main__':
+    unittest.main()
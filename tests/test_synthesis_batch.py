@@ -0,0 +1,108 @@
+import unittest
+import io
+import os
+import sys
+import wave
+import base64
+from unittest.mock import patch
+from flask import Flask
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import audio_cache, engine_pool, polly_service
+from voice_api.routes import polly_route
+
+class LoopEngine:
+    """Writes one frame per character for every save queued before runAndWait()."""
+    def __init__(self):
+        self.properties = {'rate': 150, 'volume': 1.0, 'voice': None}
+        self.queued = []
+        self.runs = 0
+        self.spoken = []
+    def getProperty(self, name):
+        return self.properties[name]
+    def setProperty(self, name, value):
+        self.properties[name] = value
+    def isBusy(self):
+        return False
+    def save_to_file(self, text, path):
+        self.queued.append((text, path))
+    def runAndWait(self):
+        self.runs += 1
+        for text, path in self.queued:
+            self.spoken.append(text)
+            with wave.open(path, 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(1000)
+                wav.writeframes(b'\x01\x00' * len(text))
+        self.queued = []
+
+def frame_count(audio):
+    with wave.open(io.BytesIO(bytes(audio)), 'rb') as wav:
+        return wav.getnframes()
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = LoopEngine()
+        self.cache = audio_cache.AudioCache(memory_bytes=1 << 16, cache_dir=None)
+        for name, value in [('get_engine_pool', engine_pool.EnginePool(factory=lambda: self.engine)),
+                            ('get_audio_cache', self.cache), ('get_tts_workers', None), ('resolve_voice', None)]:
+            patcher = patch.object(polly_service, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+class TestSynthesizeBatch(BatchTestCase):
+    def test_one_engine_run_for_the_batch(self):
+        texts = ['one', 'three', '<speak>fi<break time="10ms"/>ve</speak>']
+        responses = polly_service.synthesize_batch(texts, output_format='wav')
+        self.assertEqual(self.engine.runs, 1)
+        self.assertEqual([frame_count(r['AudioStream']) for r in responses], [3, 5, 14])
+        self.assertEqual({r['OutputFormat'] for r in responses}, {'wav'})
+
+    def test_cache_hits_and_duplicates_are_not_rendered(self):
+        polly_service.synthesize_batch(['cached'], output_format='wav')
+        responses = polly_service.synthesize_batch(['cached', 'new', 'new'], output_format='wav')
+        self.assertEqual(self.engine.spoken, ['cached', 'new'])
+        self.assertEqual(self.engine.runs, 2)
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(bytes(responses[1]['AudioStream']), bytes(responses[2]['AudioStream']))
+
+    def test_matches_single_synthesis(self):
+        batch = polly_service.synthesize_batch(['alpha', 'beta'], output_format='wav', rate=120)
+        with patch.object(polly_service, 'get_audio_cache', return_value=None):
+            single = polly_service.synthesize_speech('beta', output_format='wav', rate=120)
+        self.assertEqual(bytes(batch[1]['AudioStream']), bytes(single['AudioStream']))
+
+    def test_errors(self):
+        self.assertEqual(polly_service.synthesize_batch(['a', 'b'], module_name='missing'),
+                         [{'error': "Voice module 'missing' not found."}] * 2)
+        with patch.object(self.engine, 'runAndWait', side_effect=RuntimeError('driver crashed')):
+            responses = polly_service.synthesize_batch(['x', 'y'])
+        self.assertEqual(responses, [{'error': 'driver crashed'}] * 2)
+        self.assertEqual(polly_service.synthesize_batch([]), [])
+
+class TestBatchEndpoint(BatchTestCase):
+    def setUp(self):
+        super().setUp()
+        app = Flask(__name__)
+        app.register_blueprint(polly_route.polly_bp)
+        self.client = app.test_client()
+
+    def test_batch_endpoint(self):
+        resp = self.client.post('/api/polly/synthesize/batch', json={'texts': ['hi', 'there']})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual(data['synthesized'], 2)
+        self.assertEqual(data['results'][1]['content_type'], 'audio/wav')
+        self.assertEqual(frame_count(base64.b64decode(data['results'][1]['audio'])), 5)
+        self.assertEqual(self.engine.runs, 1)
+
+    def test_validation(self):
+        self.assertEqual(self.client.post('/api/polly/synthesize/batch', json={'texts': []}).status_code, 400)
+        self.assertEqual(self.client.post('/api/polly/synthesize/batch', json={'texts': ['a', 3]}).status_code, 400)
+        with patch.object(polly_route.Config, 'SYNTHESIS_BATCH_MAX_SIZE', 1):
+            resp = self.client.post('/api/polly/synthesize/batch', json={'texts': ['a', 'b']})
+        self.assertEqual(resp.status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
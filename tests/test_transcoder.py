@@ -0,0 +1,114 @@
+import unittest
+import io
+import os
+import sys
+import wave
+import array
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import audio_cache, polly_service, transcoder
+
+def make_wav(samples, rate=16000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(array.array('h', samples).tobytes())
+    return buffer.getvalue()
+
+SAMPLES = [(i * 997) % 65536 - 32768 for i in range(1600)]
+
+class TestTranscode(unittest.TestCase):
+    def test_wav_and_pcm(self):
+        audio = make_wav(SAMPLES)
+        self.assertEqual(transcoder.transcode(audio, 'wav'), ('wav', audio))
+        self.assertEqual(transcoder.transcode(audio, 'pcm'), ('pcm', array.array('h', SAMPLES).tobytes()))
+
+    def test_mulaw_is_8khz_mono(self):
+        produced, audio = transcoder.transcode(make_wav(SAMPLES * 2, rate=16000, channels=2), 'mulaw')
+        self.assertEqual(produced, 'mulaw')
+        # 1600 stereo frames at 16 kHz -> 800 one-byte samples at 8 kHz
+        self.assertEqual(len(audio), 800)
+
+    def test_pure_python_mulaw_matches_audioop(self):
+        if transcoder.audioop is None:
+            self.skipTest('audioop not available')
+        frames = array.array('h', range(-32768, 32768, 7)).tobytes()
+        expected = transcoder.encode_mulaw(frames)
+        with patch.object(transcoder, 'audioop', None):
+            self.assertEqual(transcoder.encode_mulaw(frames), expected)
+            self.assertAlmostEqual(len(transcoder.resample(frames, 16000, 8000)), len(frames) // 2, delta=2)
+
+    def test_compressed_without_encoder_falls_back_to_wav(self):
+        audio = make_wav(SAMPLES)
+        with patch.object(transcoder, 'lameenc', None), patch.object(transcoder, 'FFMPEG', None):
+            self.assertEqual(transcoder.transcode(audio, 'mp3'), ('wav', audio))
+            pool = transcoder.Transcoder(workers=0)
+            pool.transcode(audio, 'ogg_vorbis')
+        self.assertEqual(pool.metrics()['fallbacks'], 1)
+
+    def test_ffmpeg_encoder(self):
+        audio = make_wav(SAMPLES)
+        with patch.object(transcoder, 'lameenc', None), patch.object(transcoder, 'FFMPEG', '/usr/bin/ffmpeg'), \
+             patch.object(transcoder.subprocess, 'run') as run:
+            run.return_value.stdout = b'OggS...'
+            self.assertEqual(transcoder.transcode(audio, 'ogg_vorbis'), ('ogg_vorbis', b'OggS...'))
+        command = run.call_args[0][0]
+        self.assertIn('libvorbis', command)
+        self.assertEqual(run.call_args[1]['input'], array.array('h', SAMPLES).tobytes())
+
+    def test_unsupported_format(self):
+        with self.assertRaises(transcoder.TranscodeError):
+            transcoder.transcode(make_wav(SAMPLES), 'flac')
+
+    def test_process_pool(self):
+        pool = transcoder.Transcoder(workers=1)
+        self.addCleanup(pool.shutdown)
+        self.assertEqual(pool.transcode(make_wav(SAMPLES), 'pcm')[0], 'pcm')
+        self.assertEqual(pool.metrics()['transcoded'], {'pcm': 1})
+
+class WavVoiceModule(polly_service.VoiceModuleBase):
+    def __init__(self):
+        self.calls = 0
+    def synthesize(self, text, voice_id=None, output_format="mp3", rate=None, volume=None, ssml=None):
+        self.calls += 1
+        return {"OutputFormat": "wav", "AudioStream": make_wav(SAMPLES)}
+
+class TestSynthesizeTranscoding(unittest.TestCase):
+    def setUp(self):
+        self.module = WavVoiceModule()
+        polly_service.register_voice_module('wav', self.module)
+        self.cache = audio_cache.AudioCache(memory_bytes=1 << 20, cache_dir=None)
+        patcher = patch.object(polly_service, 'get_audio_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        del polly_service.VOICE_MODULES['wav']
+
+    def test_variants_share_one_render(self):
+        mulaw = polly_service.synthesize_speech('hello', output_format='mulaw', module_name='wav')
+        self.assertEqual(mulaw['OutputFormat'], 'mulaw')
+        self.assertEqual(len(mulaw['AudioStream']), 800)
+        pcm = polly_service.synthesize_speech('hello', output_format='pcm', module_name='wav')
+        self.assertEqual(pcm['OutputFormat'], 'pcm')
+        wav = polly_service.synthesize_speech('hello', output_format='wav', module_name='wav')
+        self.assertEqual(wav['AudioStream'], make_wav(SAMPLES))
+        self.assertEqual(self.module.calls, 1)
+        self.assertEqual(self.cache.metrics()['memory_entries'], 3)
+
+    def test_fallback_reports_wav(self):
+        with patch.object(transcoder, 'lameenc', None), patch.object(transcoder, 'FFMPEG', None):
+            response = polly_service.synthesize_speech('hello', output_format='mp3', module_name='wav')
+            again = polly_service.synthesize_speech('hello', output_format='mp3', module_name='wav')
+        self.assertEqual((response['OutputFormat'], again['OutputFormat']), ('wav', 'wav'))
+        self.assertEqual(self.module.calls, 1)
+
+    def test_batch_transcodes(self):
+        responses = polly_service.synthesize_batch(['a', 'b'], output_format='pcm', module_name='wav')
+        self.assertEqual([r['OutputFormat'] for r in responses], ['pcm', 'pcm'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import os
+import sys
+import time
+import operator
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from voice_api.services import tts_workers
+from voice_api.utils.custom_exceptions import VoiceSynthesisError
+
+class TestTTSWorkerPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = tts_workers.TTSWorkerPool(workers=2, max_queued=2, timeout=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def test_results_come_back_as_futures(self):
+        futures = [self.pool.submit(operator.add, i, 1) for i in range(2)]
+        self.assertEqual([future.result(timeout=30) for future in futures], [1, 2])
+
+    def test_job_error_is_raised(self):
+        future = self.pool.submit(int, 'not a number')
+        with self.assertRaises(VoiceSynthesisError) as ctx:
+            future.result(timeout=30)
+        self.assertIn('ValueError', str(ctx.exception))
+
+    def test_timeout_replaces_worker(self):
+        restarts = self.pool.metrics()['restarts']
+        future = self.pool.submit(time.sleep, 5, timeout=0.5)
+        with self.assertRaises(tts_workers.TTSJobTimeout):
+            future.result(timeout=30)
+        self.assertEqual(self.pool.metrics()['restarts'], restarts + 1)
+        # The replacement worker keeps serving jobs
+        self.assertEqual(self.pool.submit(operator.mul, 6, 7).result(timeout=30), 42)
+
+    def test_crashed_worker_is_replaced(self):
+        future = self.pool.submit(os._exit, 1)
+        with self.assertRaises(VoiceSynthesisError):
+            future.result(timeout=30)
+        self.assertEqual(self.pool.submit(operator.add, 2, 2).result(timeout=30), 4)
+
+    def test_unpicklable_job_fails_its_future(self):
+        future = self.pool.submit(lambda: None)
+        with self.assertRaises(VoiceSynthesisError):
+            future.result(timeout=30)
+        self.assertEqual(self.pool.submit(operator.add, 1, 1).result(timeout=30), 2)
+
+    def test_result_waits_at_most_wait_timeout(self):
+        future = self.pool.submit(time.sleep, 1)
+        with self.assertRaises(tts_workers.TTSJobTimeout):
+            self.pool.result(future, timeout=0.05)
+        future.result(timeout=30)
+
+    def test_back_pressure_when_queue_is_full(self):
+        # Occupy both workers, then fill the queue
+        running = [self.pool.submit(time.sleep, 1) for _ in range(2)]
+        deadline = time.time() + 30
+        while self.pool.queued() and time.time() < deadline:
+            time.sleep(0.01)
+        queued = [self.pool.submit(time.sleep, 0) for _ in range(2)]
+        with self.assertRaises(tts_workers.TTSQueueFull):
+            self.pool.submit(time.sleep, 0)
+        for future in running + queued:
+            future.result(timeout=30)
+
+class TestWorkersDisabled(unittest.TestCase):
+    def test_no_pool_without_workers(self):
+        self.assertEqual(tts_workers.Config.TTS_WORKERS, 0)
+        self.assertIsNone(tts_workers.get_tts_workers())
+
+    def test_no_pool_inside_a_worker_process(self):
+        with patch.object(tts_workers.Config, 'TTS_WORKERS', 2), \
+             patch.object(tts_workers.multiprocessing, 'parent_process', return_value=object()):
+            self.assertIsNone(tts_workers.get_tts_workers())
+        self.assertIsNone(tts_workers._tts_workers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import unittest
+import os
+import tempfile
+import threading
+import importlib.util
+
+VOICE_API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'voice-api'))
+
+def load_voice_api_module(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(VOICE_API_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+otp_store = load_voice_api_module('voice_api_otp_store', os.path.join('utils', 'otp_store.py'))
+
+RECORD = {
+    'otp': '123456',
+    'user_id': 'user001',
+    'created_at': '2030-01-01T00:00:00',
+    'expires_at': '2030-01-01T00:05:00',
+    'attempts': 0,
+    'verified': False
+}
+
+class OTPStoreContract:
+    def test_put_and_get(self):
+        self.store.put('+15550001', RECORD)
+        record = self.store.get('+15550001')
+        self.assertEqual(record['otp'], '123456')
+        self.assertEqual(record['user_id'], 'user001')
+        self.assertFalse(record['verified'])
+        self.assertIsNone(self.store.get('+15550002'))
+
+    def test_update(self):
+        self.store.put('+15550001', RECORD)
+        updated = self.store.update('+15550001', {'verified': True, 'verified_at': '2030-01-01T00:01:00'})
+        self.assertTrue(updated['verified'])
+        self.assertEqual(updated['verified_at'], '2030-01-01T00:01:00')
+        self.assertIsNone(self.store.update('+15550002', {'attempts': 1}))
+
+    def test_delete(self):
+        self.store.put('+15550001', RECORD)
+        self.assertTrue(self.store.delete('+15550001'))
+        self.assertFalse(self.store.delete('+15550001'))
+        self.assertIsNone(self.store.get('+15550001'))
+
+class TestJsonOTPStore(OTPStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = otp_store.JsonOTPStore(os.path.join(self.tmpdir.name, 'otps.json'))
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+class TestShardedJsonOTPStore(OTPStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = otp_store.ShardedJsonOTPStore(os.path.join(self.tmpdir.name, 'otps'), shard_count=4)
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_records_spread_over_shards(self):
+        for i in range(40):
+            self.store.put(f'+1555{i:04d}', RECORD)
+        sizes = [len(shard.load_otps()) for shard in self.store.shards]
+        self.assertEqual(sum(sizes), 40)
+        self.assertTrue(all(sizes))
+        self.assertEqual(len(self.store.load_otps()), 40)
+
+    def test_manifest_fixes_shard_count(self):
+        reopened = otp_store.ShardedJsonOTPStore(self.store.directory, shard_count=8)
+        self.assertEqual(len(reopened.shards), 4)
+
+class TestSQLiteOTPStore(OTPStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = otp_store.SQLiteOTPStore(os.path.join(self.tmpdir.name, 'otps.db'))
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+    def test_expired_rows_are_purged_on_writes(self):
+        self.store.purge_every = 3
+        expired = dict(RECORD, expires_at='2000-01-01T00:00:00')
+        self.store.put('+15550001', expired)
+        self.store.put('+15550002', expired)
+        self.store.put('+15550003', RECORD)
+        count = self.store._connection().execute('SELECT COUNT(*) FROM otps').fetchone()[0]
+        self.assertEqual(count, 1)
+        self.assertIsNotNone(self.store.get('+15550003'))
+
+    def test_wal_mode_enabled(self):
+        mode = self.store._connection().execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_lookup_uses_index(self):
+        plan = self.store._connection().execute(
+            'EXPLAIN QUERY PLAN ' + self.store.SELECT_SQL, ('+15550001',)).fetchall()
+        self.assertTrue(any('USING INDEX' in row[3] for row in plan))
+
+    def test_purge_expired(self):
+        self.store.put('+15550001', RECORD)
+        self.store.put('+15550002', dict(RECORD, expires_at='2020-01-01T00:00:00'))
+        self.assertEqual(self.store.purge_expired('2025-01-01T00:00:00'), 1)
+        self.assertIsNotNone(self.store.get('+15550001'))
+
+    def test_concurrent_writers(self):
+        def writer(offset):
+            for i in range(50):
+                self.store.put(f'+1555{offset}{i:03d}', RECORD)
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        count = self.store._connection().execute('SELECT COUNT(*) FROM otps').fetchone()[0]
+        self.assertEqual(count, 200)
+
+class TestJournalOTPStore(OTPStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'otps.journal')
+        self.store = otp_store.JournalOTPStore(self.path, compact_interval=0)
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_one_line_per_change(self):
+        self.store.put('+15550001', RECORD)
+        self.store.update('+15550001', {'attempts': 1})
+        self.store.delete('+15550001')
+        with open(self.path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_index_rebuilt_on_startup(self):
+        self.store.put('+15550001', RECORD)
+        self.store.update('+15550001', {'attempts': 2})
+        self.store.put('+15550002', RECORD)
+        self.store.delete('+15550002')
+        self.store.close()
+        with open(self.path, 'a') as f:
+            f.write('{"op":"put","k":"+1555')  # torn write
+        self.store = otp_store.JournalOTPStore(self.path, compact_interval=0)
+        self.assertEqual(self.store.get('+15550001')['attempts'], 2)
+        self.assertIsNone(self.store.get('+15550002'))
+
+    def test_compact_drops_expired_and_verified(self):
+        self.store.put('+15550001', RECORD)
+        self.store.put('+15550002', dict(RECORD, expires_at='2020-01-01T00:00:00'))
+        self.store.put('+15550003', RECORD)
+        self.store.update('+15550003', {'verified': True})
+        self.assertEqual(self.store.compact(), 2)
+        with open(self.path) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.store.put('+15550004', RECORD)
+        self.store.close()
+        self.store = otp_store.JournalOTPStore(self.path, compact_interval=0)
+        self.assertIsNotNone(self.store.get('+15550001'))
+        self.assertIsNotNone(self.store.get('+15550004'))
+        self.assertIsNone(self.store.get('+15550002'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import tempfile
+import importlib.util
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+VOICE_API_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'voice-api'))
+
+def load_voice_api_module(name, relative_path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(VOICE_API_DIR, relative_path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+token_store = load_voice_api_module('voice_api_token_store', os.path.join('utils', 'token_store.py'))
+
+RECORD = {
+    'token_hash': 'a' * 64,
+    'user_id': 'user001',
+    'created_at': '2030-01-01T00:00:00',
+    'last_used': None,
+    'revoked': False,
+    'scopes': ['read', 'write']
+}
+
+class TokenStoreContract:
+    def test_put_get_and_find_by_hash(self):
+        self.store.put('token-1', RECORD)
+        self.assertEqual(self.store.get('token-1')['scopes'], ['read', 'write'])
+        token_id, record = self.store.find_by_hash('a' * 64)
+        self.assertEqual(token_id, 'token-1')
+        self.assertEqual(record['user_id'], 'user001')
+        self.assertIsNone(self.store.find_by_hash('b' * 64))
+        self.assertIsNone(self.store.get('token-2'))
+
+    def test_update_and_items(self):
+        self.store.put('token-1', RECORD)
+        self.store.put('token-2', dict(RECORD, token_hash='b' * 64))
+        updated = self.store.update('token-1', {'revoked': True})
+        self.assertTrue(updated['revoked'])
+        self.assertTrue(self.store.find_by_hash('a' * 64)[1]['revoked'])
+        self.assertIsNone(self.store.update('token-3', {'revoked': True}))
+        self.assertEqual(sorted(token_id for token_id, _ in self.store.items()), ['token-1', 'token-2'])
+
+class TestJsonTokenStore(TokenStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = token_store.JsonTokenStore(os.path.join(self.tmp.name, 'data', 'api_tokens.json'))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+@unittest.skipIf(fakeredis is None, 'fakeredis not installed')
+class TestRedisTokenStore(TokenStoreContract, unittest.TestCase):
+    def setUp(self):
+        self.store = token_store.RedisTokenStore(client=fakeredis.FakeRedis())
+
+if __name__ == '__main__':
+    unittest.main()
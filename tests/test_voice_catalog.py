@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from voice_api.services import voice_catalog
+
+VOICES = [
+    SimpleNamespace(id='gmw/en', name='English (Great Britain)', languages=[b'\x05en-gb'], gender='male', age=None),
+    SimpleNamespace(id='gmw/en-US', name='English (America)', languages=['en-us'], gender='VoiceGenderFemale', age=None),
+    SimpleNamespace(id='roa/fr', name='French', languages=['fr-fr'], gender='female', age=None),
+    SimpleNamespace(id='HKEY\\Voices\\TTS_MS_DE_HEDDA', name='Hedda', languages=['de_DE'], gender=None, age=None)
+]
+
+class TestVoiceCatalog(unittest.TestCase):
+    def setUp(self):
+        self.loads = 0
+        self.catalog = voice_catalog.VoiceCatalog(load=self.load, default_gender='female')
+        self.catalog.refresh()
+
+    def load(self):
+        self.loads += 1
+        return VOICES
+
+    def test_indexes(self):
+        self.assertEqual(self.catalog.get('gmw/en-US')['name'], 'English (America)')
+        self.assertEqual(self.catalog.get('french')['id'], 'roa/fr')
+        self.assertEqual(self.catalog.get('tts_ms_de_hedda')['name'], 'Hedda')
+        self.assertIsNone(self.catalog.get('missing'))
+        self.assertEqual([v['id'] for v in self.catalog.voices(language='en')], ['gmw/en', 'gmw/en-US'])
+        self.assertEqual([v['id'] for v in self.catalog.voices(language='de-de')], [VOICES[3].id])
+        self.assertEqual([v['id'] for v in self.catalog.voices(gender='female')], ['gmw/en-US', 'roa/fr'])
+
+    def test_resolve(self):
+        self.assertEqual(self.catalog.resolve('Hedda'), VOICES[3].id)
+        # Unknown or missing voices fall back to the default gender
+        self.assertEqual(self.catalog.resolve(), 'gmw/en-US')
+        self.assertEqual(self.catalog.resolve('missing'), 'gmw/en-US')
+        self.assertEqual(self.catalog.resolve(gender='male'), 'gmw/en')
+        self.assertEqual(self.catalog.resolve(language='fr'), 'roa/fr')
+        # A language without a voice of that gender still gets a voice
+        self.assertEqual(self.catalog.resolve(language='de'), VOICES[3].id)
+
+    def test_loaded_once_and_refreshable(self):
+        for _ in range(5):
+            self.catalog.resolve('French')
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.catalog.refresh(), 4)
+        self.assertEqual(self.loads, 2)
+
+    def test_failed_load_leaves_engine_default(self):
+        catalog = voice_catalog.VoiceCatalog(load=lambda: 1 / 0)
+        catalog.refresh()
+        self.assertIsNone(catalog.resolve('French'))
+        self.assertIn('division', catalog.metrics()['error'])
+
+class TestVoicesEndpoint(unittest.TestCase):
+    def setUp(self):
+        catalog = voice_catalog.VoiceCatalog(load=lambda: VOICES, default_gender='female')
+        catalog.refresh()
+        patcher = patch('blueprints.voices.get_voice_catalog', return_value=catalog)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        from app import app
+        self.client = app.test_client()
+
+    def test_list_voices(self):
+        resp = self.client.get('/api/voices')
+        self.assertEqual(resp.status_code, 200)
+        data = resp.get_json()
+        self.assertEqual(len(data['voices']), 4)
+        self.assertEqual(data['default_voice'], 'gmw/en-US')
+        resp = self.client.get('/api/voices?language=fr')
+        self.assertEqual([v['id'] for v in resp.get_json()['voices']], ['roa/fr'])
+
+    def test_refresh_requires_token(self):
+        self.assertEqual(self.client.post('/api/voices/refresh').status_code, 401)
+        with patch('blueprints.api_tokens.validate_token', return_value=None):
+            resp = self.client.post('/api/voices/refresh', headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(resp.status_code, 401)
+
+    def test_refresh(self):
+        with patch('blueprints.api_tokens.validate_token', return_value={'name': 'ops'}), \
+             patch('blueprints.api_tokens.update_token_usage'):
+            resp = self.client.post('/api/voices/refresh', headers={'Authorization': 'Bearer token'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()['catalog']['voices'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
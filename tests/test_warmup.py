@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import threading
+from unittest.mock import patch
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as root_app
+from voice_api.services import engine_pool, warmup
+
+class FakeEngine:
+    def __init__(self):
+        self.properties = {'rate': 150, 'volume': 1.0, 'voice': None}
+    def getProperty(self, name):
+        return self.properties[name]
+    def setProperty(self, name, value):
+        self.properties[name] = value
+    def isBusy(self):
+        return False
+
+class TestWarmUp(unittest.TestCase):
+    def test_ready_after_all_steps(self):
+        calls = []
+        run = warmup.WarmUp(steps=[('a', lambda: calls.append('a'), None), ('b', lambda: calls.append('b'), 'a')])
+        self.assertEqual(run.status()['status'], 'warming')
+        self.assertTrue(run.run())
+        self.assertEqual(calls, ['a', 'b'])
+        status = run.status()
+        self.assertEqual((status['status'], status['ready']), ('ready', True))
+        self.assertEqual(status['steps']['b']['state'], 'done')
+
+    def test_failed_step_skips_dependents(self):
+        def broken():
+            raise RuntimeError('no driver')
+        run = warmup.WarmUp(steps=[('engines', broken, None), ('catalog', lambda: None, None),
+                                   ('probe', lambda: None, 'engines')], retries=0)
+        self.assertFalse(run.run())
+        steps = run.status()['steps']
+        self.assertEqual(steps['engines'], {'state': 'failed', 'seconds': steps['engines']['seconds'], 'error': 'no driver'})
+        self.assertEqual(steps['catalog']['state'], 'done')
+        self.assertEqual(steps['probe']['state'], 'skipped')
+        self.assertEqual(run.status()['status'], 'failed')
+
+    def test_failed_step_is_retried(self):
+        attempts = []
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError('driver busy')
+        run = warmup.WarmUp(steps=[('engines', flaky, None), ('probe', lambda: None, 'engines')],
+                            retries=2, backoff=0)
+        self.assertTrue(run.run())
+        self.assertEqual(len(attempts), 3)
+        status = run.status()
+        self.assertEqual(status['steps']['engines'], {'state': 'done', 'seconds': status['steps']['engines']['seconds'], 'error': None})
+        self.assertEqual(status['steps']['probe']['state'], 'done')
+
+    def test_warm_engines_fills_the_pool(self):
+        pool = engine_pool.EnginePool(size=3, factory=FakeEngine)
+        with patch.object(warmup, 'get_engine_pool', return_value=pool), \
+             patch.object(warmup, 'get_tts_workers', return_value=None):
+            warmup.warm_engines()
+        self.assertEqual(pool.metrics()['created'], 3)
+        self.assertEqual(pool.metrics()['idle'], 3)
+
+class TestReadyEndpoint(unittest.TestCase):
+    def setUp(self):
+        self.client = root_app.app.test_client()
+
+    def test_503_until_warm(self):
+        release = threading.Event()
+        run = warmup.WarmUp(steps=[('engines', lambda: release.wait(2), None)])
+        with patch.object(root_app, 'get_warmup', return_value=run):
+            run.start()
+            resp = self.client.get('/ready')
+            self.assertEqual(resp.status_code, 503)
+            self.assertEqual(resp.get_json()['status'], 'warming')
+            release.set()
+            run.wait(2)
+            self.assertEqual(self.client.get('/ready').status_code, 200)
+        self.assertEqual(self.client.get('/health').status_code, 200)
+
+    def test_ready_restarts_failed_steps(self):
+        attempts = []
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError('no driver')
+        run = warmup.WarmUp(steps=[('engines', flaky, None)], retries=0)
+        run.run()
+        with patch.object(root_app, 'get_warmup', return_value=run):
+            self.assertEqual(self.client.get('/ready').status_code, 503)
+            run.wait(2)
+            resp = self.client.get('/ready')
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.get_json()['steps']['engines']['state'], 'done')
+        self.assertEqual(len(attempts), 2)
+
+    def test_disabled(self):
+        with patch.object(root_app, 'get_warmup', return_value=None):
+            self.assertEqual(self.client.get('/ready').status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
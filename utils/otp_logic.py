@@ -1,14 +1,31 @@
-import json
 import os
+import hmac
 import secrets
 import datetime
-import pyttsx3
+import logging
+import threading
 import sys
-import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'config'))
 from config import Config
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+from voice_api.plugins.otp_store import resolve_otp_store, start_expiry_reaper, MmapOTPStore
+from voice_api.services.engine_pool import get_engine_pool
+from voice_api.services.voice_catalog import resolve_voice
+from voice_api.services.tts_workers import get_tts_workers
+from voice_api.services.replay_store import get_replay_store, ReplayAudio
+from voice_api.services.otp_pool import render_otp_audio
+from voice_api.services.otp_delivery import DeliveryQueue, DeliveryQueueFull
+from voice_api.utils.custom_exceptions import VoiceSynthesisError
 
+logger = logging.getLogger(__name__)
 OTP_STORE_FILE = Config.OTP_STORE_FILE
+OTP_STORE_BACKEND = Config.OTP_STORE_BACKEND
+if isinstance(resolve_otp_store(OTP_STORE_BACKEND), MmapOTPStore):
+    # The table only holds SHA-256 digests; this app stores and replays the codes
+    raise ValueError("OTP_STORE_BACKEND=mmap is only supported by the voice_api package; use memory, file or redis here.")
+
+# Purge expired OTPs in the background so the store stays bounded
+start_expiry_reaper(OTP_STORE_BACKEND, interval=Config.OTP_REAPER_INTERVAL)
 
 
 def generate_otp():
@@ -19,49 +36,93 @@ def generate_otp():
     """
     return str(secrets.randbelow(900000) + 100000)
 
-def store_otp(user_id, otp):
-    """
-    Stores the OTP for a user with a 5-minute expiration.
-    """
-    if not os.path.exists(OTP_STORE_FILE):
-        with open(OTP_STORE_FILE, 'w') as f:
-            json.dump({}, f)
-
-    with open(OTP_STORE_FILE, 'r+') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            data = {}
-        
-        expiration_time = datetime.datetime.now() + datetime.timedelta(minutes=5)
-        otp_id = f"otp_{user_id}_{otp}"
-        
-        data[otp_id] = {
-            "user_id": user_id,
-            "otp": otp,
-            "expires_at": expiration_time.isoformat()
-        }
-        
-        f.seek(0)
-        json.dump(data, f, indent=2)
-        f.truncate()
-        return otp_id
+def _otp_record(user_id, otp):
+    expiration_time = datetime.datetime.now() + datetime.timedelta(minutes=5)
+    return {
+        "user_id": user_id,
+        "otp": otp,
+        "expires_at": expiration_time.isoformat()
+    }
+
+def store_otp(user_id, otp, audio=None, audio_format=None):
+    """
+    Stores the OTP for a user with a 5-minute expiration. With replays
+    enabled its prompt is rendered now (unless audio is passed in), so
+    replays stream it instead of synthesizing.
+    """
+    # Only the latest OTP per user is kept, so lookups never scan the store
+    record = _otp_record(user_id, otp)
+    resolve_otp_store(OTP_STORE_BACKEND).put(user_id, record)
+    if get_replay_store() and audio is None:
+        audio, audio_format = render_replay_audio(otp)
+    _keep_for_replay(user_id, record, audio, audio_format)
+    return f"otp_{user_id}_{otp}"
+
+def store_otps(otps):
+    """
+    Stores OTPs for many users in a single storage write.
+    Args:
+        otps (dict): Mapping of user_id to OTP.
+    Returns:
+        dict: Mapping of user_id to otp_id.
+    """
+    records = {user_id: _otp_record(user_id, otp) for user_id, otp in otps.items()}
+    resolve_otp_store(OTP_STORE_BACKEND).put_many(records)
+    for user_id, record in records.items():
+        _keep_for_replay(user_id, record)
+    return {user_id: f"otp_{user_id}_{otp}" for user_id, otp in otps.items()}
+
+def render_replay_audio(otp):
+    """
+    (audio, audio_format) of the OTP prompt for the replay store, or
+    (None, None) if it cannot be rendered; the send still goes ahead.
+    """
+    try:
+        rendered = render_otp_audio(otp)
+    except VoiceSynthesisError as e:
+        logger.warning(f"Could not render OTP prompt for replays: {e}")
+        return None, None
+    return rendered.audio, rendered.audio_format
+
+def _keep_for_replay(user_id, record, audio=None, audio_format=None):
+    replay = get_replay_store()
+    if replay:
+        replay.put(user_id, record["otp"], record["expires_at"], audio, audio_format)
 
 def speak_otp(otp):
     """
-    Speaks the OTP aloud.
+    Speaks the OTP aloud, in a TTS worker process when TTS_WORKERS is set.
     """
-    engine = pyttsx3.init()
-    
-    # Set properties
-    engine.setProperty('rate', 150)
-    engine.setProperty('volume', 1.0)
+    workers = get_tts_workers()
+    if workers:
+        return workers.result(workers.submit(_speak_otp_in_process, otp))
+    return _speak_otp_in_process(otp)
+
+def _speak_otp_in_process(otp):
+    # Set properties on a pooled engine instead of initialising one per call
+    with get_engine_pool().engine(rate=150, volume=1.0, voice=resolve_voice()) as engine:
+        logger.info("Speaking OTP")
+        engine.say(f"Your one time password is {', '.join(list(otp))}")
+        engine.runAndWait()
 
-    # Log voice output
-    print(f"Speaking OTP: {', '.join(list(otp))}")
+_delivery_queue = None
+_delivery_queue_lock = threading.Lock()
 
-    engine.say(f"Your one time password is {', '.join(list(otp))}")
-    engine.runAndWait()
+def get_delivery_queue():
+    """The background voice delivery queue, speaking with speak_otp."""
+    global _delivery_queue
+    with _delivery_queue_lock:
+        if _delivery_queue is None:
+            _delivery_queue = DeliveryQueue(deliver=speak_otp)
+    return _delivery_queue
+
+def queue_speak_otp(user_id, otp):
+    """
+    Queues an OTP to be spoken by the background delivery workers.
+    Returns the delivery job; raises DeliveryQueueFull when
+    OTP_DELIVERY_QUEUE_SIZE OTPs are waiting.
+    """
+    return get_delivery_queue().submit(user_id, otp)
 
 def get_stored_otp(user_id):
     """
@@ -69,31 +130,60 @@ def get_stored_otp(user_id):
     Returns:
         str: The OTP if found and not expired, None otherwise.
     """
-    if not os.path.exists(OTP_STORE_FILE):
+    otp_data = resolve_otp_store(OTP_STORE_BACKEND).get(user_id)
+    if not otp_data:
         return None
-
-    with open(OTP_STORE_FILE, 'r') as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            return None
     
-    current_time = datetime.datetime.now()
+    expiration = datetime.datetime.fromisoformat(otp_data["expires_at"])
     
-    # Find the latest valid OTP for this user
-    user_otps = [
-        (otp_data["otp"], datetime.datetime.fromisoformat(otp_data["expires_at"]))
-        for otp_id, otp_data in data.items()
-        if otp_data.get("user_id") == user_id
-    ]
+    if expiration > datetime.datetime.now():
+        return otp_data["otp"]
     
-    if not user_otps:
+    return None
+
+def replay_otp_audio(user_id):
+    """
+    The spoken prompt for a user's live OTP as ReplayAudio, or None.
+    Audio rendered at send time is only decrypted; OTPs sent in a batch,
+    or from before a restart, are rendered on their first replay.
+    """
+    otp_data = resolve_otp_store(OTP_STORE_BACKEND).get(user_id)
+    if not otp_data or datetime.datetime.fromisoformat(otp_data["expires_at"]) <= datetime.datetime.now():
         return None
-    
-    # Get the most recent OTP that's still valid
-    latest_otp, expiration = max(user_otps, key=lambda x: x[1])
-    
-    if expiration > current_time:
-        return latest_otp
-    
-    return None
\ No newline at end of file
+    replay = get_replay_store()
+    if not replay:
+        rendered = render_otp_audio(otp_data["otp"])
+        return ReplayAudio(rendered.audio, rendered.audio_format)
+    replayed = replay.replay(user_id, otp_data["otp"])
+    if replayed is None:
+        # Not held by this process (a restart, another node or an
+        # eviction): keep it from the store record and render it here
+        replay.put(user_id, otp_data["otp"], otp_data["expires_at"])
+        replayed = replay.replay(user_id, otp_data["otp"])
+    return replayed
+
+def consume_otp(user_id, otp):
+    """
+    Check otp against the user's live OTP and consume it in one store
+    transaction, so two concurrent requests cannot both verify it.
+    Returns:
+        bool: True if the OTP matched.
+    """
+    def mutation(records):
+        otp_data = records.get(user_id)
+        if not otp_data:
+            return False
+        if datetime.datetime.fromisoformat(otp_data["expires_at"]) <= datetime.datetime.now():
+            records[user_id] = None
+            return False
+        if not hmac.compare_digest(str(otp_data["otp"]).encode(), str(otp).encode()):
+            return False
+        records[user_id] = None
+        return True
+
+    verified = resolve_otp_store(OTP_STORE_BACKEND).transact({user_id}, mutation)
+    if verified:
+        replay = get_replay_store()
+        if replay:
+            replay.discard(user_id)
+    return verified
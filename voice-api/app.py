@@ -4,9 +4,11 @@ Production-ready Flask app with API token support and web dashboard
 """
 import os
 import sys
+import contextlib
 from flask import Flask, request, jsonify
 from blueprints.api_tokens import api_tokens_bp, validate_api_token
-from blueprints.otp import otp_bp
+from blueprints.otp import otp_bp, engine_pool, render_otp_audio
+from utils.warmup import WarmUp, WARMUP_ENABLED
 import logging
 
 # Configure logging
@@ -27,6 +29,23 @@ app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
 app.register_blueprint(otp_bp)
 app.register_blueprint(api_tokens_bp)
 
+def warm_engines():
+    """Create every engine the pool may hold"""
+    with contextlib.ExitStack() as stack:
+        for _ in range(engine_pool.size):
+            stack.enter_context(engine_pool.engine())
+
+# Load the speech driver and render a probe OTP message before taking traffic
+warmup = WarmUp([
+    ('engines', warm_engines),
+    ('probe', lambda: render_otp_audio('000000'))
+]) if WARMUP_ENABLED else None
+
+def on_startup():
+    """Startup hook, run once by the serving process before it takes traffic"""
+    if warmup:
+        warmup.start()
+
 # Health check endpoint
 @app.route('/health')
 def health_check():
@@ -39,6 +58,18 @@ def health_check():
         ))
     })
 
+# Readiness for load balancers: 503 until warm-up has finished
+@app.route('/ready')
+def readiness_check():
+    """Readiness endpoint; healthy instances may still be warming up"""
+    if warmup is None:
+        return jsonify({'status': 'ready', 'ready': True})
+    status = warmup.status()
+    if not status['ready'] and warmup.retry():
+        # Steps that still failed after their retries get another round
+        status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
 # Protected routes with token validation
 @app.route('/api/protected')
 @validate_api_token
@@ -61,6 +92,8 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
+    on_startup()
+
     # Check for production mode
     is_production = os.getenv('FLASK_ENV') == 'production'
     port = int(os.getenv('PORT', 5000))
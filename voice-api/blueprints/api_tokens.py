@@ -3,32 +3,22 @@ API Token Management Blueprint
 Handles secure API access token generation, listing, and revocation
 """
 import os
-import json
 import uuid
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import Blueprint, request, jsonify, current_app, render_template, redirect, url_for, session
 from utils.security import generate_secure_token
+from utils.security_middleware import hash_token
+from utils.token_store import get_token_store
 
 api_tokens_bp = Blueprint('api_tokens', __name__, url_prefix='/api/tokens')
 
-# Token storage configuration
-TOKEN_STORE_FILE = 'api_tokens.json'
+# Token state lives in the configured token store (json or redis)
 DASHBOARD_PASSWORD = os.getenv('DASHBOARD_PASSWORD', 'letstalk123')
 
 # Ensure data directory exists
 os.makedirs('data', exist_ok=True)
 
-def load_tokens():
-    if not os.path.exists(TOKEN_STORE_FILE):
-        return {}
-    with open(TOKEN_STORE_FILE, 'r') as f:
-        return json.load(f)
-
-def save_tokens(tokens):
-    with open(TOKEN_STORE_FILE, 'w') as f:
-        json.dump(tokens, f, indent=2)
-
 def validate_api_token(f):
     """Decorator to validate API tokens"""
     @wraps(f)
@@ -38,24 +28,16 @@ def validate_api_token(f):
             return jsonify({'error': 'Missing or invalid authorization header'}), 401
         
         token = auth_header.split(' ')[1]
-        tokens = load_tokens()
         
         # Find token by value (hashed for security)
-        token_hash = hash_token(token)
-        token_data = None
-        
-        for token_id, data in tokens.items():
-            if data.get('token_hash') == token_hash:
-                token_data = data
-                break
+        found = get_token_store().find_by_hash(hash_token(token))
+        token_id, token_data = found if found else (None, None)
         
         if not token_data or token_data.get('revoked', False):
             return jsonify({'error': 'Invalid or revoked token'}), 401
         
         # Update last used time
-        token_data['last_used'] = datetime.now().isoformat()
-        tokens[token_id] = token_data
-        save_tokens(tokens)
+        token_data = get_token_store().update(token_id, {'last_used': datetime.now().isoformat()}) or token_data
         
         # Add token info to request context
         request.api_token = token_data
@@ -65,11 +47,6 @@ def validate_api_token(f):
     
     return decorated_function
 
-def hash_token(token):
-    """Hash token for secure storage"""
-    import hashlib
-    return hashlib.sha256(token.encode()).hexdigest()
-
 # API Routes
 @api_tokens_bp.route('', methods=['POST'])
 def create_token():
@@ -83,8 +60,7 @@ def create_token():
     token_id = str(uuid.uuid4())
     
     # Store token metadata
-    tokens = load_tokens()
-    tokens[token_id] = {
+    record = {
         'token_hash': hash_token(token),
         'user_id': user_id,
         'created_at': datetime.now().isoformat(),
@@ -92,12 +68,12 @@ def create_token():
         'revoked': False,
         'scopes': scopes
     }
-    save_tokens(tokens)
+    get_token_store().put(token_id, record)
     
     return jsonify({
         'token_id': token_id,
         'token': token,
-        'created_at': tokens[token_id]['created_at'],
+        'created_at': record['created_at'],
         'scopes': scopes
     }), 201
 
@@ -105,10 +81,9 @@ def create_token():
 def list_tokens():
     """List all tokens for a user"""
     user_id = request.args.get('user_id', 'default_user')
-    tokens = load_tokens()
     
     user_tokens = []
-    for token_id, data in tokens.items():
+    for token_id, data in get_token_store().items():
         if data['user_id'] == user_id and not data.get('revoked', False):
             user_tokens.append({
                 'token_id': token_id,
@@ -122,15 +97,10 @@ def list_tokens():
 @api_tokens_bp.route('/<token_id>', methods=['DELETE'])
 def revoke_token(token_id):
     """Revoke a specific token"""
-    tokens = load_tokens()
-    
-    if token_id not in tokens:
+    revoked = get_token_store().update(token_id, {'revoked': True, 'revoked_at': datetime.now().isoformat()})
+    if revoked is None:
         return jsonify({'error': 'Token not found'}), 404
     
-    tokens[token_id]['revoked'] = True
-    tokens[token_id]['revoked_at'] = datetime.now().isoformat()
-    save_tokens(tokens)
-    
     return jsonify({'message': 'Token revoked successfully'}), 200
 
 # Dashboard Routes
@@ -153,10 +123,9 @@ def dashboard():
     if not session.get('dashboard_authenticated'):
         return redirect(url_for('api_tokens.dashboard_login'))
     
-    tokens = load_tokens()
     token_list = []
     
-    for token_id, data in tokens.items():
+    for token_id, data in get_token_store().items():
         if not data.get('revoked', False):
             token_list.append({
                 'id': token_id,
@@ -182,16 +151,14 @@ def dashboard_create_token():
     token = generate_secure_token(32)
     token_id = str(uuid.uuid4())
     
-    tokens = load_tokens()
-    tokens[token_id] = {
+    get_token_store().put(token_id, {
         'token_hash': hash_token(token),
         'user_id': user_id,
         'created_at': datetime.now().isoformat(),
         'last_used': None,
         'revoked': False,
         'scopes': scopes
-    }
-    save_tokens(tokens)
+    })
     
     return render_template('token_created.html', token=token, token_id=token_id)
 
@@ -201,11 +168,7 @@ def dashboard_revoke_token(token_id):
     if not session.get('dashboard_authenticated'):
         return redirect(url_for('api_tokens.dashboard_login'))
     
-    tokens = load_tokens()
-    if token_id in tokens:
-        tokens[token_id]['revoked'] = True
-        tokens[token_id]['revoked_at'] = datetime.now().isoformat()
-        save_tokens(tokens)
+    get_token_store().update(token_id, {'revoked': True, 'revoked_at': datetime.now().isoformat()})
     
     return redirect(url_for('api_tokens.dashboard'))
 
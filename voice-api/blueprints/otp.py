@@ -5,72 +5,92 @@ Handles voice-based 2FA authentication via pyttsx3
 import os
 import json
 import uuid
+import tempfile
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify, current_app
-import pyttsx3
+from flask import Blueprint, Response, request, jsonify, current_app
 from utils.security_middleware import require_token
+from utils.otp_store import create_otp_store
+from utils.engine_pool import EnginePool
+from utils.otp_delivery import DeliveryQueue, DeliveryQueueFull, OTP_DELIVERY_MODE
+from utils.replay_store import ReplayAudioStore, ReplayAudio, OTP_REPLAY_ENABLED
 
 otp_bp = Blueprint('otp', __name__, url_prefix='/calls')
 
 # OTP storage configuration
-OTP_STORE_FILE = os.path.join('data', 'otps.json')
 VOICE_SETTINGS_FILE = os.path.join('data', 'voice_settings.json')
 
 # Ensure data directory exists
 os.makedirs('data', exist_ok=True)
 
-def get_voice_engine():
-    """Initialize and return TTS engine"""
+# Backend is chosen with OTP_STORE_BACKEND (json, sqlite or journal)
+otp_store = create_otp_store()
+
+_voice_settings = {'mtime': None, 'settings': {}}
+
+def load_voice_settings():
+    """Voice settings, re-read only when voice_settings.json changes"""
     try:
-        engine = pyttsx3.init()
-        
-        # Load voice settings if they exist
-        if os.path.exists(VOICE_SETTINGS_FILE):
+        mtime = os.path.getmtime(VOICE_SETTINGS_FILE)
+    except OSError:
+        return {}
+    if mtime != _voice_settings['mtime']:
+        try:
             with open(VOICE_SETTINGS_FILE, 'r') as f:
                 settings = json.load(f)
-                engine.setProperty('rate', settings.get('rate', 150))
-                engine.setProperty('volume', settings.get('volume', 0.9))
-        else:
-            # Default settings
-            engine.setProperty('rate', 150)
-            engine.setProperty('volume', 0.9)
-        
-        return engine
-    except Exception as e:
-        current_app.logger.error(f"Failed to initialize TTS engine: {e}")
-        return None
+        except (OSError, ValueError):
+            return _voice_settings['settings']
+        _voice_settings.update(mtime=mtime, settings=settings)
+    return _voice_settings['settings']
 
-def load_otps():
-    """Load OTPs from storage"""
-    if not os.path.exists(OTP_STORE_FILE):
-        return {}
-    
-    try:
-        with open(OTP_STORE_FILE, 'r') as f:
-            return json.load(f)
-    except Exception:
-        return {}
+# Engines are created once and reused across requests
+engine_pool = EnginePool(settings=load_voice_settings)
 
-def save_otps(otps):
-    """Save OTPs to storage"""
-    with open(OTP_STORE_FILE, 'w') as f:
-        json.dump(otps, f, indent=2)
+def get_voice_engine():
+    """Check out a pooled TTS engine; use as a context manager"""
+    return engine_pool.engine()
 
 def generate_otp(length=6):
     """Generate a random OTP"""
     import secrets
     return ''.join([str(secrets.randbelow(10)) for _ in range(length)])
 
+def deliver_otp(app, phone_number, otp):
+    """Speak an OTP from a delivery worker thread"""
+    with app.app_context():
+        return speak_otp(phone_number, otp)
+
+# Speech jobs for async delivery (OTP_DELIVERY_MODE=async or "async": true)
+delivery_queue = DeliveryQueue(deliver_otp)
+
+def otp_message(otp):
+    return f"Hello. Your verification code is {otp}. Repeat, your code is {otp}."
+
+def render_otp_audio(otp):
+    """Render the OTP message to WAV bytes for replays"""
+    fd, path = tempfile.mkstemp(suffix='.wav')
+    os.close(fd)
+    try:
+        with get_voice_engine() as engine:
+            engine.save_to_file(otp_message(otp), path)
+            engine.runAndWait()
+        with open(path, 'rb') as f:
+            return ReplayAudio(f.read(), 'wav')
+    finally:
+        os.remove(path)
+
+# Encrypted replay audio per phone number, purged on verify or expiry
+replay_store = ReplayAudioStore(render_otp_audio) if OTP_REPLAY_ENABLED else None
+
+def discard_replay_audio(phone_number):
+    if replay_store:
+        replay_store.discard(phone_number)
+
 def speak_otp(phone_number, otp):
     """Speak OTP using TTS"""
-    engine = get_voice_engine()
-    if not engine:
-        return False
-    
     try:
-        message = f"Hello. Your verification code is {otp}. Repeat, your code is {otp}."
-        engine.say(message)
-        engine.runAndWait()
+        with get_voice_engine() as engine:
+            engine.say(otp_message(otp))
+            engine.runAndWait()
         return True
     except Exception as e:
         current_app.logger.error(f"Failed to speak OTP: {e}")
@@ -90,18 +110,33 @@ def initiate_otp():
     
     # Generate OTP
     otp = generate_otp()
+    expires_at = datetime.now() + timedelta(minutes=5)
     
     # Store OTP with expiration
-    otps = load_otps()
-    otps[phone_number] = {
+    otp_store.put(phone_number, {
         'otp': otp,
         'user_id': user_id,
         'created_at': datetime.now().isoformat(),
-        'expires_at': (datetime.now() + timedelta(minutes=5)).isoformat(),
+        'expires_at': expires_at.isoformat(),
         'attempts': 0,
         'verified': False
-    }
-    save_otps(otps)
+    })
+    if replay_store:
+        replay_store.put(phone_number, otp, expires_at)
+    
+    if data.get('async', OTP_DELIVERY_MODE == 'async'):
+        # Hand the slow TTS call to a delivery worker and return at once
+        try:
+            job = delivery_queue.submit(phone_number, current_app._get_current_object(), phone_number, otp)
+        except DeliveryQueueFull as e:
+            return jsonify({'error': str(e)}), 503
+        return jsonify({
+            'message': 'OTP queued for voice delivery',
+            'job_id': job['job_id'],
+            'status': job['state'],
+            'status_url': f'/calls/otp/status/{phone_number}',
+            'expires_in': 300
+        }), 202
     
     # Speak OTP via TTS
     success = speak_otp(phone_number, otp)
@@ -118,45 +153,6 @@ def initiate_otp():
 @otp_bp.route('/otp/verify', methods=['POST'])
 @require_token(scopes=['read', 'write'])
 def verify_otp():
-
-@otp_bp.route('/otp/replay', methods=['POST'])
-@require_token(scopes=['read', 'write'])
-def replay_otp():
-    """Replay the last OTP for the phone number"""
-    data = request.get_json()
-    
-    if not data or 'phone_number' not in data:
-        return jsonify({'error': 'Phone number is required'}), 400
-    
-    phone_number = data['phone_number']
-    
-    otps = load_otps()
-    
-    if phone_number not in otps:
-        return jsonify({'error': 'No OTP found for this phone number'}), 404
-    
-    otp_data = otps[phone_number]
-    
-    # Check if OTP has expired
-    expires_at = datetime.fromisoformat(otp_data['expires_at'])
-    if datetime.now() > expires_at:
-        del otps[phone_number]
-        save_otps(otps)
-        return jsonify({'error': 'OTP has expired'}), 400
-    
-    # Check if already verified (optional, depending on policy)
-    if otp_data.get('verified', False):
-        return jsonify({'error': 'OTP already verified'}), 400
-    
-    # Speak the OTP again
-    success = speak_otp(phone_number, otp_data['otp'])
-    
-    if success:
-        otp_data['replayed_at'] = datetime.now().isoformat()
-        save_otps(otps)
-        return jsonify({'message': 'OTP replayed successfully'}), 200
-    else:
-        return jsonify({'error': 'Failed to replay OTP'}), 500
     """Verify OTP code"""
     data = request.get_json()
     
@@ -166,18 +162,16 @@ def replay_otp():
     phone_number = data['phone_number']
     provided_otp = data['otp']
     
-    otps = load_otps()
+    otp_data = otp_store.get(phone_number)
     
-    if phone_number not in otps:
+    if not otp_data:
         return jsonify({'error': 'No OTP found for this phone number'}), 404
     
-    otp_data = otps[phone_number]
-    
     # Check if OTP has expired
     expires_at = datetime.fromisoformat(otp_data['expires_at'])
     if datetime.now() > expires_at:
-        del otps[phone_number]
-        save_otps(otps)
+        otp_store.delete(phone_number)
+        discard_replay_audio(phone_number)
         return jsonify({'error': 'OTP has expired'}), 400
     
     # Check if already verified
@@ -186,34 +180,78 @@ def replay_otp():
     
     # Check attempts
     if otp_data['attempts'] >= 3:
-        del otps[phone_number]
-        save_otps(otps)
+        otp_store.delete(phone_number)
+        discard_replay_audio(phone_number)
         return jsonify({'error': 'Maximum attempts exceeded'}), 400
     
     # Verify OTP
     if provided_otp == otp_data['otp']:
-        otp_data['verified'] = True
-        otp_data['verified_at'] = datetime.now().isoformat()
-        save_otps(otps)
+        otp_store.update(phone_number, {
+            'verified': True,
+            'verified_at': datetime.now().isoformat()
+        })
+        discard_replay_audio(phone_number)
         
         return jsonify({
             'message': 'OTP verified successfully',
             'user_id': otp_data['user_id']
         }), 200
     else:
-        otp_data['attempts'] += 1
-        save_otps(otps)
+        otp_store.update(phone_number, {'attempts': otp_data['attempts'] + 1})
         return jsonify({'error': 'Invalid OTP'}), 400
 
+@otp_bp.route('/otp/replay', methods=['POST'])
+@require_token(scopes=['read', 'write'])
+def replay_otp():
+    """Replay the last OTP for the phone number"""
+    data = request.get_json()
+    
+    if not data or 'phone_number' not in data:
+        return jsonify({'error': 'Phone number is required'}), 400
+    
+    phone_number = data['phone_number']
+    
+    otp_data = otp_store.get(phone_number)
+    
+    if not otp_data:
+        return jsonify({'error': 'No OTP found for this phone number'}), 404
+    
+    # Check if OTP has expired
+    expires_at = datetime.fromisoformat(otp_data['expires_at'])
+    if datetime.now() > expires_at:
+        otp_store.delete(phone_number)
+        discard_replay_audio(phone_number)
+        return jsonify({'error': 'OTP has expired'}), 400
+    
+    # Check if already verified (optional, depending on policy)
+    if otp_data.get('verified', False):
+        return jsonify({'error': 'OTP already verified'}), 400
+    
+    # Stream the stored audio; only the first replay of an OTP renders it
+    try:
+        if replay_store:
+            replayed = replay_store.replay(phone_number, otp_data['otp'])
+            if replayed is None:
+                # Sent before a restart: keep it from now on
+                replay_store.put(phone_number, otp_data['otp'], otp_data['expires_at'])
+                replayed = replay_store.replay(phone_number, otp_data['otp'])
+        else:
+            replayed = render_otp_audio(otp_data['otp'])
+    except Exception as e:
+        current_app.logger.error(f"Failed to replay OTP: {e}")
+        return jsonify({'error': 'Failed to replay OTP'}), 500
+    
+    otp_store.update(phone_number, {'replayed_at': datetime.now().isoformat()})
+    return Response(replayed.audio, mimetype='audio/wav', headers={'Cache-Control': 'no-store'})
+
 @otp_bp.route('/otp/status/<phone_number>', methods=['GET'])
 def get_otp_status(phone_number):
     """Get OTP status for a phone number"""
-    otps = load_otps()
+    otp_data = otp_store.get(phone_number)
     
-    if phone_number not in otps:
+    if not otp_data:
         return jsonify({'error': 'No OTP found'}), 404
     
-    otp_data = otps[phone_number]
     expires_at = datetime.fromisoformat(otp_data['expires_at'])
     is_expired = datetime.now() > expires_at
     
@@ -223,5 +261,6 @@ def get_otp_status(phone_number):
         'expires_at': otp_data['expires_at'],
         'is_expired': is_expired,
         'verified': otp_data.get('verified', False),
-        'attempts': otp_data['attempts']
+        'attempts': otp_data['attempts'],
+        'delivery': delivery_queue.latest(phone_number)
     }), 200
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Pool of reusable pyttsx3 engines
+Engines are created once and checked out per call instead of running
+pyttsx3.init() on every request. Each checkout resets rate, volume and voice
+from the current voice settings; an engine is replaced after max_uses calls,
+after it raises, or when its health check fails.
+"""
+import os
+import threading
+import contextlib
+from collections import deque
+import pyttsx3
+
+TTS_ENGINE_POOL_SIZE = int(os.getenv('TTS_ENGINE_POOL_SIZE', 1))
+TTS_ENGINE_MAX_USES = int(os.getenv('TTS_ENGINE_MAX_USES', 100))
+TTS_ENGINE_CHECKOUT_TIMEOUT = float(os.getenv('TTS_ENGINE_CHECKOUT_TIMEOUT', 30))
+
+DEFAULT_SETTINGS = {'rate': 150, 'volume': 0.9}
+
+
+class _PooledEngine:
+    def __init__(self, engine):
+        self.engine = engine
+        self.uses = 0
+        self.default_voice = engine.getProperty('voice')
+
+
+class EnginePool:
+    """Bounded set of TTS engines shared by request and delivery threads"""
+
+    def __init__(self, settings=None, size=TTS_ENGINE_POOL_SIZE, max_uses=TTS_ENGINE_MAX_USES,
+                 timeout=TTS_ENGINE_CHECKOUT_TIMEOUT, factory=None):
+        self.settings = settings or (lambda: {})
+        self.size = size
+        self.max_uses = max_uses
+        self.timeout = timeout
+        # pyttsx3.init() returns one shared engine per driver, so build
+        # engines directly to give each pool slot its own
+        self.factory = factory or pyttsx3.Engine
+        self._idle = deque()
+        self._total = 0
+        self._available = threading.Condition()
+
+    def _checkout(self):
+        with self._available:
+            if not self._available.wait_for(lambda: self._idle or self._total < self.size, self.timeout):
+                raise TimeoutError('No TTS engine became available')
+            if self._idle:
+                return self._idle.popleft()
+            self._total += 1
+        try:
+            return _PooledEngine(self.factory())
+        except Exception:
+            with self._available:
+                self._total -= 1
+                self._available.notify()
+            raise
+
+    def _checkin(self, pooled):
+        with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    def _discard(self, pooled):
+        try:
+            pooled.engine.stop()
+        except Exception:
+            pass
+        with self._available:
+            self._total -= 1
+            self._available.notify()
+
+    def _healthy(self, pooled):
+        try:
+            return not pooled.engine.isBusy() and pooled.engine.getProperty('rate') is not None
+        except Exception:
+            return False
+
+    @contextlib.contextmanager
+    def engine(self):
+        """Check out an engine reset to the current voice settings"""
+        while True:
+            pooled = self._checkout()
+            if pooled.uses == 0 or self._healthy(pooled):
+                break
+            self._discard(pooled)
+        try:
+            settings = dict(DEFAULT_SETTINGS, **self.settings())
+            pooled.engine.setProperty('rate', settings['rate'])
+            pooled.engine.setProperty('volume', settings['volume'])
+            pooled.engine.setProperty('voice', settings.get('voice') or pooled.default_voice)
+            yield pooled.engine
+        except Exception:
+            self._discard(pooled)
+            raise
+        pooled.uses += 1
+        if pooled.uses >= self.max_uses:
+            self._discard(pooled)
+        else:
+            self._checkin(pooled)
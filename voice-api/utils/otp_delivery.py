@@ -0,0 +1,119 @@
+"""
+Background OTP voice delivery
+Requests enqueue a speech job and return straight away; worker threads run
+the slow TTS call and record each job's state (queued, speaking, delivered,
+failed) and timings for the status endpoint.
+This mirrors src/voice_api/services/otp_delivery.py. voice-api is deployed
+on its own and reads its settings from the environment, so it keeps a copy
+rather than importing the package; fix both together.
+"""
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+OTP_DELIVERY_MODE = os.getenv('OTP_DELIVERY_MODE', 'sync')
+OTP_DELIVERY_WORKERS = int(os.getenv('OTP_DELIVERY_WORKERS', 1))
+OTP_DELIVERY_QUEUE_SIZE = int(os.getenv('OTP_DELIVERY_QUEUE_SIZE', 1000))
+OTP_DELIVERY_HISTORY = int(os.getenv('OTP_DELIVERY_HISTORY', 10000))
+
+QUEUED = 'queued'
+SPEAKING = 'speaking'
+DELIVERED = 'delivered'
+FAILED = 'failed'
+
+
+class DeliveryQueueFull(Exception):
+    """Raised when no more speech jobs can be queued"""
+
+
+class DeliveryQueue:
+    """Bounded job queue drained by a small pool of delivery threads"""
+
+    def __init__(self, deliver, workers=OTP_DELIVERY_WORKERS,
+                 max_queued=OTP_DELIVERY_QUEUE_SIZE, history=OTP_DELIVERY_HISTORY):
+        self.deliver = deliver
+        self.workers = workers
+        self.history = history
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._latest = {}
+        # job_id -> key, so trimming a job can drop its _latest entry
+        self._job_keys = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, phone_number, *args):
+        """Queue deliver(*args); returns a snapshot of the new job"""
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'state': QUEUED,
+            'queued_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'queue_seconds': None,
+            'speak_seconds': None,
+            'error': None
+        }
+        with self._lock:
+            self._start_workers()
+            try:
+                self._queue.put_nowait((job, time.perf_counter(), args))
+            except queue.Full:
+                raise DeliveryQueueFull('Voice delivery queue is full')
+            self._jobs[job['job_id']] = job
+            self._latest[phone_number] = job['job_id']
+            self._job_keys[job['job_id']] = phone_number
+            self._trim()
+            return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def latest(self, phone_number):
+        """Most recent job for a phone number, or None"""
+        with self._lock:
+            job = self._jobs.get(self._latest.get(phone_number))
+            return dict(job) if job is not None else None
+
+    def _trim(self):
+        # Forget the oldest finished jobs once the history is full
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.history:
+                break
+            if self._jobs[job_id]['state'] in (DELIVERED, FAILED):
+                del self._jobs[job_id]
+                key = self._job_keys.pop(job_id)
+                if self._latest.get(key) == job_id:
+                    del self._latest[key]
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.update(changes)
+
+    def _run(self):
+        while True:
+            job, queued, args = self._queue.get()
+            started = time.perf_counter()
+            self._update(job, state=SPEAKING, started_at=datetime.now().isoformat(),
+                         queue_seconds=round(started - queued, 3))
+            try:
+                delivered = bool(self.deliver(*args))
+                error = None if delivered else 'Failed to speak OTP'
+            except Exception as e:
+                delivered, error = False, str(e)
+            self._update(job, state=DELIVERED if delivered else FAILED, error=error,
+                         finished_at=datetime.now().isoformat(),
+                         speak_seconds=round(time.perf_counter() - started, 3))
+            self._queue.task_done()
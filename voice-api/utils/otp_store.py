@@ -0,0 +1,406 @@
+"""
+OTP storage backends for the voice OTP blueprint
+Records are keyed by phone number; the JSON backend keeps the original
+data/otps.json layout, the SQLite backend stores one row per OTP and the
+journal backend appends one line per change. Pointing OTP_STORE_FILE at a
+directory splits the JSON backend into shard files.
+"""
+import os
+import json
+import zlib
+import sqlite3
+import threading
+from datetime import datetime
+
+OTP_STORE_BACKEND = os.getenv('OTP_STORE_BACKEND', 'json')
+OTP_STORE_FILE = os.getenv('OTP_STORE_FILE', os.path.join('data', 'otps.json'))
+OTP_STORE_SHARDS = int(os.getenv('OTP_STORE_SHARDS', 16))
+OTP_DB_FILE = os.getenv('OTP_DB_FILE', os.path.join('data', 'otps.db'))
+OTP_JOURNAL_FILE = os.getenv('OTP_JOURNAL_FILE', os.path.join('data', 'otps.journal'))
+OTP_COMPACT_INTERVAL = int(os.getenv('OTP_COMPACT_INTERVAL', 60))
+# The SQLite backend deletes expired rows once every this many writes
+OTP_PURGE_EVERY = int(os.getenv('OTP_PURGE_EVERY', 100))
+
+
+class OTPStore:
+    """Interface shared by all OTP storage backends"""
+
+    def get(self, phone_number):
+        raise NotImplementedError
+
+    def put(self, phone_number, record):
+        raise NotImplementedError
+
+    def update(self, phone_number, changes):
+        raise NotImplementedError
+
+    def delete(self, phone_number):
+        raise NotImplementedError
+
+
+class JsonOTPStore(OTPStore):
+    """Whole-file JSON store (original behaviour)"""
+
+    def __init__(self, path=OTP_STORE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load_otps(self):
+        """Load OTPs from storage"""
+        if not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def save_otps(self, otps):
+        """Save OTPs to storage"""
+        with open(self.path, 'w') as f:
+            json.dump(otps, f, indent=2)
+
+    def get(self, phone_number):
+        with self.lock:
+            return self.load_otps().get(phone_number)
+
+    def put(self, phone_number, record):
+        with self.lock:
+            otps = self.load_otps()
+            otps[phone_number] = dict(record)
+            self.save_otps(otps)
+
+    def update(self, phone_number, changes):
+        with self.lock:
+            otps = self.load_otps()
+            if phone_number not in otps:
+                return None
+            otps[phone_number].update(changes)
+            self.save_otps(otps)
+            return otps[phone_number]
+
+    def delete(self, phone_number):
+        with self.lock:
+            otps = self.load_otps()
+            if otps.pop(phone_number, None) is None:
+                return False
+            self.save_otps(otps)
+            return True
+
+
+class ShardedJsonOTPStore(OTPStore):
+    """
+    JSON store split over a directory of shard files.
+    The shard is picked by a CRC32 of the phone number, and each shard is a
+    JsonOTPStore with its own lock, so a write rewrites and locks only 1/N
+    of the data. The shard count is kept in the directory's shards.json
+    manifest (scripts/reshard_otp_store.py changes it).
+    """
+
+    MANIFEST = 'shards.json'
+
+    def __init__(self, directory=OTP_STORE_FILE, shard_count=OTP_STORE_SHARDS):
+        self.directory = directory.rstrip(os.sep)
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = os.path.join(self.directory, self.MANIFEST)
+        if os.path.exists(manifest):
+            with open(manifest, 'r') as f:
+                shard_count = json.load(f)['shard_count']
+        else:
+            with open(manifest, 'w') as f:
+                json.dump({'shard_count': shard_count}, f)
+        self.shards = [
+            JsonOTPStore(os.path.join(self.directory, f'shard_{index:03d}.json'))
+            for index in range(shard_count)
+        ]
+
+    def shard_for(self, phone_number):
+        return self.shards[zlib.crc32(str(phone_number).encode()) % len(self.shards)]
+
+    def load_otps(self):
+        """Load OTPs from every shard"""
+        otps = {}
+        for shard in self.shards:
+            with shard.lock:
+                otps.update(shard.load_otps())
+        return otps
+
+    def get(self, phone_number):
+        return self.shard_for(phone_number).get(phone_number)
+
+    def put(self, phone_number, record):
+        self.shard_for(phone_number).put(phone_number, record)
+
+    def update(self, phone_number, changes):
+        return self.shard_for(phone_number).update(phone_number, changes)
+
+    def delete(self, phone_number):
+        return self.shard_for(phone_number).delete(phone_number)
+
+
+class SQLiteOTPStore(OTPStore):
+    """
+    SQLite store in WAL mode.
+    Each thread gets its own connection, so waitress threads (and separate
+    worker processes) read concurrently and only serialize on the short
+    write transaction itself.
+    """
+
+    COLUMNS = ('phone_number', 'user_id', 'otp', 'created_at', 'expires_at',
+               'attempts', 'verified', 'verified_at', 'replayed_at')
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS otps (
+            phone_number TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            otp TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            expires_at TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            verified INTEGER NOT NULL DEFAULT 0,
+            verified_at TEXT,
+            replayed_at TEXT
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_otps_user_id ON otps (user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_otps_expires_at ON otps (expires_at)",
+    )
+    SELECT_SQL = f"SELECT {', '.join(COLUMNS)} FROM otps WHERE phone_number = ?"
+    UPSERT_SQL = (
+        f"INSERT OR REPLACE INTO otps ({', '.join(COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+    )
+    DELETE_SQL = "DELETE FROM otps WHERE phone_number = ?"
+    PURGE_SQL = "DELETE FROM otps WHERE expires_at <= ?"
+
+    def __init__(self, path=OTP_DB_FILE, timeout=30.0, purge_every=OTP_PURGE_EVERY):
+        self.path = path
+        self.timeout = timeout
+        self.purge_every = purge_every
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        conn = self._connection()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connection(self):
+        """Return this thread's connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout,
+                                   check_same_thread=False, cached_statements=64)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={int(self.timeout * 1000)}')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _to_record(self, row):
+        record = dict(row)
+        record['verified'] = bool(record['verified'])
+        for optional in ('verified_at', 'replayed_at'):
+            if record[optional] is None:
+                del record[optional]
+        del record['phone_number']
+        return record
+
+    def get(self, phone_number):
+        row = self._connection().execute(self.SELECT_SQL, (phone_number,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def put(self, phone_number, record):
+        values = dict(record, phone_number=phone_number)
+        values['attempts'] = values.get('attempts', 0)
+        values['verified'] = int(values.get('verified', False))
+        conn = self._connection()
+        with conn:
+            conn.execute(self.UPSERT_SQL, tuple(values.get(c) for c in self.COLUMNS))
+        self._maybe_purge()
+
+    def _maybe_purge(self):
+        # Expired rows are never read again; sweep them on the write path
+        # so the table stays bounded without a background thread
+        if self.purge_every <= 0:
+            return
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.purge_every == 0
+        if due:
+            self.purge_expired(datetime.now().isoformat())
+
+    def update(self, phone_number, changes):
+        columns = [c for c in changes if c in self.COLUMNS and c != 'phone_number']
+        if len(columns) != len(changes):
+            raise ValueError(f"Unknown OTP fields: {sorted(set(changes) - set(columns))}")
+        values = [int(changes[c]) if c == 'verified' else changes[c] for c in columns]
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"UPDATE otps SET {', '.join(f'{c} = ?' for c in columns)} WHERE phone_number = ?",
+                (*values, phone_number)
+            )
+        if cursor.rowcount == 0:
+            return None
+        return self.get(phone_number)
+
+    def delete(self, phone_number):
+        conn = self._connection()
+        with conn:
+            return conn.execute(self.DELETE_SQL, (phone_number,)).rowcount > 0
+
+    def purge_expired(self, now_iso):
+        """Delete every OTP that expired at or before now_iso (uses the expiry index)"""
+        conn = self._connection()
+        with conn:
+            return conn.execute(self.PURGE_SQL, (now_iso,)).rowcount
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+class JournalOTPStore(OTPStore):
+    """
+    Append-only journal with an in-memory index.
+    Every change is written as one compact JSON line, so the cost of a
+    write does not depend on how many OTPs are live. The index is rebuilt
+    by replaying the journal on startup, and a background thread rewrites
+    the journal without expired or verified entries.
+    """
+
+    def __init__(self, path=OTP_JOURNAL_FILE, compact_interval=OTP_COMPACT_INTERVAL):
+        self.path = path
+        self.compact_interval = compact_interval
+        self.lock = threading.Lock()
+        self.index = {}
+        self.journal_records = 0
+        self._replay()
+        self._journal = open(self.path, 'a', encoding='utf-8')
+        self._stop = threading.Event()
+        self._compactor = None
+        if compact_interval > 0:
+            self._compactor = threading.Thread(target=self._compact_loop, daemon=True)
+            self._compactor.start()
+
+    def _replay(self):
+        """Rebuild the index from the journal"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    continue
+                self._apply(entry)
+                self.journal_records += 1
+
+    def _apply(self, entry):
+        key = entry['k']
+        if entry['op'] == 'put':
+            self.index[key] = entry['r']
+        elif entry['op'] == 'update' and key in self.index:
+            self.index[key].update(entry['c'])
+        elif entry['op'] == 'delete':
+            self.index.pop(key, None)
+
+    def _append(self, entry):
+        self._journal.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._journal.flush()
+        self._apply(entry)
+        self.journal_records += 1
+
+    def get(self, phone_number):
+        with self.lock:
+            record = self.index.get(phone_number)
+            return dict(record) if record is not None else None
+
+    def put(self, phone_number, record):
+        with self.lock:
+            self._append({'op': 'put', 'k': phone_number, 'r': dict(record)})
+
+    def update(self, phone_number, changes):
+        with self.lock:
+            if phone_number not in self.index:
+                return None
+            self._append({'op': 'update', 'k': phone_number, 'c': dict(changes)})
+            return dict(self.index[phone_number])
+
+    def delete(self, phone_number):
+        with self.lock:
+            if phone_number not in self.index:
+                return False
+            self._append({'op': 'delete', 'k': phone_number})
+            return True
+
+    def compact(self):
+        """Rewrite the journal with only live, unverified OTPs"""
+        now = datetime.now()
+        with self.lock:
+            live = {
+                key: record for key, record in self.index.items()
+                if not record.get('verified', False)
+                and datetime.fromisoformat(record['expires_at']) > now
+            }
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for key, record in live.items():
+                    f.write(json.dumps({'op': 'put', 'k': key, 'r': record}, separators=(',', ':')) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal.close()
+            os.replace(tmp_path, self.path)
+            self._journal = open(self.path, 'a', encoding='utf-8')
+            dropped = len(self.index) - len(live)
+            self.index = live
+            self.journal_records = len(live)
+            return dropped
+
+    def _has_dead_records(self):
+        now = datetime.now()
+        with self.lock:
+            return any(
+                record.get('verified', False) or datetime.fromisoformat(record['expires_at']) <= now
+                for record in self.index.values()
+            )
+
+    def _compact_loop(self):
+        while not self._stop.wait(self.compact_interval):
+            # Rewrite once stale lines outnumber live ones, or to drop dead OTPs
+            if self.journal_records > 2 * len(self.index) or self._has_dead_records():
+                try:
+                    self.compact()
+                except OSError:
+                    pass
+
+    def close(self):
+        """Stop the compactor and close the journal"""
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self.lock:
+            self._journal.close()
+
+
+def create_otp_store(backend=OTP_STORE_BACKEND):
+    """Build the OTP store for the configured backend"""
+    if backend == 'sqlite':
+        return SQLiteOTPStore()
+    if backend == 'journal':
+        return JournalOTPStore()
+    if backend == 'json':
+        if OTP_STORE_FILE.endswith(os.sep) or os.path.isdir(OTP_STORE_FILE):
+            return ShardedJsonOTPStore()
+        return JsonOTPStore()
+    raise ValueError(f"Unknown OTP store backend: {backend}")
@@ -0,0 +1,138 @@
+"""
+Encrypted audio for OTP replays
+The spoken prompt for each live OTP is kept Fernet-encrypted, keyed by
+phone number, so a replay decrypts and streams it instead of running the
+TTS engine again. Entries go when the OTP is verified or expires, and the
+oldest are evicted once the entry or byte budget is reached.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from cryptography.fernet import Fernet
+
+OTP_REPLAY_ENABLED = os.getenv('OTP_REPLAY_ENABLED', 'true').lower() == 'true'
+OTP_REPLAY_MAX_ENTRIES = int(os.getenv('OTP_REPLAY_MAX_ENTRIES', 10000))
+OTP_REPLAY_MAX_BYTES = int(os.getenv('OTP_REPLAY_MAX_BYTES', 64 * 1024 * 1024))
+# A Fernet key; without one a random key is made per process
+OTP_REPLAY_KEY = os.getenv('OTP_REPLAY_KEY') or None
+
+ReplayAudio = namedtuple('ReplayAudio', ['audio', 'audio_format'])
+
+
+class _Entry:
+    __slots__ = ('expires', 'otp', 'audio', 'audio_format')
+
+    def __init__(self, expires, otp):
+        self.expires = expires
+        self.otp = otp
+        self.audio = None
+        self.audio_format = None
+
+    @property
+    def size(self):
+        return len(self.otp) + len(self.audio or b'')
+
+
+class ReplayAudioStore:
+    """Bounded, encrypted OTP prompt audio, rendered at most once per OTP"""
+
+    def __init__(self, render, max_entries=OTP_REPLAY_MAX_ENTRIES, max_bytes=OTP_REPLAY_MAX_BYTES,
+                 key=OTP_REPLAY_KEY):
+        # render(otp) -> ReplayAudio
+        self.render = render
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.renders = 0
+        self.evictions = 0
+        self.purged = 0
+        self._fernet = Fernet(key or Fernet.generate_key())
+        # Every OTP has the same lifetime, so insertion order is expiry order
+        self._entries = OrderedDict()
+        self._used = 0
+        self._lock = threading.Lock()
+
+    def put(self, key, otp, expires_at, audio=None, audio_format=None):
+        """Keep otp (and its audio, if rendered) for key until expires_at"""
+        if isinstance(expires_at, str):
+            expires_at = datetime.fromisoformat(expires_at)
+        entry = _Entry(expires_at.timestamp(), self._fernet.encrypt(otp.encode()))
+        if audio is not None:
+            entry.audio, entry.audio_format = self._fernet.encrypt(bytes(audio)), audio_format
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._used += entry.size
+            self._purge(time.time())
+            self._evict()
+
+    def replay(self, key, otp=None):
+        """Audio for key's live OTP, or None if there is none (or it is not otp)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= time.time():
+                self._remove(key)
+                self.purged += 1
+                entry = None
+            if entry is None:
+                return None
+            code = self._fernet.decrypt(entry.otp).decode()
+            if otp is not None and code != str(otp):
+                return None
+            if entry.audio is not None:
+                self.hits += 1
+                return ReplayAudio(self._fernet.decrypt(entry.audio), entry.audio_format)
+        # First replay of this OTP: render outside the lock and keep the audio
+        rendered = self.render(code)
+        with self._lock:
+            self.renders += 1
+            if self._entries.get(key) is entry and entry.audio is None:
+                self._used -= entry.size
+                entry.audio, entry.audio_format = self._fernet.encrypt(bytes(rendered.audio)), rendered.audio_format
+                self._used += entry.size
+                self._evict()
+        return ReplayAudio(bytes(rendered.audio), rendered.audio_format)
+
+    def discard(self, key):
+        with self._lock:
+            return self._remove(key)
+
+    def purge_expired(self, now=None):
+        with self._lock:
+            return self._purge(time.time() if now is None else now)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._used,
+                'hits': self.hits,
+                'renders': self.renders,
+                'evictions': self.evictions,
+                'purged': self.purged
+            }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._used -= entry.size
+        return True
+
+    def _purge(self, now):
+        purged = 0
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires > now:
+                break
+            self._remove(key)
+            purged += 1
+        self.purged += purged
+        return purged
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._used > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
@@ -3,28 +3,15 @@ Security middleware for API token validation with scope checking
 """
 
 from functools import wraps
+from datetime import datetime
 from flask import request, jsonify
 import hashlib
 
-import os
-import json
-from .security import decrypt_fernet, encrypt_fernet  # Assuming these are in security.py
-
-TOKEN_STORE_FILE = os.path.join('data', 'api_tokens.json')
+from .token_store import get_token_store
 
 def hash_token(token):
     return hashlib.sha256(token.encode()).hexdigest()
 
-def load_tokens():
-    if not os.path.exists(TOKEN_STORE_FILE):
-        return {}
-    with open(TOKEN_STORE_FILE, 'r') as f:
-        return json.load(f)
-
-def save_tokens(tokens):
-    with open(TOKEN_STORE_FILE, 'w') as f:
-        json.dump(tokens, f, indent=2)
-
 def require_token(scopes=None):
     if scopes is None:
         scopes = []
@@ -36,13 +23,8 @@ def require_token(scopes=None):
                 return jsonify({'error': 'Missing or invalid authorization header'}), 401
             
             token = auth_header.split(' ')[1]
-            tokens = load_tokens()
-            
-            token_data = None
-            for token_id, data in tokens.items():
-                if data.get('token_hash') == hash_token(token):
-                    token_data = data
-                    break
+            found = get_token_store().find_by_hash(hash_token(token))
+            token_id, token_data = found if found else (None, None)
             
             if not token_data or token_data.get('revoked', False):
                 return jsonify({'error': 'Invalid or revoked token'}), 401
@@ -54,10 +36,7 @@ def require_token(scopes=None):
                 return jsonify({'error': 'Insufficient scopes'}), 403
             
             # Update last used
-            from datetime import datetime
-            token_data['last_used'] = datetime.now().isoformat()
-            tokens[token_id] = token_data
-            save_tokens(tokens)
+            token_data = get_token_store().update(token_id, {'last_used': datetime.now().isoformat()}) or token_data
             
             request.api_token = token_data
             request.token_id = token_id
@@ -0,0 +1,177 @@
+"""
+API token storage backends
+Records are keyed by token id and carry the SHA-256 hash of the token.
+The JSON backend keeps the original data/api_tokens.json layout; the Redis
+backend lets several API nodes share token state and finds a token by its
+hash with one lookup instead of scanning every record.
+"""
+import os
+import json
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+TOKEN_STORE_BACKEND = os.getenv('TOKEN_STORE_BACKEND', 'json')
+TOKEN_STORE_FILE = os.getenv('TOKEN_STORE_FILE', os.path.join('data', 'api_tokens.json'))
+REDIS_URL = os.getenv('REDIS_URL') or 'redis://localhost:6379/0'
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))
+
+
+class TokenStore:
+    """Interface shared by all token storage backends"""
+
+    def get(self, token_id):
+        raise NotImplementedError
+
+    def put(self, token_id, record):
+        raise NotImplementedError
+
+    def update(self, token_id, changes):
+        raise NotImplementedError
+
+    def find_by_hash(self, token_hash):
+        """(token_id, record) for the token with this hash, or None"""
+        raise NotImplementedError
+
+    def items(self):
+        raise NotImplementedError
+
+
+class JsonTokenStore(TokenStore):
+    """Whole-file JSON store (original behaviour)"""
+
+    def __init__(self, path=TOKEN_STORE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load_tokens(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def save_tokens(self, tokens):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(tokens, f, indent=2)
+
+    def get(self, token_id):
+        with self.lock:
+            return self.load_tokens().get(token_id)
+
+    def put(self, token_id, record):
+        with self.lock:
+            tokens = self.load_tokens()
+            tokens[token_id] = dict(record)
+            self.save_tokens(tokens)
+
+    def update(self, token_id, changes):
+        with self.lock:
+            tokens = self.load_tokens()
+            if token_id not in tokens:
+                return None
+            tokens[token_id].update(changes)
+            self.save_tokens(tokens)
+            return tokens[token_id]
+
+    def find_by_hash(self, token_hash):
+        with self.lock:
+            for token_id, record in self.load_tokens().items():
+                if record.get('token_hash') == token_hash:
+                    return token_id, record
+        return None
+
+    def items(self):
+        with self.lock:
+            return list(self.load_tokens().items())
+
+
+class RedisTokenStore(TokenStore):
+    """
+    One JSON string per token plus a token hash -> token id index, so a
+    request is authenticated with two GETs. Updates use WATCH/MULTI.
+    """
+
+    def __init__(self, client=None, prefix='token:', index_prefix='token_hash:'):
+        if client is None:
+            if redis is None:
+                raise ImportError("The 'redis' package is required for the Redis token store")
+            client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(
+                REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS))
+        self.client = client
+        self.prefix = prefix
+        self.index_prefix = index_prefix
+
+    def _load(self, raw):
+        return json.loads(raw) if raw is not None else None
+
+    def get(self, token_id):
+        return self._load(self.client.get(f"{self.prefix}{token_id}"))
+
+    def put(self, token_id, record):
+        pipe = self.client.pipeline()
+        pipe.set(f"{self.prefix}{token_id}", json.dumps(record))
+        if record.get('token_hash'):
+            pipe.set(f"{self.index_prefix}{record['token_hash']}", token_id)
+        pipe.execute()
+
+    def update(self, token_id, changes):
+        key = f"{self.prefix}{token_id}"
+        updated = []
+
+        def apply(pipe):
+            record = self._load(pipe.get(key))
+            if record is None:
+                return
+            record.update(changes)
+            pipe.multi()
+            pipe.set(key, json.dumps(record))
+            updated.append(record)
+
+        self.client.transaction(apply, key)
+        return updated[0] if updated else None
+
+    def find_by_hash(self, token_hash):
+        token_id = self.client.get(f"{self.index_prefix}{token_hash}")
+        if token_id is None:
+            return None
+        token_id = token_id.decode() if isinstance(token_id, bytes) else token_id
+        record = self.get(token_id)
+        return (token_id, record) if record is not None else None
+
+    def items(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*", count=500))
+        if not keys:
+            return []
+        entries = []
+        for key, raw in zip(keys, self.client.mget(keys)):
+            if raw is not None:
+                key = key.decode() if isinstance(key, bytes) else key
+                entries.append((key[len(self.prefix):], self._load(raw)))
+        return entries
+
+
+def create_token_store(backend=TOKEN_STORE_BACKEND):
+    """Build the token store for the configured backend"""
+    if backend == 'redis':
+        return RedisTokenStore()
+    if backend in ('json', 'file'):
+        # 'file' is the name the src app's TOKEN_STORE_BACKEND uses
+        return JsonTokenStore()
+    raise ValueError(f"Unknown token store backend: {backend}")
+
+
+_token_store = None
+_token_store_lock = threading.Lock()
+
+
+def get_token_store():
+    """The process-wide token store, shared by the middleware and the token routes"""
+    global _token_store
+    with _token_store_lock:
+        if _token_store is None:
+            _token_store = create_token_store()
+    return _token_store
@@ -0,0 +1,95 @@
+"""
+Startup warm-up
+Runs a list of named steps (engine creation, a probe render) on a
+background thread so the first OTP after a restart does not pay for
+loading the speech driver. /ready answers 503 until every step is done.
+A failing step is retried with backoff, and /ready starts another round
+once those retries run out.
+"""
+import os
+import time
+import logging
+import threading
+
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+WARMUP_RETRIES = int(os.getenv('WARMUP_RETRIES', 3))
+WARMUP_RETRY_BACKOFF = float(os.getenv('WARMUP_RETRY_BACKOFF', 1.0))
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Runs (name, function) steps until they succeed and reports their progress"""
+
+    def __init__(self, steps, retries=WARMUP_RETRIES, backoff=WARMUP_RETRY_BACKOFF):
+        self.steps = steps
+        self.retries = retries
+        self.backoff = backoff
+        self.started_at = None
+        self.finished_at = None
+        self._results = {name: {'state': 'pending', 'seconds': None, 'error': None} for name, _ in steps}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+
+    def run(self):
+        self._done.clear()
+        self.started_at = time.time()
+        self.finished_at = None
+        for name, step in self.steps:
+            if self._results[name]['state'] == 'done':
+                continue
+            if any(result['state'] == 'failed' for result in self._results.values()):
+                # Later steps build on earlier ones
+                self._update(name, state='skipped')
+                continue
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+                self._update(name, state='running', error=None)
+                started = time.perf_counter()
+                try:
+                    step()
+                    self._update(name, state='done', seconds=round(time.perf_counter() - started, 3))
+                    break
+                except Exception as e:
+                    logger.error(f"Warm-up step {name} failed (attempt {attempt + 1}): {e}")
+                    self._update(name, state='failed', error=str(e), seconds=round(time.perf_counter() - started, 3))
+        self.finished_at = time.time()
+        self._done.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, daemon=True)
+                self._thread.start()
+
+    def retry(self):
+        """Start another round if the last one ended with failures; True if started"""
+        with self._lock:
+            if not self._done.is_set() or (self._thread is not None and self._thread.is_alive()):
+                return False
+            if all(result['state'] == 'done' for result in self._results.values()):
+                return False
+            self._done.clear()
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+            return True
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def status(self):
+        with self._lock:
+            finished = self._done.is_set()
+            ok = all(result['state'] == 'done' for result in self._results.values())
+            return {
+                'status': ('ready' if ok else 'failed') if finished else 'warming',
+                'ready': finished and ok,
+                'steps': {name: dict(result) for name, result in self._results.items()},
+                'seconds': round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None
+            }
+
+    def _update(self, name, **changes):
+        with self._lock:
+            self._results[name].update(changes)